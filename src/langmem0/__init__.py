@@ -1,5 +1,73 @@
-from langmem0.middleware import Mem0Middleware
+"""LangChain integrations backed by Mem0 memory."""
+
+from langmem0.breaker import CircuitBreaker
 from langmem0.chat_model import ChatOpenAI
-  
+from langmem0.clients import (
+    pooled_async_http_client,
+    pooled_http_client,
+    share_http_client,
+)
+from langmem0.compaction import Compactor
+from langmem0.condense import Condenser
+from langmem0.embedding_cache import CachedEmbedder, EmbeddingCache
+from langmem0.gates import ClassifierGate, FactGate, HeuristicGate
+from langmem0.graph import GraphBackend, InMemoryGraph, TimedGraph
+from langmem0.hot_tier import HotTier
+from langmem0.ingest import BatchingEmbedder, Ingestor
+from langmem0.invalidation import InvalidationBus, RedisBus, UnixSocketBus
+from langmem0.metrics import Metrics
+from langmem0.middleware import Mem0Middleware
+from langmem0.query import FanOutQueryBuilder, QueryBuilder
+from langmem0.ranking import Reranker, register_score_scale, to_similarity
+from langmem0.retention import RetentionPolicy, RetentionSweeper
+from langmem0.scheduler import TenantQuota, TenantScheduler
+from langmem0.sharding import ShardedMemory
+from langmem0.snapshot import (
+    export_ndjson,
+    import_ndjson,
+    iter_memories,
+    register_pager,
+)
+from langmem0.working_memory import WorkingMemory
+
 
-__all__ = ["Mem0Middleware", "ChatOpenAI"]
+__all__ = [
+    "BatchingEmbedder",
+    "CachedEmbedder",
+    "ChatOpenAI",
+    "CircuitBreaker",
+    "ClassifierGate",
+    "Compactor",
+    "Condenser",
+    "EmbeddingCache",
+    "FactGate",
+    "FanOutQueryBuilder",
+    "GraphBackend",
+    "HeuristicGate",
+    "HotTier",
+    "InMemoryGraph",
+    "Ingestor",
+    "InvalidationBus",
+    "Mem0Middleware",
+    "Metrics",
+    "QueryBuilder",
+    "RedisBus",
+    "Reranker",
+    "RetentionPolicy",
+    "RetentionSweeper",
+    "ShardedMemory",
+    "TenantQuota",
+    "TenantScheduler",
+    "TimedGraph",
+    "UnixSocketBus",
+    "WorkingMemory",
+    "export_ndjson",
+    "import_ndjson",
+    "iter_memories",
+    "pooled_async_http_client",
+    "pooled_http_client",
+    "register_pager",
+    "register_score_scale",
+    "share_http_client",
+    "to_similarity",
+]
@@ -0,0 +1,282 @@
+"""Circuit breaking of the mem0 backends.
+
+This module provides the CircuitBreaker class which ChatOpenAI and
+Mem0Middleware put around recall and memorize. It trips on failure and slow
+call rates, probes the backend again once half-open, and adapts the number
+of concurrent calls AIMD-style, so a degraded embedder, vector store or
+extraction LLM is bypassed instead of piling up latency and threads.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import AbstractContextManager, nullcontext
+from types import TracebackType
+from typing import Literal, Self
+
+from langmem0.metrics import Metrics
+
+
+logger = logging.getLogger(__name__)
+
+State = Literal["closed", "open", "half_open"]
+
+_STATE_GAUGE = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class CircuitBreaker:
+    """Circuit breaker with an adaptive concurrency limit.
+
+    Closed, calls go through while fewer than ``limit`` are in flight. The
+    limit grows by ``1 / limit`` on every fast success and halves on every
+    failure or slow call. Once the failure or slow call rate over the last
+    ``window`` calls crosses its threshold the breaker opens and rejects
+    every call for ``open_seconds``, then lets ``half_open_probes`` calls
+    through, closing again once they all succeed in time and opening again
+    as soon as one fails or is slow.
+
+    State is exposed in ``metrics`` as ``breaker.<name>.state`` (0 closed, 1
+    half-open, 2 open), ``.limit``, ``.inflight``, ``.rejected`` and
+    ``.opened``. ChatOpenAI and Mem0Middleware report it in their own
+    metrics.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 2.0,
+        slow_call_rate: float = 0.8,
+        window: int = 20,
+        min_calls: int = 10,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        metrics: Metrics | None = None,
+    ) -> None:
+        """Initialize a closed breaker.
+
+        Args:
+            name: The metric prefix, e.g. ``recall``.
+            failure_rate: Share of failed calls opening the breaker.
+            slow_call_seconds: Calls lasting longer are slow.
+            slow_call_rate: Share of slow calls opening the breaker.
+            window: The number of latest calls the rates are computed over.
+            min_calls: Calls needed in the window before the rates count.
+            open_seconds: Seconds the breaker stays open before probing.
+            half_open_probes: Probe calls let through when half-open.
+            max_concurrency: Upper bound of the concurrency limit.
+            min_concurrency: Lower bound of the concurrency limit.
+            metrics: The registry to report in, a new one by default.
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.metrics = metrics or Metrics()
+
+        self._state: State = "closed"
+        self._opened_at = 0.0
+        self._limit = float(max_concurrency)
+        self._inflight = 0
+        # Probes let through and succeeded since going half-open.
+        self._probes = 0
+        self._probes_passed = 0
+        # (failed, slow) of the latest calls.
+        self._calls: deque[tuple[bool, bool]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._publish_locked()
+
+    @property
+    def state(self) -> State:
+        """The current state."""
+        return self._state
+
+    @property
+    def limit(self) -> int:
+        """The current concurrency limit."""
+        return int(self._limit)
+
+    def report_to(self, metrics: Metrics) -> None:
+        """Report the state in another registry from now on.
+
+        Args:
+            metrics: The registry, e.g. the one of a chat model.
+        """
+        with self._lock:
+            self.metrics = metrics
+            self._publish_locked()
+
+    def acquire(self) -> "Permit | None":
+        """Ask for a call without blocking.
+
+        Returns:
+            Permit | None: A permit to run the call with, or None if the call
+            must bypass the backend.
+        """
+        with self._lock:
+            if (
+                self._state == "open"
+                and time.monotonic() - self._opened_at >= self.open_seconds
+            ):
+                self._transition_locked("half_open")
+
+            probe = self._state == "half_open"
+            if self._state == "open":
+                allowed = False
+            elif probe:
+                allowed = self._probes < self.half_open_probes
+            else:
+                allowed = self._inflight < int(self._limit)
+
+            if not allowed:
+                self.metrics.incr(f"breaker.{self.name}.rejected")
+                return None
+
+            self._inflight += 1
+            self._probes += probe
+            self._publish_locked()
+            return Permit(self, probe)
+
+    def record(
+        self, failed: bool, seconds: float, probe: bool = False
+    ) -> None:
+        """Record the outcome of a call run with a permit.
+
+        Args:
+            failed: Whether the call failed.
+            seconds: The duration of the call.
+            probe: Whether the call was let through as a half-open probe.
+                Only probes decide whether a half-open breaker closes.
+        """
+        slow = seconds > self.slow_call_seconds
+        with self._lock:
+            self._inflight -= 1
+            if failed or slow:
+                self._limit = max(self.min_concurrency, self._limit / 2)
+            else:
+                self._limit = min(
+                    self.max_concurrency, self._limit + 1 / self._limit
+                )
+
+            if self._state == "half_open" and probe:
+                self._probes_passed += not (failed or slow)
+                if failed or slow:
+                    self._transition_locked("open")
+                elif self._probes_passed >= self.half_open_probes:
+                    self._calls.clear()
+                    self._transition_locked("closed")
+            elif self._state == "closed":
+                self._calls.append((failed, slow))
+                if self._tripped_locked():
+                    self._transition_locked("open")
+
+            self._publish_locked()
+
+    def _tripped_locked(self) -> bool:
+        n = len(self._calls)
+        if n < self.min_calls:
+            return False
+
+        failures = sum(v for v, _ in self._calls)
+        slow = sum(v for _, v in self._calls)
+        return (
+            failures / n >= self.failure_rate
+            or slow / n >= self.slow_call_rate
+        )
+
+    def _transition_locked(self, state: State) -> None:
+        if state == self._state:
+            return
+
+        logger.warning(f"breaker {self.name} {self._state} -> {state}")
+        self._state = state
+        if state == "half_open":
+            self._probes = self._probes_passed = 0
+        if state == "open":
+            self._opened_at = time.monotonic()
+            self._calls.clear()
+            self.metrics.incr(f"breaker.{self.name}.opened")
+
+    def _publish_locked(self) -> None:
+        prefix = f"breaker.{self.name}"
+        self.metrics.set(f"{prefix}.state", _STATE_GAUGE[self._state])
+        self.metrics.set(f"{prefix}.limit", int(self._limit))
+        self.metrics.set(f"{prefix}.inflight", self._inflight)
+
+
+class Permit:
+    """Context manager running a call admitted by a CircuitBreaker.
+
+    The call's outcome and duration are recorded on exit. Exceptions are
+    logged and swallowed, so that a failing backend degrades to no memory
+    instead of failing the model call.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, probe: bool = False) -> None:
+        """Initialize the permit.
+
+        Args:
+            breaker: The breaker which granted the permit.
+            probe: Whether the call is a half-open probe.
+        """
+        self.breaker = breaker
+        self.probe = probe
+        self._start = 0.0
+
+    def __enter__(self) -> Self:
+        """Start timing the call."""
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> bool:
+        """Record the call, swallowing regular exceptions."""
+        # A cancelled call releases its permit without counting as failed.
+        failed = exc_type is not None and issubclass(exc_type, Exception)
+        self.breaker.record(
+            failed, time.perf_counter() - self._start, self.probe
+        )
+        if not failed:
+            return False
+
+        logger.exception(
+            f"{self.breaker.name} failed, bypassing memory",
+            exc_info=(exc_type, exc, tb),
+        )
+        return True
+
+
+def guard(
+    breaker: CircuitBreaker | None, name: str, metrics: Metrics
+) -> AbstractContextManager[object] | None:
+    """Ask a breaker for a call, recording bypassed calls.
+
+    Bypassed calls are counted as ``<name>.bypassed``.
+
+    Args:
+        breaker: The breaker, or None to admit every call unguarded.
+        name: The metric prefix, e.g. ``recall``.
+        metrics: The registry to record bypassed calls in.
+
+    Returns:
+        AbstractContextManager[object] | None: The context to run the call
+        in, or None if the call must bypass memory.
+    """
+    if breaker is None:
+        return nullcontext()
+
+    if (permit := breaker.acquire()) is None:
+        metrics.incr(f"{name}.bypassed")
+    return permit
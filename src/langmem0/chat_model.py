@@ -8,7 +8,8 @@ contextual understanding and response generation.
 import asyncio
 import logging
 import threading
-from typing import Any, Self
+import weakref
+from typing import Any, Literal, Self
 
 import langchain_openai
 from langchain_core.callbacks import (
@@ -16,7 +17,12 @@ from langchain_core.callbacks import (
     BaseRunManager,
     CallbackManagerForLLMRun,
 )
-from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.messages import (
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
 from langchain_core.outputs import ChatResult
 from langchain_openai.chat_models.base import _convert_message_to_dict
 from mem0 import AsyncMemory, Memory
@@ -24,10 +30,26 @@ from mem0.configs.base import MemoryConfig
 from mem0.configs.prompts import MEMORY_ANSWER_PROMPT
 from pydantic import Field, model_validator
 
+from langmem0.breaker import CircuitBreaker
+from langmem0.context import assemble
+from langmem0.embedding_cache import EmbeddingCache
+from langmem0.gates import Gate, admit
+from langmem0.graph import GraphBackend, TimedGraph
+from langmem0.hot_tier import HotTier
+from langmem0.metrics import Metrics
+from langmem0.query import QueryBuilder, message_text
+from langmem0.ranking import Reranker
+from langmem0.recall import Recall, aguarded, guarded, prepare
+from langmem0.retention import RetentionPolicy
+from langmem0.scheduler import TenantScheduler
+from langmem0.sharding import AsyncMemoryView, MemoryView, ShardedMemory
+from langmem0.working_memory import WorkingMemory, WorkingRun
+
 
 logger = logging.getLogger(__name__)
 
 _background_tasks = set()
+_sweeper_lock = threading.Lock()
 
 
 class Mem0Ctx:
@@ -54,11 +76,15 @@ class Mem0Ctx:
 
         if self.metadata:
             user_id = self.metadata.pop("user_id", user_id)
+            # Groups the model calls of e.g. an agent run into one run.
+            self.run_id = self.metadata.pop("run_id", None) or self.run_id
 
         if not user_id:
             raise ValueError("user_id must be provided")
 
         self.user_id = user_id
+        # Kept in the metadata, so it also namespaces stored memories.
+        self.tenant_id = self.metadata.get("tenant_id") or user_id
 
 
 class ChatOpenAI(langchain_openai.ChatOpenAI):
@@ -68,8 +94,96 @@ class ChatOpenAI(langchain_openai.ChatOpenAI):
         None, description="The user ID to use for the Mem0 API."
     )
 
-    mem0: dict[str, Any]
-    """The Mem0 configuration to use."""
+    mem0: dict[str, Any] | None = None
+    """The Mem0 configuration to use, required unless ``sharded_memory``."""
+
+    sharded_memory: ShardedMemory | None = None
+    """Optional pool of worker processes running Mem0 in place of ``mem0``.
+
+    The workers own their hot tiers, embedders and HTTP clients, so
+    ``hot_tier``, ``embedding_cache`` and the shared ``http_client`` are
+    configured on the pool instead.
+    """
+
+    hot_tier: HotTier | None = None
+    """Optional in-process hot tier answering recall for active users."""
+
+    embedding_cache: EmbeddingCache | None = None
+    """Optional persistent cache in front of the Mem0 embedder."""
+
+    recall_gate: Gate | None = None
+    """Optional gate deciding from the last user turn whether to recall."""
+
+    memorize_gate: Gate | None = None
+    """Optional gate deciding from the last user turn whether to memorize."""
+
+    query_builder: QueryBuilder = Field(default_factory=QueryBuilder)
+    """Builder of recall queries from the tail of the conversation."""
+
+    recall_limit: int = 10
+    """The maximum number of memories recalled."""
+
+    reranker: Reranker | None = None
+    """Optional re-ranking of recalled memories by recency and frequency.
+
+    It searches more candidates than ``recall_limit`` and may keep fewer.
+    """
+
+    retention: RetentionPolicy | None = None
+    """Optional retention policy keeping expired memories out of recall."""
+
+    graph: GraphBackend | None = None
+    """Optional graph backend queried for entity relations during recall."""
+
+    max_context_tokens: int | None = None
+    """Token budget shared by recalled memories and relations, if any."""
+
+    memory_placement: Literal["rewrite", "trailing"] = "rewrite"
+    """Where recalled memories go in the prompt.
+
+    ``rewrite`` rewrites the last user message in place to put the memories
+    ahead of the question. ``trailing`` leaves the input messages untouched
+    and sends a copy of the last user message with the memories in a
+    trailing content block, so the prompt prefix stays byte-identical across
+    turns and provider-side prefix caching hits.
+    """
+
+    memorize_mode: Literal["before", "after"] = "before"
+    """When to memorize an exchange.
+
+    ``before`` memorizes the input messages before the model answers.
+    ``after`` memorizes the new user turn with the generated reply once the
+    model has answered, so every exchange is extracted exactly once and with
+    its resolution. When the model calls tools first, the user turn is
+    memorized with the answer to the tool results.
+    """
+
+    scheduler: TenantScheduler | None = None
+    """Optional scheduler applying per-tenant quotas to memory operations.
+
+    The tenant is the ``tenant_id`` of the run metadata, falling back to the
+    user.
+    """
+
+    working_memory: WorkingMemory | None = None
+    """Optional run-scoped buffer replacing per-call memorize.
+
+    Messages of a run are buffered in RAM and recalled from there during the
+    run, then promoted to long-term memory with one extraction on
+    ``end_run`` or once the run goes idle. Model calls are grouped into a
+    run by the ``run_id`` of the run metadata, falling back to the LangChain
+    run of the call. Call ``flush`` on shutdown to promote the runs still
+    buffered.
+    """
+
+    recall_breaker: CircuitBreaker | None = None
+    """Optional circuit breaker bypassing recall while mem0 is degraded."""
+
+    memorize_breaker: CircuitBreaker | None = None
+    """Optional circuit breaker bypassing memorize while mem0 is degraded."""
+
+    metrics: Metrics = Field(default_factory=Metrics)
+    """Metrics of the memory operations."""
 
     async def _agenerate(
         self,
@@ -79,9 +193,13 @@ class ChatOpenAI(langchain_openai.ChatOpenAI):
         **kwargs: Any,
     ) -> ChatResult:
         if not isinstance(messages[-1], HumanMessage):
-            return await super()._agenerate(
+            result = await super()._agenerate(
                 messages, stop, run_manager, **kwargs
             )
+            if exchange := self._resolved_exchange(messages, result):
+                ctx = Mem0Ctx(self.user_id, run_manager)
+                await self._amemorize(ctx, exchange)
+            return result
 
         ctx = Mem0Ctx(self.user_id, run_manager)
         logger.info(f"Generating response for user {ctx.user_id}")
@@ -90,18 +208,42 @@ class ChatOpenAI(langchain_openai.ChatOpenAI):
 
         open_ai_messages = [_convert_message_to_dict(v) for v in messages]
 
-        await self._amemorize_nonblocking(ctx, open_ai_messages)
-        relevant_memories = await self._arecall(ctx, open_ai_messages)
-        logger.debug(
-            f"Retrieved {len(relevant_memories)} "
-            f"relevant memories for user {ctx.user_id}"
+        memorize = admit(
+            self.memorize_gate,
+            messages[-1].text,
+            "memorize.gate",
+            self.metrics,
         )
+        if memorize and self.memorize_mode == "before":
+            await self._amemorize(ctx, open_ai_messages)
+        if admit(
+            self.recall_gate, messages[-1].text, "recall.gate", self.metrics
+        ):
+            relevant_memories = await self._aguarded_recall(
+                ctx, open_ai_messages
+            )
+        else:
+            relevant_memories = None
+
+        if relevant_memories is not None:
+            logger.debug(
+                f"Retrieved {len(relevant_memories)} "
+                f"relevant memories for user {ctx.user_id}"
+            )
+
+            messages = self._with_memories(messages, relevant_memories)
 
-        messages[-1].content = self._rewrite_query_with_memories(
-            messages[-1].content, relevant_memories
+        result = await super()._agenerate(
+            messages, stop, run_manager, **kwargs
         )
+        if (
+            memorize
+            and self.memorize_mode == "after"
+            and (exchange := _exchange(open_ai_messages[-1], result))
+        ):
+            await self._amemorize(ctx, exchange)
 
-        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        return result
 
     def _generate(
         self,
@@ -119,23 +261,92 @@ class ChatOpenAI(langchain_openai.ChatOpenAI):
         )
 
         if not isinstance(messages[-1], HumanMessage):
-            return super()._generate(messages, stop, run_manager, **kwargs)
+            result = super()._generate(messages, stop, run_manager, **kwargs)
+            if exchange := self._resolved_exchange(messages, result):
+                self._memorize(ctx, exchange)
+            return result
 
         messages = _prepend_system_prompt_if_none(messages)
 
         open_ai_messages = [_convert_message_to_dict(v) for v in messages]
-        self._memorize_nonblocking(ctx, open_ai_messages)
-        relevant_memories = self._recall(ctx, open_ai_messages)
-        logger.debug(
-            f"Retrieved {len(relevant_memories)} "
-            f"relevant memories for user {ctx.user_id}"
+        memorize = admit(
+            self.memorize_gate,
+            messages[-1].text,
+            "memorize.gate",
+            self.metrics,
         )
+        if memorize and self.memorize_mode == "before":
+            self._memorize(ctx, open_ai_messages)
+        if admit(
+            self.recall_gate, messages[-1].text, "recall.gate", self.metrics
+        ):
+            relevant_memories = self._guarded_recall(ctx, open_ai_messages)
+        else:
+            relevant_memories = None
+
+        if relevant_memories is not None:
+            logger.debug(
+                f"Retrieved {len(relevant_memories)} "
+                f"relevant memories for user {ctx.user_id}"
+            )
 
-        messages[-1].content = self._rewrite_query_with_memories(
-            messages[-1].content, relevant_memories
-        )
+            messages = self._with_memories(messages, relevant_memories)
+
+        result = super()._generate(messages, stop, run_manager, **kwargs)
+        if (
+            memorize
+            and self.memorize_mode == "after"
+            and (exchange := _exchange(open_ai_messages[-1], result))
+        ):
+            self._memorize(ctx, exchange)
+
+        return result
+
+    async def aprefetch(self, user_id: str | None = None) -> bool:
+        """Async version of ``prefetch``.
+
+        Args:
+            user_id: The user identifier, defaulting to ``self.user_id``.
+
+        Returns:
+            bool: Whether memories of the user are cached afterwards.
+
+        Raises:
+            ValueError: If no user_id is available.
+        """
+        if not (user_id := user_id or self.user_id):
+            raise ValueError("user_id must be provided")
+
+        if self.hot_tier is None:
+            logger.debug("prefetch without hot tier is a no-op")
+            return False
+
+        return await self.hot_tier.aprefetch(self._am0, user_id)
 
-        return super()._generate(messages, stop, run_manager, **kwargs)
+    def prefetch(self, user_id: str | None = None) -> bool:
+        """Load memories of a user into the hot tier ahead of recall.
+
+        Call it when a session or thread opens, e.g. on websocket connect,
+        so that the first model call doesn't pay the vector store round
+        trip.
+
+        Args:
+            user_id: The user identifier, defaulting to ``self.user_id``.
+
+        Returns:
+            bool: Whether memories of the user are cached afterwards.
+
+        Raises:
+            ValueError: If no user_id is available.
+        """
+        if not (user_id := user_id or self.user_id):
+            raise ValueError("user_id must be provided")
+
+        if self.hot_tier is None:
+            logger.debug("prefetch without hot tier is a no-op")
+            return False
+
+        return self.hot_tier.prefetch(self._m0, user_id)
 
     @classmethod
     def get_lc_namespace(cls) -> list[str]:
@@ -157,87 +368,356 @@ class ChatOpenAI(langchain_openai.ChatOpenAI):
 
         Returns:
             Self: The validated instance with Mem0 memory configured.
+
+        Raises:
+            ValueError: If neither or both of ``mem0`` and
+                ``sharded_memory`` are given, or a hot tier is given with
+                ``sharded_memory``.
         """
-        self._m0 = Memory.from_config(self.mem0)
+        if (self.mem0 is None) == (self.sharded_memory is None):
+            raise ValueError("exactly one of mem0 and sharded_memory")
+
+        if self.sharded_memory is not None:
+            if self.hot_tier is not None:
+                raise ValueError("give the hot tier to sharded_memory")
+            self._m0 = MemoryView(self.sharded_memory)
+            self._am0 = AsyncMemoryView(self.sharded_memory)
+        else:
+            self._m0 = Memory.from_config(self.mem0)
+
+            c = AsyncMemory._process_config(self.mem0)
+            self._am0 = AsyncMemory(config=MemoryConfig(**c))
+
+            # One pool for the chat model and the mem0 backends, see clients.
+            for m in (self._m0, self._am0):
+                prepare(
+                    m, self.metrics, self.http_client, self.embedding_cache
+                )
+
+        self._recaller = Recall(
+            self._m0,
+            self._am0,
+            self.query_builder,
+            self.metrics,
+            limit=self.recall_limit,
+            hot_tier=self.hot_tier,
+            graph=(
+                TimedGraph(self.graph, self.metrics)
+                if self.graph is not None
+                else None
+            ),
+            reranker=self.reranker,
+            retention=self.retention,
+        )
+        for breaker in (self.recall_breaker, self.memorize_breaker):
+            if breaker is not None:
+                breaker.report_to(self.metrics)
 
-        c = AsyncMemory._process_config(self.mem0)
-        self._am0 = AsyncMemory(config=MemoryConfig(**c))
+        # Stops the background sweep of the working memory, if running.
+        self._sweeper: threading.Event | None = None
 
         return self
 
+    async def aend_run(self, run_id: str) -> bool:
+        """Async version of ``end_run``.
+
+        Args:
+            run_id: The run identifier.
+
+        Returns:
+            bool: Whether the run was buffered.
+        """
+        if self.working_memory is None:
+            return False
+        # Summarizing may call an LLM, keep it off the event loop.
+        run = await asyncio.to_thread(self.working_memory.pop, run_id)
+        if run is None:
+            return False
+
+        await self._amemorize_nonblocking(_run_ctx(run), run.messages)
+        return True
+
+    def end_run(self, run_id: str) -> bool:
+        """Promote a run of the working memory to long-term memory.
+
+        Args:
+            run_id: The run identifier, i.e. the ``run_id`` of the run
+                metadata.
+
+        Returns:
+            bool: Whether the run was buffered.
+        """
+        if self.working_memory is None:
+            return False
+        if (run := self.working_memory.pop(run_id)) is None:
+            return False
+
+        self._memorize_nonblocking(_run_ctx(run), run.messages)
+        return True
+
+    async def aflush(self) -> int:
+        """Async version of ``flush``.
+
+        Returns:
+            int: The number of promoted runs.
+        """
+        if self.working_memory is None:
+            return 0
+
+        self._stop_sweeping()
+        runs = await asyncio.to_thread(self.working_memory.drain)
+        await asyncio.gather(
+            *(self._aadd(_run_ctx(v), v.messages) for v in runs)
+        )
+        return len(runs)
+
+    def flush(self) -> int:
+        """Promote every run of the working memory, blocking until done.
+
+        Call it on shutdown, buffered runs are lost otherwise. It also
+        stops the background sweep of idle runs until the next model call.
+
+        Returns:
+            int: The number of promoted runs.
+        """
+        if self.working_memory is None:
+            return 0
+
+        self._stop_sweeping()
+        runs = self.working_memory.drain()
+        for v in runs:
+            self._add(_run_ctx(v), v.messages)
+        return len(runs)
+
+    async def _amemorize(
+        self, ctx: Mem0Ctx, messages: list[dict[str, str]]
+    ) -> None:
+        if self.working_memory is None or ctx.run_id is None:
+            await self._amemorize_nonblocking(ctx, messages)
+            return
+
+        self.working_memory.record(
+            ctx.run_id, ctx.user_id, messages, ctx.metadata
+        )
+        self._sweep_in_background()
+        for run in await asyncio.to_thread(self.working_memory.expired):
+            await self._amemorize_nonblocking(_run_ctx(run), run.messages)
+
+    def _memorize(self, ctx: Mem0Ctx, messages: list[dict[str, str]]) -> None:
+        if self.working_memory is None or ctx.run_id is None:
+            self._memorize_nonblocking(ctx, messages)
+            return
+
+        self.working_memory.record(
+            ctx.run_id, ctx.user_id, messages, ctx.metadata
+        )
+        self._sweep_in_background()
+        for run in self.working_memory.expired():
+            self._memorize_nonblocking(_run_ctx(run), run.messages)
+
+    def _sweep_in_background(self) -> None:
+        """Promote idle runs even when no more model calls come."""
+        with _sweeper_lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Event()
+            threading.Thread(
+                target=_sweep,
+                args=(
+                    # Weak, the sweep mustn't keep the model alive.
+                    weakref.ref(self),
+                    self._sweeper,
+                    max(1.0, self.working_memory.idle_seconds / 10),
+                ),
+                daemon=True,
+            ).start()
+
+    def _stop_sweeping(self) -> None:
+        with _sweeper_lock:
+            if self._sweeper is not None:
+                self._sweeper.set()
+                self._sweeper = None
+
+    def _promote_expired(self) -> None:
+        for run in self.working_memory.expired():
+            self._memorize_nonblocking(_run_ctx(run), run.messages)
+
     async def _amemorize_nonblocking(
         self,
         ctx: Mem0Ctx,
         messages: list[dict[str, str]],
     ) -> None:
-        async def add_task() -> None:
-            logger.debug(f"Adding to memory non-blocking with {ctx.user_id=}")
-            await self._am0.add(
-                messages=messages,
-                user_id=ctx.user_id,
-                run_id=ctx.run_id,
-                metadata=ctx.metadata,
-            )
-
+        logger.debug(f"Adding to memory non-blocking with {ctx.user_id=}")
         # https://docs.python.org/3/library/asyncio-task.html#creating-tasks
-        task = asyncio.create_task(add_task())
+        task = asyncio.create_task(self._aadd(ctx, messages))
         _background_tasks.add(task)
         task.add_done_callback(_background_tasks.discard)
 
-    async def _arecall(
-        self,
-        ctx: Mem0Ctx,
-        messages: list[dict[str, str]],
-        limit: int = 10,
-    ) -> dict[str, Any]:
-        conversation = "\n".join(
-            f"{message['role']}: {message['content']}"
-            for message in messages[-6:]
-        )
+    async def _aadd(
+        self, ctx: Mem0Ctx, messages: list[dict[str, str]]
+    ) -> None:
+        r = None
+        async with aguarded(
+            self.scheduler,
+            ctx.tenant_id,
+            self.memorize_breaker,
+            "memorize",
+            self.metrics,
+        ) as admitted:
+            if admitted:
+                r = await self._am0.add(
+                    messages=messages,
+                    user_id=ctx.user_id,
+                    run_id=ctx.run_id,
+                    metadata=ctx.metadata,
+                )
+        if r is not None and self.hot_tier is not None:
+            await self.hot_tier.aobserve(
+                self._am0, r, user_id=ctx.user_id, metadata=ctx.metadata
+            )
 
-        # PASS RUN-ID WILL SCOPE SEARCHING WITHIN THE SPECIFIC RUN'S MEMORIES
-        return await self._am0.search(
-            conversation,
-            user_id=ctx.user_id,
-            # run_id=ctx.run_id,
-            filters=ctx.metadata,
-            limit=limit,
-        )
+    async def _aguarded_recall(
+        self, ctx: Mem0Ctx, messages: list[dict[str, str]]
+    ) -> dict[str, Any] | None:
+        """Recall, None if the breaker bypasses it and nothing is buffered."""
+        r = None
+        async with aguarded(
+            self.scheduler,
+            ctx.tenant_id,
+            self.recall_breaker,
+            "recall",
+            self.metrics,
+        ) as admitted:
+            if admitted:
+                r = await self._recaller.arecall(
+                    messages, ctx.user_id, ctx.metadata
+                )
+        return self._with_working_memory(ctx, messages, r)
 
     def _memorize_nonblocking(
         self,
         ctx: Mem0Ctx,
         messages: list[dict[str, str]],
     ) -> None:
-        def add_task() -> None:
-            logger.debug(f"Adding to memory non-blocking with {ctx.user_id}")
-            self._m0.add(
-                messages=messages,
-                user_id=ctx.user_id,
-                run_id=ctx.run_id,
-                metadata=ctx.metadata,
+        logger.debug(f"Adding to memory non-blocking with {ctx.user_id}")
+        threading.Thread(
+            target=self._add, args=(ctx, messages), daemon=True
+        ).start()
+
+    def _add(self, ctx: Mem0Ctx, messages: list[dict[str, str]]) -> None:
+        r = None
+        with guarded(
+            self.scheduler,
+            ctx.tenant_id,
+            self.memorize_breaker,
+            "memorize",
+            self.metrics,
+        ) as admitted:
+            if admitted:
+                r = self._m0.add(
+                    messages=messages,
+                    user_id=ctx.user_id,
+                    run_id=ctx.run_id,
+                    metadata=ctx.metadata,
+                )
+        if r is not None and self.hot_tier is not None:
+            self.hot_tier.observe(
+                self._m0, r, user_id=ctx.user_id, metadata=ctx.metadata
             )
 
-        threading.Thread(target=add_task, daemon=True).start()
-
-    def _recall(
+    def _guarded_recall(
+        self, ctx: Mem0Ctx, messages: list[dict[str, str]]
+    ) -> dict[str, Any] | None:
+        """Recall, None if the breaker bypasses it and nothing is buffered."""
+        r = None
+        with guarded(
+            self.scheduler,
+            ctx.tenant_id,
+            self.recall_breaker,
+            "recall",
+            self.metrics,
+        ) as admitted:
+            if admitted:
+                r = self._recaller.recall(messages, ctx.user_id, ctx.metadata)
+        return self._with_working_memory(ctx, messages, r)
+
+    def _with_working_memory(
         self,
         ctx: Mem0Ctx,
         messages: list[dict[str, str]],
-        limit: int = 10,
-    ) -> dict[str, Any]:
-        conversation = "\n".join(
-            f"{message['role']}: {message['content']}"
-            for message in messages[-6:]
+        r: dict[str, Any] | None,
+    ) -> dict[str, Any] | None:
+        """Add the matching buffered messages of the run to recall results."""
+        if self.working_memory is None or ctx.run_id is None:
+            return r
+        if not (queries := self.query_builder.build(messages)):
+            return r
+
+        hits = self.working_memory.search(
+            ctx.run_id,
+            queries[0],
+            self.recall_limit,
+            exclude={message_text(v) for v in messages},
+        )
+        if not hits:
+            return r
+
+        self.metrics.incr("recall.working", len(hits))
+        r = r or {"results": []}
+        return r | {"results": [*hits, *r["results"]]}
+
+    def _with_memories(
+        self, messages: list[BaseMessage], relevant_memories: dict[str, Any]
+    ) -> list[BaseMessage]:
+        if self.memory_placement == "rewrite":
+            # A copy, the history of the caller keeps the bare user turn.
+            content = self._rewrite_query_with_memories(
+                messages[-1].content, relevant_memories
+            )
+            return [
+                *messages[:-1],
+                messages[-1].model_copy(update={"content": content}),
+            ]
+
+        memories, relations = assemble(
+            relevant_memories, self.max_context_tokens
         )
+        if not memories and not relations:
+            return messages
 
-        # PASS RUN-ID WILL SCOPE SEARCHING WITHIN THE SPECIFIC RUN'S MEMORIES
-        return self._m0.search(
-            conversation,
-            user_id=ctx.user_id,
-            filters=ctx.metadata,
-            limit=limit,
+        memorized = _format_memories(memories, relations)
+
+        last = messages[-1]
+        content = (
+            [{"type": "text", "text": last.content}]
+            if isinstance(last.content, str)
+            else list(last.content)
+        )
+        trailing = {"type": "text", "text": memorized.rstrip("\n")}
+        return [
+            *messages[:-1],
+            last.model_copy(update={"content": [*content, trailing]}),
+        ]
+
+    def _resolved_exchange(
+        self, messages: list[BaseMessage], result: ChatResult
+    ) -> list[dict[str, Any]]:
+        """Return the exchange a reply to tool results resolves, if any."""
+        if self.memorize_mode != "after" or not isinstance(
+            messages[-1], ToolMessage
+        ):
+            return []
+
+        user_turn = next(
+            (v for v in reversed(messages) if isinstance(v, HumanMessage)),
+            None,
         )
+        if user_turn is None or not admit(
+            self.memorize_gate, user_turn.text, "memorize.gate", self.metrics
+        ):
+            return []
+
+        return _exchange(_convert_message_to_dict(user_turn), result)
 
     def _rewrite_query_with_memories(
         self, user_question: str, relevant_memories: dict[str, Any]
@@ -247,18 +727,60 @@ class ChatOpenAI(langchain_openai.ChatOpenAI):
         s = json.dumps(relevant_memories)
         print(f"relevant_memories: {s}")
 
-        memorized = "\n".join(
-            v["memory"] for v in relevant_memories["results"]
+        memories, relations = assemble(
+            relevant_memories, self.max_context_tokens
         )
-        # 只有开启 graph 才会有 relations
-        # entities=relevant_memories.get('relations', [])
-
         return (
-            f"- Relevant Memories/Facts: {memorized}\n\n"
-            f"- User Question: {user_question}"
+            _format_memories(memories, relations)
+            + f"- User Question: {user_question}"
         )
 
 
+def _exchange(
+    user_turn: dict[str, Any], result: ChatResult
+) -> list[dict[str, Any]]:
+    """Return the user turn followed by the text of the generated reply."""
+    reply = result.generations[0].message
+    if getattr(reply, "tool_calls", None) or not reply.text:
+        # A tool call request, whatever its preamble, the exchange resolves
+        # in a later call.
+        return []
+
+    return [user_turn, _convert_message_to_dict(reply)]
+
+
+def _sweep(
+    ref: "weakref.ref[ChatOpenAI]", stop: threading.Event, interval: float
+) -> None:
+    """Promote the idle runs of a model until stopped or collected."""
+    while not stop.wait(interval):
+        if (model := ref()) is None:
+            return
+        model._promote_expired()
+        del model
+
+
+def _run_ctx(run: WorkingRun) -> Mem0Ctx:
+    """Return the context to promote a run of the working memory with."""
+    ctx = Mem0Ctx(run.user_id, None)
+    ctx.run_id = run.run_id
+    ctx.metadata = run.metadata
+    ctx.tenant_id = run.metadata.get("tenant_id") or run.user_id
+    return ctx
+
+
+def _format_memories(memories: list[str], relations: list[str]) -> str:
+    """Format recalled memories and relations as a block of the prompt."""
+    memorized = "\n".join(memories)
+
+    s = f"- Relevant Memories/Facts: {memorized}\n\n"
+    # Only present with a graph store or a graph backend.
+    if relations:
+        s += "- Entity Relations: " + "\n".join(relations) + "\n\n"
+
+    return s
+
+
 def _prepend_system_prompt_if_none(
     messages: list[BaseMessage],
 ) -> list[BaseMessage]:
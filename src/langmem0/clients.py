@@ -0,0 +1,111 @@
+"""Shared HTTP clients of the OpenAI-compatible backends.
+
+This module provides factories of tuned, pooled httpx clients and the
+``share_http_client`` function rewiring the LLM and embedder of a mem0
+memory onto such a client. ChatOpenAI and Mem0Middleware use it so that
+every instance, the chat model included, shares one connection pool
+instead of opening its own connections and TLS sessions.
+"""
+
+import logging
+
+import httpx
+import openai
+from mem0 import AsyncMemory, Memory
+
+
+logger = logging.getLogger(__name__)
+
+
+def pooled_http_client(
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry: float = 60.0,
+    http2: bool = False,
+    timeout: float = 60.0,
+) -> httpx.Client:
+    """Create an HTTP client tuned for many concurrent API calls.
+
+    Args:
+        max_connections: Connections open at once across all hosts.
+        max_keepalive_connections: Idle connections kept alive.
+        keepalive_expiry: Seconds an idle connection is kept alive.
+        http2: Whether to multiplex calls over HTTP/2, which requires the
+            ``h2`` package.
+        timeout: Seconds before a call times out.
+
+    Returns:
+        httpx.Client: The client, to share between instances.
+    """
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        http2=http2,
+        timeout=timeout,
+    )
+
+
+def pooled_async_http_client(
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry: float = 60.0,
+    http2: bool = False,
+    timeout: float = 60.0,
+) -> httpx.AsyncClient:
+    """Async version of ``pooled_http_client``.
+
+    Args:
+        max_connections: Connections open at once across all hosts.
+        max_keepalive_connections: Idle connections kept alive.
+        keepalive_expiry: Seconds an idle connection is kept alive.
+        http2: Whether to multiplex calls over HTTP/2, which requires the
+            ``h2`` package.
+        timeout: Seconds before a call times out.
+
+    Returns:
+        httpx.AsyncClient: The client, to share between instances of the
+        same event loop.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        http2=http2,
+        timeout=timeout,
+    )
+
+
+def share_http_client(
+    m: Memory | AsyncMemory, http_client: httpx.Client
+) -> int:
+    """Make the OpenAI-compatible backends of a memory use an HTTP client.
+
+    mem0 calls its LLM and embedder synchronously, from worker threads for
+    AsyncMemory, so both kinds of memory take a sync client. Backends of
+    other providers are left alone.
+
+    Args:
+        m: The memory, before its embedder is wrapped.
+        http_client: The shared client.
+
+    Returns:
+        int: The number of rewired backends.
+    """
+    backends = [m.llm, m.embedding_model]
+    if m.enable_graph:
+        backends.append(getattr(m.graph, "llm", None))
+
+    n = 0
+    for v in backends:
+        client = getattr(v, "client", None)
+        if isinstance(client, openai.OpenAI):
+            # Same credentials, base URL and retries, pooled transport.
+            v.client = client.with_options(http_client=http_client)
+            n += 1
+    logger.debug(f"{n} mem0 backends share the HTTP client")
+    return n
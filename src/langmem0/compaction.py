@@ -0,0 +1,278 @@
+"""Background compaction of near-duplicate memories.
+
+This module provides the Compactor class which scans the memories of users,
+clusters them by embedding similarity and deletes, or merges into one, the
+redundant members of every cluster through the Mem0 API, so that vector
+search stays fast and recall stops injecting the same fact several times.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+from mem0 import Memory
+
+from langmem0.hot_tier import HotTier
+from langmem0.metrics import Metrics
+from langmem0.snapshot import iter_memories
+from langmem0.vectors import normalize
+
+
+logger = logging.getLogger(__name__)
+
+# Rows of the similarity matrix computed at once.
+_BLOCK_ROWS = 1024
+
+
+class Compactor:
+    """Deduplicate the memories of users in priority order.
+
+    Users are queued with ``enqueue``, e.g. by how many memories they wrote
+    since their last compaction, and ``run`` compacts the highest priority
+    ones first, within an optional budget, so that a large backlog is worked
+    through incrementally. ``start`` does so periodically in a background
+    thread.
+
+    Memories are clustered greedily, newest first: every memory not yet
+    clustered leads a cluster of the older memories whose cosine similarity
+    to it reaches ``threshold``. The leader survives, being the most recent
+    statement of the fact, and the other members are deleted.
+    """
+
+    def __init__(
+        self,
+        config: dict[str, Any],
+        threshold: float = 0.92,
+        merge: Callable[[list[str]], str] | None = None,
+        max_memories_per_user: int = 10000,
+        hot_tier: HotTier | None = None,
+    ) -> None:
+        """Initialize the compactor.
+
+        Args:
+            config: Mem0 configuration dictionary.
+            threshold: Cosine similarity from which memories are redundant.
+            merge: Optional function combining the texts of a cluster,
+                leader first, into the text of the surviving memory. By
+                default the leader is kept as is.
+            max_memories_per_user: The number of memories of a user scanned
+                at most in one compaction.
+            hot_tier: Optional hot tier to invalidate compacted users in.
+        """
+        self.threshold = threshold
+        self.merge = merge
+        self.max_memories_per_user = max_memories_per_user
+        self.hot_tier = hot_tier
+        self.metrics = Metrics()
+        self.m0 = Memory.from_config(config)
+
+        # Max-heap of (-priority, seq, user_id), stale entries are skipped.
+        self._heap: list[tuple[float, int, str]] = []
+        self._priorities: dict[str, float] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def enqueue(self, user_id: str, priority: float = 1.0) -> None:
+        """Queue a user for compaction, raising the priority if queued.
+
+        Args:
+            user_id: The user identifier.
+            priority: Added to the priority of the user.
+        """
+        with self._lock:
+            p = self._priorities.get(user_id, 0.0) + priority
+            self._priorities[user_id] = p
+            heapq.heappush(self._heap, (-p, next(self._seq), user_id))
+
+    def pending(self) -> int:
+        """Return the number of queued users."""
+        return len(self._priorities)
+
+    def run(
+        self, max_users: int | None = None, max_seconds: float | None = None
+    ) -> dict[str, float]:
+        """Compact queued users, highest priority first.
+
+        Users left over by the budget stay queued for the next run.
+
+        Args:
+            max_users: The number of users compacted at most.
+            max_seconds: Seconds after which no further user is started.
+
+        Returns:
+            dict[str, float]: The metrics accumulated so far, see
+            ``compact_user``, plus the overall ``compaction.reduction``.
+        """
+        start = time.monotonic()
+        for n in itertools.count():
+            if max_users is not None and n >= max_users:
+                break
+            if (
+                max_seconds is not None
+                and time.monotonic() - start >= max_seconds
+            ):
+                break
+            if (user_id := self._pop()) is None:
+                break
+            try:
+                self.compact_user(user_id)
+            except Exception:
+                logger.exception(f"compaction of {user_id=} failed")
+                self.metrics.incr("compaction.failed")
+
+        before = self.metrics.get("compaction.memories_before")
+        after = self.metrics.get("compaction.memories_after")
+        self.metrics.set(
+            "compaction.reduction", 1 - after / before if before else 0
+        )
+        return self.metrics.snapshot()
+
+    def compact_user(self, user_id: str) -> dict[str, Any]:
+        """Compact the memories of a user.
+
+        Counts are accumulated in ``metrics`` as ``compaction.users``,
+        ``.memories_before``, ``.memories_after``, ``.deleted`` and
+        ``.updated``.
+
+        Args:
+            user_id: The user identifier.
+
+        Returns:
+            dict[str, Any]: The ``user_id``, the number of memories
+            ``before`` and ``after`` compaction, and the numbers of
+            ``deleted`` and ``updated`` memories.
+        """
+        with self.metrics.timer("compaction.user"):
+            rows = self._scan(user_id)
+            clusters = self._cluster(rows)
+
+            deleted = updated = 0
+            for cluster in clusters:
+                if len(cluster) < 2:
+                    continue
+                leader, *redundant = (rows[i] for i in cluster)
+                if self.merge is not None:
+                    texts = [
+                        v["payload"]["data"] for v in (leader, *redundant)
+                    ]
+                    if (text := self.merge(texts)) != texts[0]:
+                        self.m0.update(leader["id"], text)
+                        updated += 1
+                for v in redundant:
+                    self.m0.delete(v["id"])
+                    deleted += 1
+
+        if (deleted or updated) and self.hot_tier is not None:
+            self.hot_tier.invalidate(user_id)
+
+        self.metrics.incr("compaction.users")
+        self.metrics.incr("compaction.memories_before", len(rows))
+        self.metrics.incr("compaction.memories_after", len(rows) - deleted)
+        self.metrics.incr("compaction.deleted", deleted)
+        self.metrics.incr("compaction.updated", updated)
+        logger.info(
+            f"compacted {user_id=}: {len(rows)} -> {len(rows) - deleted} "
+            f"memories, {updated} merged"
+        )
+        return {
+            "user_id": user_id,
+            "before": len(rows),
+            "after": len(rows) - deleted,
+            "deleted": deleted,
+            "updated": updated,
+        }
+
+    def start(
+        self,
+        interval: float = 60.0,
+        max_users: int | None = None,
+        max_seconds: float | None = None,
+    ) -> None:
+        """Run compaction periodically in a background thread.
+
+        Args:
+            interval: Seconds between runs.
+            max_users: The number of users compacted at most per run.
+            max_seconds: Seconds after which a run starts no further user.
+        """
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                self.run(max_users, max_seconds)
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread, letting the current user finish."""
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _pop(self) -> str | None:
+        with self._lock:
+            while self._heap:
+                p, _, user_id = heapq.heappop(self._heap)
+                if self._priorities.get(user_id) == -p:
+                    del self._priorities[user_id]
+                    return user_id
+        return None
+
+    def _scan(self, user_id: str) -> list[dict[str, Any]]:
+        """Read the memories of a user with their vectors, newest first."""
+        rows = list(
+            itertools.islice(
+                iter_memories(self.m0, {"user_id": user_id}),
+                self.max_memories_per_user,
+            )
+        )
+        for v in rows:
+            if v.get("vector") is None:
+                v["vector"] = self.m0.embedding_model.embed(
+                    v["payload"]["data"], "add"
+                )
+        rows.sort(
+            key=lambda v: (
+                v["payload"].get("updated_at")
+                or v["payload"].get("created_at")
+                or ""
+            ),
+            reverse=True,
+        )
+        return rows
+
+    def _cluster(self, rows: list[dict[str, Any]]) -> list[list[int]]:
+        """Cluster rows around leaders, in the order of the rows."""
+        if not rows:
+            return []
+
+        x = normalize(np.array([v["vector"] for v in rows]))
+        neighbors: list[np.ndarray] = []
+        for i in range(0, len(x), _BLOCK_ROWS):
+            block = x[i : i + _BLOCK_ROWS] @ x.T >= self.threshold
+            neighbors.extend(np.flatnonzero(v) for v in block)
+
+        leader = np.full(len(rows), -1)
+        clusters = []
+        for i, v in enumerate(neighbors):
+            if leader[i] >= 0:
+                continue
+            members = v[(v > i) & (leader[v] < 0)]
+            leader[i] = i
+            leader[members] = i
+            clusters.append([i, *members.tolist()])
+        return clusters
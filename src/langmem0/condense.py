@@ -0,0 +1,130 @@
+"""Condensation of transcripts before memory extraction.
+
+This module provides the Condenser class which Mem0Middleware applies to
+the agent transcript before handing it to mem0's extraction. It strips tool
+payloads and attachments, truncates long messages and rolls old turns into
+a running summary, so that extraction latency and token cost stay flat as
+threads grow.
+"""
+
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from langmem0.query import message_text
+
+
+Message = dict[str, Any]
+
+Summarizer = Callable[[str, list[Message]], str]
+"""Fold messages into a running summary, given the previous summary."""
+
+
+class Condenser:
+    """Bound the transcript sent to memory extraction.
+
+    The latest ``keep_recent`` messages are sent as they are, once stripped
+    and truncated. Older messages are folded into a running summary exactly
+    once, the caller keeping the summary and the number of folded messages
+    between calls, e.g. in the agent state.
+
+    By default the summary is extractive: folded messages are appended as
+    truncated lines and the oldest lines are dropped beyond
+    ``max_summary_chars``. Pass ``summarize`` to fold them with an LLM
+    instead.
+    """
+
+    def __init__(
+        self,
+        max_chars_per_message: int = 2000,
+        keep_recent: int = 12,
+        max_summary_chars: int = 4000,
+        summarize: Summarizer | None = None,
+    ) -> None:
+        """Initialize the condenser.
+
+        Args:
+            max_chars_per_message: Characters kept from the head of every
+                message.
+            keep_recent: The number of latest messages sent unsummarized.
+            max_summary_chars: Characters kept of the extractive summary.
+            summarize: Optional function folding stripped messages into the
+                previous summary.
+        """
+        self.max_chars_per_message = max_chars_per_message
+        self.keep_recent = keep_recent
+        self.max_summary_chars = max_summary_chars
+        self.summarize = summarize
+
+    def strip(self, messages: Sequence[Message]) -> list[Message]:
+        """Strip tool payloads and attachments, truncating long messages.
+
+        Tool results and system messages are dropped, tool call requests
+        lose their calls and multi-part content keeps its text parts only.
+
+        Args:
+            messages: OpenAI-style messages.
+
+        Returns:
+            list[Message]: The stripped messages, empty ones dropped.
+        """
+        stripped = []
+        for v in messages:
+            if v.get("role") not in ("user", "assistant"):
+                continue
+            if text := self._truncate(message_text(v).strip()):
+                stripped.append({"role": v["role"], "content": text})
+        return stripped
+
+    def condense(
+        self,
+        messages: Sequence[Message],
+        summary: str = "",
+        summarized: int = 0,
+    ) -> tuple[list[Message], str, int]:
+        """Condense a transcript for extraction.
+
+        Args:
+            messages: The whole transcript, OpenAI-style, oldest first.
+            summary: The running summary of the previous call.
+            summarized: The number of leading messages of the transcript
+                already folded into ``summary``.
+
+        Returns:
+            tuple[list[Message], str, int]: The messages to extract memories
+            from, the new running summary and the new number of folded
+            messages.
+        """
+        # The transcript may have been trimmed since the previous call.
+        summarized = min(summarized, len(messages))
+        end = max(summarized, len(messages) - self.keep_recent)
+        if folded := self.strip(messages[summarized:end]):
+            summary = self._fold(summary, folded)
+
+        condensed = self.strip(messages[end:])
+        if summary:
+            condensed.insert(
+                0,
+                {
+                    "role": "system",
+                    "content": f"Summary of the earlier conversation:\n"
+                    f"{summary}",
+                },
+            )
+        return condensed, summary, end
+
+    def _fold(self, summary: str, messages: list[Message]) -> str:
+        if self.summarize is not None:
+            return self.summarize(summary, messages)
+
+        lines = [summary] if summary else []
+        lines.extend(f"{v['role']}: {v['content']}" for v in messages)
+        summary = "\n".join(lines)
+        if len(summary) > self.max_summary_chars:
+            summary = summary[-self.max_summary_chars :]
+            # Drop the partial line left at the head.
+            summary = summary.partition("\n")[2] or summary
+        return summary
+
+    def _truncate(self, text: str) -> str:
+        n = self.max_chars_per_message
+        return text if len(text) <= n else text[:n] + "…"
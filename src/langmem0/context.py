@@ -0,0 +1,94 @@
+"""Assembly of the recalled context injected into prompts.
+
+This module turns recall results into the lines injected by ChatOpenAI and
+Mem0Middleware, keeping memories and graph relations under one token
+budget.
+"""
+
+from typing import Any
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text, about 4 characters each.
+
+    Args:
+        text: The text.
+
+    Returns:
+        int: The estimated token count.
+    """
+    return (len(text) + 3) // 4
+
+
+def format_relation(relation: dict[str, Any]) -> str:
+    """Format a graph relation as a line of context.
+
+    Args:
+        relation: Relation with source, relationship and destination keys.
+
+    Returns:
+        str: The relation as ``source -- relationship -- destination``.
+    """
+    return (
+        f"{relation['source']} -- {relation['relationship']} -- "
+        f"{relation['destination']}"
+    )
+
+
+def assemble(
+    recalled: dict[str, Any],
+    max_tokens: int | None = None,
+    stable: bool = False,
+) -> tuple[list[str], list[str]]:
+    """Select the memories and relations to inject within a token budget.
+
+    Memories go first in their ranked order, then deduplicated relations
+    fill what is left of the budget.
+
+    Args:
+        recalled: Recall results with ``results`` and optional ``relations``.
+        max_tokens: The budget shared by memories and relations, or None for
+            no limit.
+        stable: Whether to lay the selected memories out oldest first and
+            the relations alphabetically instead of by rank, so that the
+            injected text changes as little as possible between calls.
+
+    Returns:
+        tuple[list[str], list[str]]: The memories and the formatted relations.
+    """
+    items = recalled.get("results", [])
+    memories = [v["memory"] for v in items]
+    relations = list(
+        dict.fromkeys(
+            format_relation(v) for v in recalled.get("relations") or []
+        )
+    )
+    if max_tokens is not None:
+        memories, relations = _fit(memories, relations, max_tokens)
+
+    if stable:
+        # The budget only drops the tail, memories kept are the leading ones.
+        kept = sorted(
+            items[: len(memories)],
+            key=lambda v: (v.get("created_at") or "", v.get("id") or ""),
+        )
+        memories = [v["memory"] for v in kept]
+        relations.sort()
+
+    return memories, relations
+
+
+def _fit(
+    memories: list[str], relations: list[str], max_tokens: int
+) -> tuple[list[str], list[str]]:
+    """Keep leading memories, then leading relations, within the budget."""
+    budget = max_tokens
+    kept: tuple[list[str], list[str]] = ([], [])
+    for lines, out in ((memories, kept[0]), (relations, kept[1])):
+        for v in lines:
+            if (cost := estimate_tokens(v) + 1) > budget:
+                break
+            budget -= cost
+            out.append(v)
+
+    return kept
@@ -0,0 +1,307 @@
+"""Persistent, memory-mapped embedding cache.
+
+This module provides the EmbeddingCache class which stores embeddings on
+disk keyed by model name and text hash, and the CachedEmbedder class which
+plugs the cache in front of a mem0 embedder. Segments are opened read-only
+with ``mmap``, so worker processes on one host share the pages and nothing is
+re-embedded after a restart.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Literal, Self
+
+import numpy as np
+from mem0.embeddings.base import EmbeddingBase
+
+
+logger = logging.getLogger(__name__)
+
+# Keys are stored hex-encoded, as numpy strips trailing NULs of raw bytes.
+_KEY_BYTES = 16
+
+
+class _Segment:
+    """An immutable, memory-mapped file pair of sorted keys and vectors."""
+
+    def __init__(self, keys_path: Path) -> None:
+        self.name = keys_path.name.removesuffix(".keys.npy")
+        self.keys = np.load(keys_path, mmap_mode="r")
+        self.vectors = np.load(
+            keys_path.with_name(f"{self.name}.vectors.npy"), mmap_mode="r"
+        )
+
+    def get(self, key: bytes) -> np.ndarray | None:
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.vectors[i]
+        return None
+
+
+class EmbeddingCache:
+    """On-disk cache of embeddings keyed by model name and text hash.
+
+    Each model owns a directory of immutable segments. New embeddings are
+    buffered in memory and written out as a new segment by ``flush``, which
+    happens automatically every ``flush_every`` insertions and on ``close``
+    unless the cache is read-only. Segments of a model are merged once they
+    exceed ``max_segments``, so that lookups stay bounded.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        dtype: Literal["float32", "float16"] = "float32",
+        read_only: bool = False,
+        flush_every: int = 256,
+        max_segments: int | None = 16,
+    ) -> None:
+        """Open the cache.
+
+        Args:
+            path: Directory of the cache, created if missing.
+            dtype: Storage type of new segments.
+            read_only: Whether to never write new segments.
+            flush_every: Buffered embeddings triggering a flush.
+            max_segments: Segments of a model triggering a compaction after
+                a flush, or None to only compact explicitly.
+        """
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.read_only = read_only
+        self.flush_every = flush_every
+        self.max_segments = max_segments
+
+        self._segments: dict[str, list[_Segment]] = {}
+        self._pending: dict[str, dict[bytes, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+        if not read_only:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+    def __enter__(self) -> Self:
+        """Return the cache."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        """Flush buffered embeddings."""
+        self.close()
+
+    def get(
+        self, model: str, text: str, memory_action: str | None = None
+    ) -> list[float] | None:
+        """Look up the embedding of a text.
+
+        Args:
+            model: The embedding model name.
+            text: The embedded text.
+            memory_action: The mem0 action the text was embedded for.
+
+        Returns:
+            list[float] | None: The embedding, or None on a miss.
+        """
+        key = _key(text, memory_action)
+        with self._lock:
+            if (v := self._pending.get(model, {}).get(key)) is not None:
+                return v.tolist()
+            segments = self._open(model)
+
+        for segment in segments:
+            if (v := segment.get(key)) is not None:
+                return v.astype(np.float32).tolist()
+        return None
+
+    def put(
+        self,
+        model: str,
+        text: str,
+        embedding: list[float],
+        memory_action: str | None = None,
+    ) -> None:
+        """Insert the embedding of a text.
+
+        Args:
+            model: The embedding model name.
+            text: The embedded text.
+            embedding: The embedding.
+            memory_action: The mem0 action the text was embedded for.
+        """
+        if self.read_only:
+            return
+
+        with self._lock:
+            pending = self._pending.setdefault(model, {})
+            pending[_key(text, memory_action)] = np.asarray(
+                embedding, dtype=np.float32
+            )
+            if len(pending) < self.flush_every:
+                return
+
+        self.flush()
+
+    def flush(self) -> None:
+        """Write buffered embeddings out as new segments."""
+        if self.read_only:
+            return
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        for model, embeddings in pending.items():
+            if not embeddings:
+                continue
+            self._write(model, embeddings)
+
+            if self.max_segments is None:
+                continue
+            with self._lock:
+                n = len(self._open(model))
+            if n > self.max_segments:
+                logger.info(f"compact {n} embedding segments of {model}")
+                self.compact(model)
+
+    def close(self) -> None:
+        """Flush buffered embeddings, which would be lost otherwise."""
+        self.flush()
+
+    def refresh(self) -> None:
+        """Pick up segments written by other processes."""
+        with self._lock:
+            self._segments.clear()
+
+    def compact(self, model: str) -> None:
+        """Merge all segments of a model into one.
+
+        Readers keep the unlinked files mapped until they refresh.
+
+        Args:
+            model: The embedding model name.
+        """
+        self.flush()
+        with self._lock:
+            self._segments.pop(model, None)
+            segments = self._open(model)
+
+        if len(segments) <= 1:
+            return
+
+        # Newer segments come first and win on duplicated keys.
+        merged: dict[bytes, np.ndarray] = {}
+        for segment in reversed(segments):
+            merged.update(
+                zip(segment.keys.tolist(), segment.vectors, strict=True)
+            )
+        self._write(model, merged)
+
+        for segment in segments:
+            for suffix in ("keys", "vectors"):
+                name = f"{segment.name}.{suffix}.npy"
+                (self._model_dir(model) / name).unlink(missing_ok=True)
+        self.refresh()
+
+    def _model_dir(self, model: str) -> Path:
+        return self.path / re.sub(r"[^\w.-]+", "_", model)
+
+    def _open(self, model: str) -> list[_Segment]:
+        """Return segments of a model, newest first. Requires the lock."""
+        if (segments := self._segments.get(model)) is not None:
+            return segments
+
+        d = self._model_dir(model)
+        paths = sorted(d.glob("*.keys.npy"), reverse=True)
+        segments = []
+        for p in paths:
+            try:
+                segments.append(_Segment(p))
+            except (OSError, ValueError):
+                logger.warning(f"skip unreadable embedding segment {p}")
+        self._segments[model] = segments
+        return segments
+
+    def _write(self, model: str, embeddings: dict[bytes, Any]) -> None:
+        d = self._model_dir(model)
+        d.mkdir(parents=True, exist_ok=True)
+
+        keys = np.array(sorted(embeddings), dtype=f"S{2 * _KEY_BYTES}")
+        vectors = np.stack([embeddings[k] for k in keys.tolist()])
+
+        # Names sort by creation time, so newer segments are looked up first.
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        # The vectors are in place before the keys make the segment visible.
+        for suffix, data in (
+            ("vectors", vectors.astype(self.dtype)),
+            ("keys", keys),
+        ):
+            tmp = d / f".{name}.{suffix}.tmp.npy"
+            np.save(tmp, data)
+            os.replace(tmp, d / f"{name}.{suffix}.npy")
+
+        logger.debug(f"wrote {len(keys)} embeddings of {model} to {name}")
+        with self._lock:
+            self._segments.pop(model, None)
+
+
+class CachedEmbedder:
+    """mem0 embedder consulting an EmbeddingCache before the model."""
+
+    def __init__(
+        self,
+        embedder: EmbeddingBase,
+        cache: EmbeddingCache,
+        model: str | None = None,
+    ) -> None:
+        """Wrap an embedder.
+
+        Args:
+            embedder: The mem0 embedder computing missing embeddings.
+            cache: The cache to consult.
+            model: The model name keying the cache, taken from the embedder
+                configuration if omitted.
+        """
+        self.embedder = embedder
+        self.cache = cache
+        self.model = model or embedder.config.model
+
+    def __getattr__(self, name: str) -> object:
+        """Delegate everything else to the wrapped embedder."""
+        return getattr(self.embedder, name)
+
+    def embed(
+        self,
+        text: str,
+        memory_action: Literal["add", "search", "update"] | None = None,
+    ) -> list[float]:
+        """Get the embedding of a text, computing it on a cache miss.
+
+        Args:
+            text: The text to embed.
+            memory_action: The mem0 action the text is embedded for.
+
+        Returns:
+            list[float]: The embedding.
+        """
+        v = self.cache.get(self.model, text, memory_action)
+        if v is None:
+            v = self.embedder.embed(text, memory_action)
+            self.cache.put(self.model, text, v, memory_action)
+        return v
+
+
+def _key(text: str, memory_action: str | None) -> bytes:
+    h = hashlib.blake2b(digest_size=_KEY_BYTES)
+    h.update((memory_action or "").encode())
+    h.update(b"\0")
+    h.update(text.encode())
+    return h.hexdigest().encode()
@@ -0,0 +1,322 @@
+"""Cheap gates deciding whether a turn is worth a memory operation.
+
+A gate is any callable taking the text of a turn and returning whether the
+memory operation should run. This module ships heuristic gates for recall
+and memorization and a small local classifier gate usable for both, plus the
+bookkeeping which logs gate decisions and keeps their counts in Metrics.
+"""
+
+import logging
+import re
+import zlib
+from collections.abc import Callable, Iterable, Sequence
+from itertools import pairwise
+from typing import Self
+
+import numpy as np
+
+from langmem0.metrics import Metrics
+
+
+logger = logging.getLogger(__name__)
+
+Gate = Callable[[str], bool]
+"""Decide from the text of a turn whether a memory operation should run."""
+
+STOPWORDS = frozenset(
+    """
+    a about after again all am an and any are as at be because been before
+    being both but by can could did do does doing done for from had has have
+    having he her here hers him his how i if in into is it its itself just
+    let me more most my no nor not now of off on once only or other our ours
+    out over own same she should so some such than that the their them then
+    there these they this those through to too under until up very was we
+    were what when where which while who whom why will with would you your
+    yours ok okay oh ah hmm yes yeah yep sure please thanks thank
+    """.split()  # noqa: SIM905
+)
+
+ACKNOWLEDGEMENT = re.compile(
+    r"^\W*(ok(ay)?|k+|thanks?( you)?( so much)?|thx|ty|yes|yeah|yep|no|nope"
+    r"|sure|cool|great|nice|perfect|got it|sounds good|alright|lol|bye"
+    r"|good( job| night| morning)?|go on|continue)\W*$",
+    re.IGNORECASE,
+)
+
+FIRST_PERSON = re.compile(
+    r"\b(i|i'm|im|i've|i'd|i'll|my|mine|myself|we|we're|our|ours)\b",
+    re.IGNORECASE,
+)
+
+REMEMBER = re.compile(
+    r"\b(remember|memorize|don't forget|note that|keep in mind)\b",
+    re.IGNORECASE,
+)
+
+FACT_CUE = re.compile(
+    r"\b(prefer\w*|favou?rite|like|love|hate|enjoy|dislike"
+    r"|allergic|vegan|vegetarian|live|living|moved|born|birthday|work\w*"
+    r"|job|name|called|want|need|plan\w*|going to|always|never|usually"
+    r"|wife|husband|partner|son|daughter|kids?|pet|dog|cat)\b",
+    re.IGNORECASE,
+)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# The trailing clause of a turn ending with a question.
+_TRAILING_QUESTION = re.compile(r"[^.!;,?]*\?[\s?]*$")
+
+
+class HeuristicGate:
+    """Gate rejecting short, content-free or acknowledgement-only turns."""
+
+    def __init__(
+        self,
+        min_words: int = 3,
+        max_stopword_ratio: float = 0.9,
+        skip_patterns: Sequence[re.Pattern[str]] = (ACKNOWLEDGEMENT,),
+        stopwords: frozenset[str] = STOPWORDS,
+    ) -> None:
+        """Initialize the gate.
+
+        Args:
+            min_words: Turns with fewer words are rejected unless they ask a
+                question.
+            max_stopword_ratio: Turns whose share of stopwords exceeds this
+                are rejected.
+            skip_patterns: Turns matching any of them are rejected.
+            stopwords: Lower-cased words carrying no content.
+        """
+        self.min_words = min_words
+        self.max_stopword_ratio = max_stopword_ratio
+        self.skip_patterns = skip_patterns
+        self.stopwords = stopwords
+
+    def __call__(self, text: str) -> bool:
+        """Return whether the turn is worth a memory operation."""
+        text = text.strip()
+        if any(p.search(text) for p in self.skip_patterns):
+            return False
+
+        words = [v.lower() for v in _WORD.findall(text)]
+        if not words:
+            return False
+        if len(words) < self.min_words and not text.endswith("?"):
+            return False
+
+        stopwords = sum(v in self.stopwords for v in words)
+        return stopwords / len(words) <= self.max_stopword_ratio
+
+
+class FactGate:
+    """Gate rejecting turns unlikely to carry memorable facts.
+
+    Acknowledgements never pass. Other turns pass if they ask to remember
+    something, or if they talk about the user in the first person and
+    either contain a cue of a personal fact, such as a preference or a
+    relationship, or are long enough to state one. A turn ending with a
+    question passes only if the part before the question states a fact
+    with a cue, e.g. "I love green tea, what should I drink?".
+    """
+
+    def __init__(
+        self,
+        min_words: int = 3,
+        min_statement_words: int = 6,
+        skip_patterns: Sequence[re.Pattern[str]] = (ACKNOWLEDGEMENT,),
+        remember_pattern: re.Pattern[str] = REMEMBER,
+        subject_pattern: re.Pattern[str] = FIRST_PERSON,
+        fact_pattern: re.Pattern[str] = FACT_CUE,
+    ) -> None:
+        """Initialize the gate.
+
+        Args:
+            min_words: Turns with fewer words are rejected.
+            min_statement_words: First-person turns without a fact cue pass
+                from this many words on.
+            skip_patterns: Turns matching any of them are rejected.
+            remember_pattern: Matches explicit requests to remember.
+            subject_pattern: Matches words referring to the user.
+            fact_pattern: Matches cues of personal facts.
+        """
+        self.min_words = min_words
+        self.min_statement_words = min_statement_words
+        self.skip_patterns = skip_patterns
+        self.remember_pattern = remember_pattern
+        self.subject_pattern = subject_pattern
+        self.fact_pattern = fact_pattern
+
+    def __call__(self, text: str) -> bool:
+        """Return whether the turn may carry memorable facts."""
+        text = text.strip()
+        if any(p.search(text) for p in self.skip_patterns):
+            return False
+        if self.remember_pattern.search(text):
+            return True
+
+        # Questions about the user ask for facts rather than state them, so
+        # only what precedes the question may state one.
+        question = text.endswith("?")
+        if question:
+            text = _TRAILING_QUESTION.sub("", text)
+
+        n = len(_WORD.findall(text))
+        if n < self.min_words or not self.subject_pattern.search(text):
+            return False
+
+        return bool(self.fact_pattern.search(text)) or (
+            not question and n >= self.min_statement_words
+        )
+
+
+class ClassifierGate:
+    """Gate backed by a logistic regression over hashed word n-grams.
+
+    The model is tiny and trained locally with ``fit`` on labelled turns,
+    e.g. sampled from production traffic.
+    """
+
+    def __init__(
+        self,
+        weights: np.ndarray | None = None,
+        bias: float = 0.0,
+        threshold: float = 0.5,
+        n_features: int = 1 << 14,
+    ) -> None:
+        """Initialize the gate.
+
+        Args:
+            weights: Trained weights, one per hashed feature.
+            bias: Trained bias.
+            threshold: Turns scoring at least this pass the gate.
+            n_features: The number of hashed features.
+        """
+        self.n_features = n_features if weights is None else len(weights)
+        self.weights = weights
+        self.bias = bias
+        self.threshold = threshold
+
+    @classmethod
+    def load(cls, path: str, threshold: float = 0.5) -> Self:
+        """Load a gate saved by ``save``.
+
+        Args:
+            path: The ``.npz`` file.
+            threshold: Turns scoring at least this pass the gate.
+
+        Returns:
+            ClassifierGate: The loaded gate.
+        """
+        with np.load(path) as f:
+            return cls(f["weights"], float(f["bias"]), threshold)
+
+    def save(self, path: str) -> None:
+        """Save the trained model.
+
+        Args:
+            path: The ``.npz`` file.
+        """
+        np.savez(path, weights=self._trained(), bias=self.bias)
+
+    def fit(
+        self,
+        texts: Iterable[str],
+        labels: Iterable[bool],
+        epochs: int = 200,
+        learning_rate: float = 0.5,
+        l2: float = 1e-4,
+    ) -> Self:
+        """Train the model by full-batch gradient descent.
+
+        Args:
+            texts: Turns to learn from.
+            labels: Whether each turn is worth a memory operation.
+            epochs: Gradient steps.
+            learning_rate: Step size.
+            l2: L2 regularization strength.
+
+        Returns:
+            ClassifierGate: The trained gate.
+        """
+        x = np.stack([self._features(v) for v in texts])
+        y = np.fromiter(labels, dtype=np.float32)
+
+        w = np.zeros(self.n_features, dtype=np.float32)
+        b = 0.0
+        for _ in range(epochs):
+            p = _sigmoid(x @ w + b)
+            g = p - y
+            w -= learning_rate * (x.T @ g / len(y) + l2 * w)
+            b -= learning_rate * float(g.mean())
+
+        self.weights, self.bias = w, b
+        return self
+
+    def predict_proba(self, text: str) -> float:
+        """Return the probability that the turn is worth a memory operation.
+
+        Args:
+            text: The turn.
+
+        Returns:
+            float: The probability.
+        """
+        return float(
+            _sigmoid(self._features(text) @ self._trained() + self.bias)
+        )
+
+    def __call__(self, text: str) -> bool:
+        """Return whether the turn is worth a memory operation."""
+        return self.predict_proba(text) >= self.threshold
+
+    def _features(self, text: str) -> np.ndarray:
+        words = [v.lower() for v in _WORD.findall(text)]
+        grams = [*words, *(f"{a} {b}" for a, b in pairwise(words))]
+
+        x = np.zeros(self.n_features, dtype=np.float32)
+        for v in grams:
+            x[zlib.crc32(v.encode()) % self.n_features] += 1
+        return x / max(1.0, float(np.linalg.norm(x)))
+
+    def _trained(self) -> np.ndarray:
+        if self.weights is None:
+            raise ValueError("classifier gate is not trained")
+        return self.weights
+
+
+def admit(gate: Gate | None, text: str, name: str, metrics: Metrics) -> bool:
+    """Run a gate, recording and logging its decision.
+
+    Counts are kept as ``<name>.passed`` and ``<name>.skipped``.
+
+    Args:
+        gate: The gate, or None to admit every turn.
+        text: The text of the turn.
+        name: The metric prefix, e.g. ``recall.gate``.
+        metrics: The registry to record the decision in.
+
+    Returns:
+        bool: Whether the memory operation should run.
+    """
+    if gate is None:
+        return True
+
+    try:
+        passed = gate(text)
+    except Exception:
+        logger.exception(f"{name} failed, admitting the turn")
+        passed = True
+
+    metrics.incr(f"{name}.passed" if passed else f"{name}.skipped")
+    skip_ratio = metrics.ratio(
+        f"{name}.skipped", f"{name}.passed", f"{name}.skipped"
+    )
+    logger.debug(
+        f"{name} {'passed' if passed else 'skipped'} {text[:40]!r}, "
+        f"skip ratio {skip_ratio:.2f}"
+    )
+    return passed
+
+
+def _sigmoid(x: np.ndarray | float) -> np.ndarray:
+    return 1 / (1 + np.exp(-np.clip(x, -30, 30)))
@@ -0,0 +1,138 @@
+"""Graph backends providing entity relations for recall.
+
+This module defines the GraphBackend protocol which langmem0 queries next to
+the vector store, a TimedGraph wrapper measuring the latency graph lookups
+add to recall, and InMemoryGraph, a local stand-in backend.
+"""
+
+import re
+import threading
+from typing import Any, Protocol, runtime_checkable
+
+from langmem0.metrics import Metrics
+
+
+_WORD = re.compile(r"\w+")
+
+
+@runtime_checkable
+class GraphBackend(Protocol):
+    """Anything searchable like mem0's graph memory."""
+
+    def search(
+        self, query: str, filters: dict[str, Any], limit: int = 100
+    ) -> list[dict[str, Any]]:
+        """Return relations relevant to the query.
+
+        Args:
+            query: The query to search for.
+            filters: Scoping filters such as ``user_id``.
+            limit: The maximum number of relations to return.
+
+        Returns:
+            list[dict[str, Any]]: Relations with ``source``, ``relationship``
+            and ``destination`` keys.
+        """
+        ...
+
+
+class TimedGraph:
+    """Graph backend wrapper recording the latency of every search."""
+
+    def __init__(
+        self, graph: GraphBackend, metrics: Metrics, name: str = "recall.graph"
+    ) -> None:
+        """Wrap a graph backend.
+
+        Args:
+            graph: The wrapped backend, e.g. mem0's graph memory.
+            metrics: The registry to record latencies in.
+            name: The latency name.
+        """
+        self.graph = graph
+        self.metrics = metrics
+        self.name = name
+
+    def __getattr__(self, name: str) -> object:
+        """Delegate everything else to the wrapped backend."""
+        return getattr(self.graph, name)
+
+    def search(
+        self, query: str, filters: dict[str, Any], limit: int = 100
+    ) -> list[dict[str, Any]]:
+        """Search the wrapped backend, timing the call.
+
+        Args:
+            query: The query to search for.
+            filters: Scoping filters such as ``user_id``.
+            limit: The maximum number of relations to return.
+
+        Returns:
+            list[dict[str, Any]]: The relations found.
+        """
+        with self.metrics.timer(self.name):
+            return self.graph.search(query, filters, limit)
+
+
+class InMemoryGraph:
+    """Local graph backend keeping relations in a list.
+
+    A relation matches a query when its source or destination shares words
+    with it. Meant for tests and small deployments without a graph store.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty graph."""
+        self._relations: list[tuple[dict[str, Any], dict[str, str]]] = []
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        source: str,
+        relationship: str,
+        destination: str,
+        filters: dict[str, Any],
+    ) -> None:
+        """Add a relation.
+
+        Args:
+            source: The source entity.
+            relationship: The relationship.
+            destination: The destination entity.
+            filters: Scope of the relation such as ``user_id``.
+        """
+        relation = {
+            "source": source,
+            "relationship": relationship,
+            "destination": destination,
+        }
+        with self._lock:
+            self._relations.append((dict(filters), relation))
+
+    def search(
+        self, query: str, filters: dict[str, Any], limit: int = 100
+    ) -> list[dict[str, Any]]:
+        """Return relations sharing words with the query.
+
+        Args:
+            query: The query to search for.
+            filters: Scoping filters such as ``user_id``.
+            limit: The maximum number of relations to return.
+
+        Returns:
+            list[dict[str, Any]]: Relations, most overlapping first.
+        """
+        words = set(_WORD.findall(query.lower()))
+        with self._lock:
+            relations = list(self._relations)
+
+        scored = []
+        for scope, v in relations:
+            if any(scope.get(k) != x for k, x in filters.items()):
+                continue
+            entities = f"{v['source']} {v['destination']}".lower()
+            if overlap := len(words & set(_WORD.findall(entities))):
+                scored.append((overlap, v))
+
+        scored.sort(key=lambda v: -v[0])
+        return [v for _, v in scored[:limit]]
@@ -0,0 +1,782 @@
+"""In-process hot tier for recall.
+
+This module provides the HotTier class which keeps the memories and
+embeddings of recently active users in RAM, so that recall for those users
+is answered by a brute-force cosine similarity search instead of a round
+trip to the vector store.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from mem0 import AsyncMemory, Memory
+
+from langmem0.invalidation import InvalidationBus, publish_writes
+from langmem0.snapshot import iter_memories
+from langmem0.vectors import CompactVectors, VectorDType
+
+
+logger = logging.getLogger(__name__)
+
+_background_tasks = set()
+
+# Rough per-memory cost of the payload dict on top of the memory text.
+_ITEM_OVERHEAD_BYTES = 256
+
+# Payload keys mem0 moves to the top level of its results.
+_PROMOTED_KEYS = ("user_id", "agent_id", "run_id", "actor_id", "role")
+_CORE_KEYS = {"data", "hash", "created_at", "updated_at", "id"}
+
+
+class _Entry:
+    """Memories and L2-normalized embeddings of a single user."""
+
+    def __init__(
+        self, items: list[dict[str, Any]], vectors: CompactVectors
+    ) -> None:
+        self.items = items
+        self.vectors = vectors
+        self.loaded_at = time.monotonic()
+        # Monotonic time after which a restored entry must be reloaded.
+        self.expires_at: float | None = None
+        self.nbytes = vectors.nbytes + sum(
+            _ITEM_OVERHEAD_BYTES + len(v.get("memory") or "") for v in items
+        )
+
+
+class HotTier:
+    """Per-user in-process cache of memories and their embeddings.
+
+    Entries are loaded lazily in the background on the first miss for a
+    user, bounded by ``max_bytes`` in total and evicted in LRU order across
+    users. Results of ``add`` calls are applied through ``observe`` so that
+    cached users stay coherent with writes from the memorize path.
+
+    Writes of other processes are only seen once ``ttl`` expires, unless
+    the tier is given an invalidation ``bus``: local writes and
+    invalidations are then published to the peers, and users written by
+    peers are dropped, so that ``ttl`` can be long or None.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_memories_per_user: int = 1000,
+        ttl: float | None = None,
+        dtype: VectorDType = "float32",
+        oversample: int = 4,
+        bus: InvalidationBus | None = None,
+    ) -> None:
+        """Initialize the hot tier.
+
+        Args:
+            max_bytes: Upper bound of the bytes held across all users.
+            max_memories_per_user: Users with more memories than this are
+                never cached and always served by the vector store.
+            ttl: Seconds after which a cached user is reloaded, or None to
+                keep entries until they are evicted.
+            dtype: Storage type of the embeddings. ``float16`` halves and
+                ``int8`` quarters the bytes per vector, at the cost of a
+                re-rank over ``limit * oversample`` candidates and of
+                approximate scores.
+            oversample: Candidates re-ranked per returned memory when the
+                embeddings are quantized.
+            bus: Optional invalidation bus shared with the tiers of other
+                processes using the same vector store.
+        """
+        self.max_bytes = max_bytes
+        self.max_memories_per_user = max_memories_per_user
+        self.ttl = ttl
+        self.dtype = dtype
+        self.oversample = oversample
+
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # user_id -> whether a write happened while the load was in flight.
+        self._loading: dict[str, bool] = {}
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+        self.bus = bus
+        if bus is not None:
+            bus.subscribe(self._drop)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes currently held across all users."""
+        return self._nbytes
+
+    def __contains__(self, user_id: str) -> bool:
+        """Return whether memories of the user are cached."""
+        return user_id in self._entries
+
+    def __len__(self) -> int:
+        """Return the number of cached users."""
+        return len(self._entries)
+
+    def search(
+        self,
+        m0: Memory,
+        query: str,
+        *,
+        user_id: str,
+        filters: dict[str, Any] | None = None,
+        limit: int = 10,
+    ) -> dict[str, Any] | None:
+        """Search memories of a user held in the hot tier.
+
+        A miss schedules a background load of the user and returns None, so
+        the caller falls back to the vector store for this call only. When
+        the memory has a graph store, relations are looked up concurrently
+        with the query embedding, as mem0's search does.
+
+        Args:
+            m0: The memory whose embedder and store back the tier.
+            query: The query to search for.
+            user_id: The user identifier.
+            filters: Exact-match metadata filters.
+            limit: The maximum number of memories to return.
+
+        Returns:
+            dict[str, Any] | None: Search results shaped like mem0's, or
+            None if the tier cannot answer the query.
+        """
+        if not _is_simple(filters):
+            return None
+
+        if (entry := self._lookup(user_id)) is None:
+            if self._begin_load(user_id):
+                threading.Thread(
+                    target=self._load_in_background,
+                    args=(m0, user_id),
+                    daemon=True,
+                ).start()
+            return None
+
+        if not m0.enable_graph:
+            query_vector = m0.embedding_model.embed(query, "search")
+            return self._search(entry, query_vector, filters, limit)
+
+        with ThreadPoolExecutor(1) as executor:
+            relations = executor.submit(
+                m0.graph.search,
+                query,
+                {**(filters or {}), "user_id": user_id},
+                limit,
+            )
+            query_vector = m0.embedding_model.embed(query, "search")
+            r = self._search(entry, query_vector, filters, limit)
+            return r | {"relations": relations.result()}
+
+    async def asearch(
+        self,
+        am0: AsyncMemory,
+        query: str,
+        *,
+        user_id: str,
+        filters: dict[str, Any] | None = None,
+        limit: int = 10,
+    ) -> dict[str, Any] | None:
+        """Async version of ``search``.
+
+        Args:
+            am0: The memory whose embedder and store back the tier.
+            query: The query to search for.
+            user_id: The user identifier.
+            filters: Exact-match metadata filters.
+            limit: The maximum number of memories to return.
+
+        Returns:
+            dict[str, Any] | None: Search results shaped like mem0's, or
+            None if the tier cannot answer the query.
+        """
+        if not _is_simple(filters):
+            return None
+
+        if (entry := self._lookup(user_id)) is None:
+            if self._begin_load(user_id):
+                # https://docs.python.org/3/library/asyncio-task.html#creating-tasks
+                task = asyncio.create_task(
+                    self._aload_in_background(am0, user_id)
+                )
+                _background_tasks.add(task)
+                task.add_done_callback(_background_tasks.discard)
+            return None
+
+        embedding = asyncio.to_thread(
+            am0.embedding_model.embed, query, "search"
+        )
+        if not am0.enable_graph:
+            query_vector = await embedding
+            return self._search(entry, query_vector, filters, limit)
+
+        query_vector, relations = await asyncio.gather(
+            embedding,
+            asyncio.to_thread(
+                am0.graph.search,
+                query,
+                {**(filters or {}), "user_id": user_id},
+                limit,
+            ),
+        )
+        r = self._search(entry, query_vector, filters, limit)
+        return r | {"relations": relations}
+
+    def load(self, m0: Memory, user_id: str) -> bool:
+        """Load all memories of a user into the hot tier.
+
+        Memories are read from the vector store with their stored
+        embeddings, only those stored without one are embedded again.
+        Nothing is read while another load of the user is in flight.
+
+        Args:
+            m0: The memory to load from.
+            user_id: The user identifier.
+
+        Returns:
+            bool: Whether the user is cached afterwards.
+        """
+        if not self._begin_load(user_id):
+            logger.debug(f"hot-tier load of {user_id=} already in flight")
+            return False
+        return self._load(m0, user_id)
+
+    async def aload(self, am0: AsyncMemory, user_id: str) -> bool:
+        """Async version of ``load``.
+
+        Args:
+            am0: The memory to load from.
+            user_id: The user identifier.
+
+        Returns:
+            bool: Whether the user is cached afterwards.
+        """
+        if not self._begin_load(user_id):
+            logger.debug(f"hot-tier load of {user_id=} already in flight")
+            return False
+        return await self._aload(am0, user_id)
+
+    def prefetch(self, m0: Memory, user_id: str) -> bool:
+        """Load a user unless already cached, e.g. when a session opens.
+
+        Args:
+            m0: The memory to load from.
+            user_id: The user identifier.
+
+        Returns:
+            bool: Whether the user is cached afterwards.
+        """
+        if self._lookup(user_id) is not None:
+            return True
+        return self.load(m0, user_id)
+
+    async def aprefetch(self, am0: AsyncMemory, user_id: str) -> bool:
+        """Async version of ``prefetch``.
+
+        Args:
+            am0: The memory to load from.
+            user_id: The user identifier.
+
+        Returns:
+            bool: Whether the user is cached afterwards.
+        """
+        if self._lookup(user_id) is not None:
+            return True
+        return await self.aload(am0, user_id)
+
+    def observe(
+        self,
+        m0: Memory,
+        result: dict[str, Any],
+        *,
+        user_id: str,
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        """Apply the result of an ``add`` call to the cached user.
+
+        Args:
+            m0: The memory whose embedder backs the tier.
+            result: The value returned by ``Memory.add``.
+            user_id: The user the memories were added for.
+            metadata: The metadata the memories were added with.
+        """
+        events = result.get("results", []) if result else []
+        if user_id not in self._entries:
+            # Nothing to patch, don't pay for the embeddings.
+            self._drop(user_id)
+            self._publish(user_id, events)
+            return
+
+        upserts = [v for v in events if v.get("event") in ("ADD", "UPDATE")]
+        vectors = [
+            m0.embedding_model.embed(v["memory"], "add") for v in upserts
+        ]
+        self._apply(user_id, events, vectors, metadata)
+        self._publish(user_id, events)
+
+    async def aobserve(
+        self,
+        am0: AsyncMemory,
+        result: dict[str, Any],
+        *,
+        user_id: str,
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        """Async version of ``observe``.
+
+        Args:
+            am0: The memory whose embedder backs the tier.
+            result: The value returned by ``AsyncMemory.add``.
+            user_id: The user the memories were added for.
+            metadata: The metadata the memories were added with.
+        """
+        events = result.get("results", []) if result else []
+        if user_id not in self._entries:
+            self._drop(user_id)
+            self._publish(user_id, events)
+            return
+
+        upserts = [v for v in events if v.get("event") in ("ADD", "UPDATE")]
+        vectors = await asyncio.gather(
+            *(
+                asyncio.to_thread(
+                    am0.embedding_model.embed, v["memory"], "add"
+                )
+                for v in upserts
+            )
+        )
+        self._apply(user_id, events, list(vectors), metadata)
+        self._publish(user_id, events)
+
+    def dump(self, path: str | os.PathLike[str]) -> None:
+        """Write a snapshot of all cached users to a directory.
+
+        Args:
+            path: The snapshot directory, created if missing.
+
+        Raises:
+            ValueError: If cached users mix embedding sizes or storage types.
+        """
+        with self._lock:
+            entries = [
+                (k, v) for k, v in self._entries.items() if len(v.items)
+            ]
+
+        d = Path(path)
+        d.mkdir(parents=True, exist_ok=True)
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+
+        users, offset = [], 0
+        for user_id, entry in entries:
+            users.append(
+                {
+                    "user_id": user_id,
+                    "offset": offset,
+                    "count": len(entry.items),
+                    "items": entry.items,
+                }
+            )
+            offset += len(entry.items)
+
+        dtypes = {v.vectors.dtype for _, v in entries}
+        if len(dtypes) > 1:
+            raise ValueError(f"mixed vector dtypes in hot tier: {dtypes}")
+        dtype = dtypes.pop() if dtypes else self.dtype
+
+        arrays = {}
+        if entries:
+            arrays["codes"] = np.concatenate(
+                [v.vectors.codes for _, v in entries]
+            )
+            if dtype == "int8":
+                arrays["scales"] = np.concatenate(
+                    [v.vectors.scales for _, v in entries]
+                )
+        for suffix, data in arrays.items():
+            tmp = d / f".{name}.{suffix}.tmp.npy"
+            np.save(tmp, data)
+            os.replace(tmp, d / f"{name}.{suffix}.npy")
+
+        # Replacing the index publishes the snapshot as a whole.
+        index = {
+            "name": name,
+            "dtype": dtype,
+            "dumped_at": time.time(),
+            "users": users,
+        }
+        tmp = d / ".index.tmp.json"
+        tmp.write_text(json.dumps(index))
+        os.replace(tmp, d / "index.json")
+
+        for p in d.glob("*.npy"):
+            if not p.name.startswith(name):
+                p.unlink(missing_ok=True)
+
+        logger.info(f"dumped {len(users)} users of hot tier to {d}")
+
+    def restore(
+        self, path: str | os.PathLike[str], max_age: float = 300.0
+    ) -> int:
+        """Install the users of a snapshot written by ``dump``.
+
+        The embeddings stay memory-mapped read-only, so processes restoring
+        the same snapshot share its pages.
+
+        Writes made since the dump are not in the snapshot, so restored
+        users age from the dump rather than from the restore, and are
+        reloaded from the vector store at the latest ``max_age`` seconds
+        after the dump, even without ``ttl``. Snapshots older than that are
+        not restored at all.
+
+        Args:
+            path: The snapshot directory.
+            max_age: Seconds after the dump during which restored users may
+                be served.
+
+        Returns:
+            int: The number of users installed.
+        """
+        d = Path(path)
+        if not (d / "index.json").exists():
+            return 0
+
+        index = json.loads((d / "index.json").read_text())
+        name, dtype = index["name"], index["dtype"]
+        # Snapshot names start with the dump time in nanoseconds.
+        dumped_at = index.get("dumped_at", int(name.split("-")[0]) / 1e9)
+        age = max(time.time() - dumped_at, 0.0)
+        if age >= max_age:
+            logger.info(f"skip hot-tier snapshot dumped {age:.0f}s ago")
+            return 0
+        if not index["users"]:
+            return 0
+
+        codes = np.load(d / f"{name}.codes.npy", mmap_mode="r")
+        scales = None
+        if dtype == "int8":
+            scales = np.load(d / f"{name}.scales.npy", mmap_mode="r")
+
+        installed = 0
+        for v in index["users"]:
+            rows = slice(v["offset"], v["offset"] + v["count"])
+            entry = _Entry(
+                v["items"],
+                CompactVectors(
+                    codes[rows],
+                    None if scales is None else scales[rows],
+                    dtype,
+                ),
+            )
+            entry.loaded_at -= age
+            entry.expires_at = entry.loaded_at + max_age
+            with self._lock:
+                if v["user_id"] in self._entries:
+                    continue
+                installed += self._put_locked(v["user_id"], entry)
+
+        logger.info(f"restored {installed} users of hot tier from {d}")
+        return installed
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the cached memories of a user, in peers too.
+
+        Args:
+            user_id: The user identifier.
+        """
+        self._drop(user_id)
+        if self.bus is not None:
+            self.bus.publish(user_id)
+
+    def _drop(self, user_id: str) -> None:
+        with self._lock:
+            if user_id in self._loading:
+                self._loading[user_id] = True
+            if (entry := self._entries.pop(user_id, None)) is not None:
+                self._nbytes -= entry.nbytes
+
+    def _publish(self, user_id: str, events: list[dict[str, Any]]) -> None:
+        if self.bus is not None:
+            publish_writes(self.bus, user_id, events)
+
+    def _apply(
+        self,
+        user_id: str,
+        events: list[dict[str, Any]],
+        vectors: list[list[float]],
+        metadata: dict[str, Any] | None,
+    ) -> None:
+        with self._lock:
+            if user_id in self._loading:
+                self._loading[user_id] = True
+
+            if (entry := self._entries.get(user_id)) is None:
+                return
+
+            n = len(entry.items)
+            items = list(entry.items)
+            now = datetime.now(UTC).isoformat()
+            replaced: dict[int, list[float]] = {}
+            added: list[list[float]] = []
+            index = {v["id"]: i for i, v in enumerate(items)}
+            upserted = iter(vectors)
+            for event in events:
+                memory_id = event.get("id")
+                match event.get("event"):
+                    case "ADD":
+                        # Stamped like mem0 stamps the stored payload.
+                        item = {
+                            "id": memory_id,
+                            "memory": event["memory"],
+                            "hash": _hash(event["memory"]),
+                            "metadata": dict(metadata) if metadata else None,
+                            "created_at": now,
+                            "updated_at": None,
+                            "user_id": user_id,
+                        }
+                        index[memory_id] = len(items)
+                        items.append(item)
+                        added.append(next(upserted))
+                    case "UPDATE" if memory_id in index:
+                        i = index[memory_id]
+                        items[i] = items[i] | {
+                            "memory": event["memory"],
+                            "hash": _hash(event["memory"]),
+                            "updated_at": now,
+                        }
+                        if i < n:
+                            replaced[i] = next(upserted)
+                        else:
+                            added[i - n] = next(upserted)
+                    case "UPDATE":
+                        # Unknown to the tier, so its payload can't be
+                        # reconstructed and the user has to be reloaded.
+                        self._nbytes -= self._entries.pop(user_id).nbytes
+                        return
+                    case "DELETE" if memory_id in index:
+                        i = index.pop(memory_id)
+                        items[i] = None
+
+            keep = [i for i, v in enumerate(items) if v is not None]
+            updated = _Entry(
+                [items[i] for i in keep],
+                entry.vectors.replace(replaced).extend(added).take(keep),
+            )
+            # Local writes don't make up for those of other processes.
+            updated.loaded_at = entry.loaded_at
+            updated.expires_at = entry.expires_at
+
+            self._nbytes -= self._entries.pop(user_id).nbytes
+            self._put_locked(user_id, updated)
+
+    def _begin_load(self, user_id: str) -> bool:
+        with self._lock:
+            if user_id in self._loading:
+                return False
+            self._loading[user_id] = False
+            return True
+
+    def _end_load(self, user_id: str) -> None:
+        with self._lock:
+            self._loading.pop(user_id, None)
+
+    def _read(
+        self, m: Memory | AsyncMemory, user_id: str
+    ) -> list[dict[str, Any]] | None:
+        """Read the stored memories and embeddings of a user.
+
+        Returns None if the user has too many memories to be cached.
+        """
+        n = self.max_memories_per_user + 1
+        rows = list(
+            islice(
+                iter_memories(m, {"user_id": user_id}, page_size=min(n, 1000)),
+                n,
+            )
+        )
+        if len(rows) > self.max_memories_per_user:
+            logger.debug(f"too many memories to cache for {user_id=}")
+            return None
+        return rows
+
+    def _install(
+        self,
+        user_id: str,
+        items: list[dict[str, Any]],
+        vectors: list[list[float]],
+    ) -> bool:
+        entry = _Entry(items, CompactVectors.from_rows(vectors, self.dtype))
+
+        with self._lock:
+            if self._loading.get(user_id, False):
+                logger.debug(f"discard stale hot-tier load for {user_id=}")
+                return False
+
+            if (old := self._entries.pop(user_id, None)) is not None:
+                self._nbytes -= old.nbytes
+            return self._put_locked(user_id, entry)
+
+    def _load(self, m0: Memory, user_id: str) -> bool:
+        """Load a user, ending the load begun by the caller."""
+        try:
+            if (rows := self._read(m0, user_id)) is None:
+                return False
+
+            items = [_item(v) for v in rows]
+            vectors = [
+                v.get("vector")
+                or m0.embedding_model.embed(item["memory"], "add")
+                for v, item in zip(rows, items, strict=True)
+            ]
+            return self._install(user_id, items, vectors)
+        finally:
+            self._end_load(user_id)
+
+    async def _aload(self, am0: AsyncMemory, user_id: str) -> bool:
+        try:
+            rows = await asyncio.to_thread(self._read, am0, user_id)
+            if rows is None:
+                return False
+
+            items = [_item(v) for v in rows]
+            missing = [i for i, v in enumerate(rows) if not v.get("vector")]
+            embedded = await asyncio.gather(
+                *(
+                    asyncio.to_thread(
+                        am0.embedding_model.embed, items[i]["memory"], "add"
+                    )
+                    for i in missing
+                )
+            )
+            vectors = [v.get("vector") for v in rows]
+            for i, v in zip(missing, embedded, strict=True):
+                vectors[i] = v
+            return self._install(user_id, items, vectors)
+        finally:
+            self._end_load(user_id)
+
+    def _load_in_background(self, m0: Memory, user_id: str) -> None:
+        try:
+            self._load(m0, user_id)
+        except Exception:
+            logger.exception(f"failed to load hot tier for {user_id=}")
+
+    async def _aload_in_background(
+        self, am0: AsyncMemory, user_id: str
+    ) -> None:
+        try:
+            await self._aload(am0, user_id)
+        except Exception:
+            logger.exception(f"failed to load hot tier for {user_id=}")
+
+    def _lookup(self, user_id: str) -> _Entry | None:
+        with self._lock:
+            if (entry := self._entries.get(user_id)) is None:
+                return None
+
+            now = time.monotonic()
+            expired = (
+                self.ttl is not None and now - entry.loaded_at > self.ttl
+            ) or (entry.expires_at is not None and now > entry.expires_at)
+            if expired:
+                self._nbytes -= self._entries.pop(user_id).nbytes
+                return None
+
+            self._entries.move_to_end(user_id)
+            return entry
+
+    def _put_locked(self, user_id: str, entry: _Entry) -> bool:
+        if entry.nbytes > self.max_bytes:
+            logger.debug(f"memories of {user_id=} exceed the hot tier")
+            return False
+
+        self._entries[user_id] = entry
+        self._nbytes += entry.nbytes
+        while self._nbytes > self.max_bytes:
+            evicted, v = self._entries.popitem(last=False)
+            self._nbytes -= v.nbytes
+            logger.debug(f"evict {evicted} from hot tier")
+
+        return True
+
+    def _search(
+        self,
+        entry: _Entry,
+        query_vector: list[float],
+        filters: dict[str, Any] | None,
+        limit: int,
+    ) -> dict[str, Any]:
+        mask = None
+        if filters:
+            mask = np.fromiter(
+                (_matches(v, filters) for v in entry.items),
+                dtype=bool,
+                count=len(entry.items),
+            )
+
+        top, scores = entry.vectors.search(
+            query_vector, limit, mask, self.oversample
+        )
+        return {
+            "results": [
+                entry.items[i] | {"score": float(v)}
+                for i, v in zip(top, scores, strict=True)
+            ]
+        }
+
+
+def _hash(memory: str) -> str:
+    """Content hash of a memory, as mem0 stores it."""
+    return hashlib.md5(memory.encode()).hexdigest()  # noqa: S324
+
+
+def _is_simple(filters: dict[str, Any] | None) -> bool:
+    """Whether the filters only use exact matches the tier can evaluate."""
+    return not filters or not any(
+        isinstance(v, dict | list) or k in ("AND", "OR", "NOT")
+        for k, v in filters.items()
+    )
+
+
+def _item(row: dict[str, Any]) -> dict[str, Any]:
+    """Format a stored memory like mem0's get_all does."""
+    payload = row["payload"]
+    item = {
+        "id": row["id"],
+        "memory": payload.get("data", ""),
+        "hash": payload.get("hash"),
+        "metadata": None,
+        "created_at": payload.get("created_at"),
+        "updated_at": payload.get("updated_at"),
+    }
+    item.update((k, payload[k]) for k in _PROMOTED_KEYS if k in payload)
+    metadata = {
+        k: v
+        for k, v in payload.items()
+        if k not in _CORE_KEYS and k not in _PROMOTED_KEYS
+    }
+    if metadata:
+        item["metadata"] = metadata
+    return item
+
+
+def _matches(item: dict[str, Any], filters: dict[str, Any] | None) -> bool:
+    if not filters:
+        return True
+
+    metadata = item.get("metadata") or {}
+    return all(
+        item.get(k, metadata.get(k)) == v or v == "*"
+        for k, v in filters.items()
+    )
@@ -0,0 +1,539 @@
+"""Bulk ingestion of historical transcripts into mem0.
+
+This module provides the Ingestor class and the ``langmem0-ingest`` command
+which backfill memories from JSONL conversations before memory is switched
+on for live traffic, and the BatchingEmbedder which coalesces the embedding
+calls of concurrent extractions into batched requests.
+
+Every line of the input is a JSON object like::
+
+    {"id": "c42", "user_id": "alice", "messages": [{"role": "user",
+     "content": "..."}], "metadata": {}, "tenant_id": "acme"}
+
+where ``id``, ``metadata`` and ``tenant_id`` are optional.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import threading
+import time
+import zlib
+from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Literal
+
+import openai
+from mem0 import AsyncMemory
+from mem0.configs.base import MemoryConfig
+from mem0.embeddings.base import EmbeddingBase
+
+from langmem0.embedding_cache import CachedEmbedder, EmbeddingCache
+from langmem0.invalidation import (
+    InvalidationBus,
+    UnixSocketBus,
+    publish_writes,
+)
+from langmem0.metrics import Metrics
+from langmem0.scheduler import TenantScheduler
+
+
+logger = logging.getLogger(__name__)
+
+Record = dict[str, Any]
+
+
+class BatchingEmbedder:
+    """mem0 embedder coalescing concurrent calls into batched requests.
+
+    Callers block in ``embed`` until their text has been embedded as part of
+    a batch, flushed once ``batch_size`` texts are pending or ``max_wait``
+    seconds after the first one. OpenAI-compatible embedders are batched in
+    a single request, others fall back to one call per text.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingBase,
+        batch_size: int = 64,
+        max_wait: float = 0.01,
+        max_inflight_batches: int = 4,
+    ) -> None:
+        """Wrap an embedder.
+
+        Args:
+            embedder: The mem0 embedder computing the embeddings.
+            batch_size: The maximum number of texts per request.
+            max_wait: Seconds a text waits for its batch to fill.
+            max_inflight_batches: Batches being embedded at once.
+        """
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+
+        self._pending: list[tuple[str, str | None, Future]] = []
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_inflight_batches)
+        self._flusher: threading.Thread | None = None
+
+    def __getattr__(self, name: str) -> object:
+        """Delegate everything else to the wrapped embedder."""
+        return getattr(self.embedder, name)
+
+    def embed(
+        self,
+        text: str,
+        memory_action: Literal["add", "search", "update"] | None = None,
+    ) -> list[float]:
+        """Get the embedding of a text as part of a batch.
+
+        Args:
+            text: The text to embed.
+            memory_action: The mem0 action the text is embedded for.
+
+        Returns:
+            list[float]: The embedding.
+        """
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((text, memory_action, future))
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._flush_forever, daemon=True
+                )
+                self._flusher.start()
+            self._cond.notify()
+        return future.result()
+
+    def _flush_forever(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.max_wait
+                while (
+                    len(self._pending) < self.batch_size
+                    and (left := deadline - time.monotonic()) > 0
+                ):
+                    self._cond.wait(left)
+                batch = self._pending[: self.batch_size]
+                del self._pending[: self.batch_size]
+
+            self._executor.submit(self._embed_batch, batch)
+
+    def _embed_batch(
+        self, batch: list[tuple[str, str | None, Future]]
+    ) -> None:
+        groups: dict[str | None, list[tuple[str, Future]]] = {}
+        for text, action, future in batch:
+            groups.setdefault(action, []).append((text, future))
+
+        for action, items in groups.items():
+            try:
+                vectors = self._embed_many([v for v, _ in items], action)
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), v in zip(items, vectors, strict=True):
+                future.set_result(v)
+
+    def _embed_many(
+        self, texts: list[str], memory_action: str | None
+    ) -> list[list[float]]:
+        client = getattr(self.embedder, "client", None)
+        if not isinstance(client, openai.OpenAI):
+            return [self.embedder.embed(v, memory_action) for v in texts]
+
+        # Same request as mem0's OpenAI embedder, for many texts at once.
+        config = self.embedder.config
+        r = client.embeddings.create(
+            input=[v.replace("\n", " ") for v in texts],
+            model=config.model,
+            dimensions=config.embedding_dims,
+        )
+        return [v.embedding for v in sorted(r.data, key=lambda v: v.index)]
+
+
+class Ingestor:
+    """Backfill memories from JSONL conversations.
+
+    Conversations are streamed and split into chunks of whole turns. Chunks
+    of a user are extracted in order by the same worker of a bounded async
+    pool, while users are spread across the workers. Completed chunks are
+    appended to a checkpoint log so that an interrupted run resumes where it
+    stopped. Given an invalidation bus, users are published as they are
+    written, so that the hot tiers serving live traffic drop them.
+    """
+
+    def __init__(
+        self,
+        config: dict[str, Any],
+        concurrency: int = 8,
+        chunk_messages: int = 20,
+        embed_batch_size: int = 64,
+        checkpoint: str | Path | None = None,
+        retries: int = 2,
+        report_every: float = 10.0,
+        embedding_cache: EmbeddingCache | None = None,
+        scheduler: TenantScheduler | None = None,
+        bus: InvalidationBus | None = None,
+    ) -> None:
+        """Initialize the ingestor.
+
+        Args:
+            config: Mem0 configuration dictionary.
+            concurrency: Chunks extracted at once.
+            chunk_messages: The maximum number of messages per chunk.
+            embed_batch_size: Texts per embedding request, 1 to disable
+                batching.
+            checkpoint: The checkpoint log, or None to not checkpoint.
+            retries: Extra attempts for a failing chunk.
+            report_every: Seconds between throughput reports in the log.
+            embedding_cache: Optional persistent cache in front of the Mem0
+                embedder.
+            scheduler: Optional scheduler applying per-tenant quotas, so
+                that ingestion doesn't starve live traffic.
+            bus: Optional invalidation bus shared with the hot tiers of the
+                processes serving the same vector store.
+        """
+        self.concurrency = concurrency
+        self.chunk_messages = chunk_messages
+        self.checkpoint = Path(checkpoint) if checkpoint else None
+        self.retries = retries
+        self.report_every = report_every
+        self.scheduler = scheduler
+        self.bus = bus
+        self.metrics = Metrics()
+
+        c = AsyncMemory._process_config(config)
+        self.am0 = AsyncMemory(config=MemoryConfig(**c))
+
+        # Batch under the cache so that hits never wait for a batch.
+        embedder = self.am0.embedding_model
+        if embed_batch_size > 1:
+            embedder = BatchingEmbedder(embedder, embed_batch_size)
+        if embedding_cache is not None:
+            embedder = CachedEmbedder(embedder, embedding_cache)
+        self.am0.embedding_model = embedder
+
+    def ingest(
+        self, source: str | Path | Iterable[Record]
+    ) -> dict[str, float]:
+        """Ingest conversations, blocking until done.
+
+        Args:
+            source: A JSONL file or the parsed conversations.
+
+        Returns:
+            dict[str, float]: The final metrics, see ``aingest``.
+        """
+        return asyncio.run(self.aingest(source))
+
+    async def aingest(
+        self, source: str | Path | Iterable[Record]
+    ) -> dict[str, float]:
+        """Ingest conversations.
+
+        Args:
+            source: A JSONL file or the parsed conversations.
+
+        Returns:
+            dict[str, float]: The final metrics, counting ingested
+            ``conversations``, ``chunks``, ``messages`` and ``memories``,
+            ``skipped`` and ``failed`` chunks, invalid conversations
+            counting as failed, and the throughput, all prefixed with
+            ``ingest.``.
+        """
+        done = _load_checkpoint(self.checkpoint)
+        if done:
+            logger.info(f"resuming after {len(done)} checkpointed chunks")
+
+        queues: list[asyncio.Queue[tuple[str, Record] | None]] = [
+            asyncio.Queue(maxsize=4) for _ in range(self.concurrency)
+        ]
+        start = time.perf_counter()
+        with _CheckpointLog(self.checkpoint) as log:
+            workers = [asyncio.create_task(self._work(v, log)) for v in queues]
+            producer = asyncio.create_task(self._produce(source, done, queues))
+            reporter = asyncio.create_task(self._report(start))
+            try:
+                # A dead worker would leave the producer blocked on its full
+                # queue, and a dead producer the workers on empty ones.
+                finished, _ = await asyncio.wait(
+                    [producer, *workers], return_when=asyncio.FIRST_EXCEPTION
+                )
+                for v in finished:
+                    v.result()
+            finally:
+                reporter.cancel()
+                for v in [producer, *workers]:
+                    v.cancel()
+
+        self._set_throughput(start)
+        stats = self.metrics.snapshot()
+        logger.info(f"ingestion done: {_format_stats(stats)}")
+        return stats
+
+    async def _produce(
+        self,
+        source: str | Path | Iterable[Record],
+        done: set[str],
+        queues: list[asyncio.Queue[tuple[str, Record] | None]],
+    ) -> None:
+        async for key, chunk in self._chunks(source, done):
+            # The same worker gets all chunks of a user, in order.
+            i = zlib.crc32(chunk["user_id"].encode()) % len(queues)
+            await queues[i].put((key, chunk))
+        for q in queues:
+            await q.put(None)
+
+    async def _chunks(
+        self, source: str | Path | Iterable[Record], done: set[str]
+    ) -> AsyncIterator[tuple[str, Record]]:
+        for n, record in enumerate(_read(source), start=1):
+            if not _valid(record):
+                logger.warning(f"skip conversation {n} without user or turns")
+                self.metrics.incr("ingest.failed")
+                continue
+
+            conversation = str(record.get("id") or n)
+
+            self.metrics.incr("ingest.conversations")
+            for i, messages in enumerate(
+                _split(record["messages"], self.chunk_messages)
+            ):
+                key = f"{conversation}#{i}"
+                if key in done:
+                    self.metrics.incr("ingest.skipped")
+                    continue
+                yield key, record | {"messages": messages}
+            # Let the workers run when the source is an in-memory iterable.
+            await asyncio.sleep(0)
+
+    async def _work(
+        self,
+        queue: asyncio.Queue[tuple[str, Record] | None],
+        log: "_CheckpointLog",
+    ) -> None:
+        while (item := await queue.get()) is not None:
+            key, chunk = item
+            if await self._add(chunk):
+                log.append(key)
+
+    async def _add(self, chunk: Record) -> bool:
+        user_id = chunk["user_id"]
+        tenant_id = chunk.get("tenant_id")
+        metadata = chunk.get("metadata") or {}
+        if tenant_id:
+            metadata = metadata | {"tenant_id": tenant_id}
+
+        for attempt in range(self.retries + 1):
+            try:
+                if self.scheduler is None:
+                    r = await self._add_once(chunk, user_id, metadata)
+                else:
+                    async with self.scheduler.aslot(
+                        tenant_id or user_id, "memorize"
+                    ):
+                        r = await self._add_once(chunk, user_id, metadata)
+                break
+            except Exception:
+                if attempt == self.retries:
+                    logger.exception(f"chunk of {user_id=} failed")
+                    self.metrics.incr("ingest.failed")
+                    return False
+                await asyncio.sleep(2**attempt)
+
+        if self.bus is not None:
+            # Redis clients block, keep the loop free.
+            await asyncio.to_thread(
+                publish_writes, self.bus, user_id, r.get("results", [])
+            )
+
+        self.metrics.incr("ingest.chunks")
+        self.metrics.incr("ingest.messages", len(chunk["messages"]))
+        self.metrics.incr(
+            "ingest.memories",
+            sum(
+                v.get("event") in ("ADD", "UPDATE")
+                for v in r.get("results", [])
+            ),
+        )
+        return True
+
+    async def _add_once(
+        self, chunk: Record, user_id: str, metadata: dict[str, Any]
+    ) -> dict[str, Any]:
+        with self.metrics.timer("ingest.add"):
+            return await self.am0.add(
+                chunk["messages"], user_id=user_id, metadata=metadata or None
+            )
+
+    async def _report(self, start: float) -> None:
+        while True:
+            await asyncio.sleep(self.report_every)
+            self._set_throughput(start)
+            logger.info(f"ingesting: {_format_stats(self.metrics.snapshot())}")
+
+    def _set_throughput(self, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        self.metrics.set("ingest.seconds", elapsed)
+        for v in ("chunks", "messages", "memories"):
+            rate = self.metrics.get(f"ingest.{v}") / elapsed if elapsed else 0
+            self.metrics.set(f"ingest.{v}_per_second", rate)
+
+
+class _CheckpointLog:
+    """Append-only log of the keys of ingested chunks."""
+
+    def __init__(self, path: Path | None) -> None:
+        self._f = path.open("a", encoding="utf-8") if path else None
+
+    def append(self, key: str) -> None:
+        if self._f is not None:
+            self._f.write(key + "\n")
+            self._f.flush()
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+
+    def __enter__(self) -> "_CheckpointLog":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _load_checkpoint(path: Path | None) -> set[str]:
+    if path is None or not path.exists():
+        return set()
+    with path.open(encoding="utf-8") as f:
+        return {v.strip() for v in f if v.strip()}
+
+
+def _read(source: str | Path | Iterable[Record]) -> Iterator[Record]:
+    """Stream conversations from a JSONL file or an iterable."""
+    if not isinstance(source, str | Path):
+        yield from source
+        return
+
+    with Path(source).open(encoding="utf-8") as f:
+        for n, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"skip malformed line {n} of {source}")
+
+
+def _valid(record: object) -> bool:
+    """Whether a record holds the fields needed to ingest it."""
+    return (
+        isinstance(record, dict)
+        and isinstance(record.get("user_id"), str)
+        and isinstance(record.get("messages"), list)
+        and all(map(_valid_message, record["messages"]))
+    )
+
+
+def _valid_message(message: object) -> bool:
+    """Whether a message is a dict with a role and a content."""
+    return (
+        isinstance(message, dict)
+        and isinstance(message.get("role"), str)
+        and "content" in message
+    )
+
+
+def _split(
+    messages: Sequence[dict[str, Any]], max_messages: int
+) -> Iterator[list[dict[str, Any]]]:
+    """Split messages into chunks of whole turns.
+
+    A chunk is cut before a user message once it holds ``max_messages``
+    messages, and anywhere at twice that so that endless turns are bounded.
+    """
+    chunk: list[dict[str, Any]] = []
+    for v in messages:
+        starts_turn = v.get("role") == "user"
+        if chunk and (
+            len(chunk) >= 2 * max_messages
+            or (starts_turn and len(chunk) >= max_messages)
+        ):
+            yield chunk
+            chunk = []
+        chunk.append(v)
+
+    if chunk:
+        yield chunk
+
+
+def _format_stats(stats: dict[str, float]) -> str:
+    return (
+        f"{stats.get('ingest.chunks', 0):.0f} chunks, "
+        f"{stats.get('ingest.messages', 0):.0f} messages, "
+        f"{stats.get('ingest.memories', 0):.0f} memories, "
+        f"{stats.get('ingest.failed', 0):.0f} failed in "
+        f"{stats.get('ingest.seconds', 0):.1f}s "
+        f"({stats.get('ingest.messages_per_second', 0):.1f} messages/s)"
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run the ``langmem0-ingest`` command.
+
+    Args:
+        argv: Command line arguments, defaulting to ``sys.argv[1:]``.
+    """
+    parser = argparse.ArgumentParser(
+        prog="langmem0-ingest",
+        description="Backfill mem0 memories from JSONL conversations.",
+    )
+    parser.add_argument("source", type=Path, help="JSONL conversations")
+    parser.add_argument(
+        "--config", type=Path, required=True, help="mem0 config as JSON"
+    )
+    parser.add_argument("--checkpoint", type=Path, help="checkpoint log")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--chunk-messages", type=int, default=20)
+    parser.add_argument("--embed-batch-size", type=int, default=64)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--report-every", type=float, default=10.0)
+    parser.add_argument(
+        "--bus-dir",
+        type=Path,
+        help="directory of the Unix socket invalidation bus of the peers",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s"
+    )
+    bus = UnixSocketBus(args.bus_dir) if args.bus_dir else None
+    ingestor = Ingestor(
+        json.loads(args.config.read_text(encoding="utf-8")),
+        concurrency=args.concurrency,
+        chunk_messages=args.chunk_messages,
+        embed_batch_size=args.embed_batch_size,
+        checkpoint=args.checkpoint,
+        retries=args.retries,
+        report_every=args.report_every,
+        bus=bus,
+    )
+    try:
+        stats = ingestor.ingest(args.source)
+    finally:
+        if bus is not None:
+            bus.close()
+    if stats.get("ingest.failed"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
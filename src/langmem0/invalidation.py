@@ -0,0 +1,226 @@
+"""Cross-process invalidation of recall caches.
+
+This module provides the InvalidationBus protocol broadcasting the ids of
+users whose memories were written to peer processes, the UnixSocketBus
+class implementing it between processes of a host and the RedisBus class
+implementing it over Redis pub/sub or any client with the same API. A
+HotTier given a bus publishes its local writes and drops the users written
+by peers, so that it can keep entries for long without serving stale
+recall.
+"""
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Protocol, runtime_checkable
+
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[str], None]
+"""Called with the id of a user written by a peer."""
+
+_WRITES = ("ADD", "UPDATE", "DELETE")
+
+
+@runtime_checkable
+class InvalidationBus(Protocol):
+    """Anything broadcasting per-user write events between processes."""
+
+    def publish(self, user_id: str) -> None:
+        """Notify peers that memories of a user were written.
+
+        Args:
+            user_id: The user identifier.
+        """
+        ...
+
+    def subscribe(self, listener: Listener) -> None:
+        """Call a function on every write notified by a peer.
+
+        Events published by this bus are not delivered to its own
+        listeners.
+
+        Args:
+            listener: The function, called from a background thread.
+        """
+        ...
+
+    def close(self) -> None:
+        """Stop receiving events and release the channel."""
+        ...
+
+
+def publish_writes(
+    bus: InvalidationBus, user_id: str, events: list[dict[str, Any]]
+) -> bool:
+    """Notify peers of the writes among the results of a mem0 call.
+
+    Args:
+        bus: The bus.
+        user_id: The user identifier.
+        events: The ``results`` of mem0's add, update or delete.
+
+    Returns:
+        bool: Whether memories were written and peers notified.
+    """
+    if not any(v.get("event") in _WRITES for v in events):
+        return False
+
+    bus.publish(user_id)
+    return True
+
+
+class _RedisClient(Protocol):
+    """The part of redis-py's client used by RedisBus."""
+
+    def publish(self, channel: str, message: str) -> object: ...
+
+    def pubsub(self) -> Any: ...  # noqa: ANN401
+
+
+class _Listeners:
+    """Listeners of a bus."""
+
+    def __init__(self) -> None:
+        self._listeners: list[Listener] = []
+
+    def subscribe(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    def notify(self, user_id: str) -> None:
+        for v in list(self._listeners):
+            try:
+                v(user_id)
+            except Exception:
+                logger.exception(f"invalidation listener of {user_id=} failed")
+
+
+class UnixSocketBus(_Listeners):
+    """Invalidation bus between the processes of a host.
+
+    Every bus binds a Unix datagram socket in a shared directory, and
+    ``publish`` sends the user id to every other socket found there, so no
+    broker is needed. Sockets of processes that died without closing their
+    bus are removed by the next publisher. Sends never block: an event is
+    dropped with a warning if the queue of a peer is full.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        """Bind the socket of this process and start listening.
+
+        Args:
+            directory: The directory shared by the peers. Socket paths are
+                limited to about 100 characters, so keep it short.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"{os.getpid()}-{uuid.uuid4().hex}.sock"
+        super().__init__()
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(str(self.path))
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        self._closed = False
+        self._thread = threading.Thread(target=self._listen, daemon=True)
+        self._thread.start()
+
+    def publish(self, user_id: str) -> None:
+        """Notify peers that memories of a user were written.
+
+        Args:
+            user_id: The user identifier.
+        """
+        data = user_id.encode()
+        for peer in self.directory.glob("*.sock"):
+            if peer == self.path:
+                continue
+            try:
+                self._sender.sendto(data, str(peer))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Nobody listens anymore, the peer died without closing.
+                peer.unlink(missing_ok=True)
+            except BlockingIOError:
+                logger.warning(f"{peer.name} is full, dropped {user_id=}")
+
+    def close(self) -> None:
+        """Stop listening and remove the socket of this process."""
+        if self._closed:
+            return
+
+        self._closed = True
+        # Wake the listener up, closing doesn't interrupt a blocked recv.
+        self._sender.sendto(b"", str(self.path))
+        self._thread.join()
+        self._sock.close()
+        self._sender.close()
+        self.path.unlink(missing_ok=True)
+
+    def _listen(self) -> None:
+        while True:
+            data = self._sock.recv(4096)
+            if self._closed:
+                return
+            self.notify(data.decode())
+
+
+class RedisBus(_Listeners):
+    """Invalidation bus over Redis pub/sub.
+
+    Works with any client exposing redis-py's ``publish`` and ``pubsub``,
+    e.g. ``redis.Redis`` or a Valkey client, and reaches peers on every
+    host. Events carry the id of the publishing bus, so that its own
+    listeners skip them.
+    """
+
+    def __init__(
+        self, client: _RedisClient, channel: str = "langmem0:invalidate"
+    ) -> None:
+        """Subscribe to the channel and start listening.
+
+        Args:
+            client: The Redis client.
+            channel: The pub/sub channel shared by the peers.
+        """
+        self.client = client
+        self.channel = channel
+        super().__init__()
+
+        self._origin = uuid.uuid4().hex
+        self._pubsub = client.pubsub()
+        self._pubsub.subscribe(channel)
+        self._thread = threading.Thread(target=self._listen, daemon=True)
+        self._thread.start()
+
+    def publish(self, user_id: str) -> None:
+        """Notify peers that memories of a user were written.
+
+        Args:
+            user_id: The user identifier.
+        """
+        self.client.publish(self.channel, f"{self._origin}:{user_id}")
+
+    def close(self) -> None:
+        """Unsubscribe from the channel."""
+        self._pubsub.unsubscribe(self.channel)
+        self._thread.join()
+        self._pubsub.close()
+
+    def _listen(self) -> None:
+        for message in self._pubsub.listen():
+            if message.get("type") == "unsubscribe":
+                return
+            if message.get("type") != "message":
+                continue
+
+            data = message["data"]
+            if isinstance(data, bytes):
+                data = data.decode()
+            origin, _, user_id = data.partition(":")
+            if origin != self._origin:
+                self.notify(user_id)
@@ -0,0 +1,111 @@
+"""In-process metrics of langmem0.
+
+This module provides the Metrics class, a small thread-safe registry of
+counters, gauges and latency summaries which ChatOpenAI and Mem0Middleware
+expose for scraping or logging.
+"""
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and latency summaries."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._values: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> float:
+        """Return the current value of a counter or gauge.
+
+        Args:
+            name: The metric name.
+
+        Returns:
+            float: The value, 0 if never recorded.
+        """
+        return self._values.get(name, 0)
+
+    def incr(self, name: str, value: float = 1) -> float:
+        """Increment a counter.
+
+        Args:
+            name: The counter name.
+            value: The increment.
+
+        Returns:
+            float: The value after the increment.
+        """
+        with self._lock:
+            v = self._values[name] = self._values.get(name, 0) + value
+            return v
+
+    def set(self, name: str, value: float) -> None:
+        """Set a gauge.
+
+        Args:
+            name: The gauge name.
+            value: The value.
+        """
+        with self._lock:
+            self._values[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a latency sample.
+
+        The summary is kept as ``<name>.count``, ``<name>.sum`` and
+        ``<name>.max``.
+
+        Args:
+            name: The latency name.
+            seconds: The sample.
+        """
+        with self._lock:
+            count, total = f"{name}.count", f"{name}.sum"
+            self._values[count] = self._values.get(count, 0) + 1
+            self._values[total] = self._values.get(total, 0) + seconds
+            peak = f"{name}.max"
+            self._values[peak] = max(self._values.get(peak, 0), seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Record the latency of a block.
+
+        Args:
+            name: The latency name.
+
+        Yields:
+            None: Control to the timed block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def ratio(self, numerator: str, *denominator: str) -> float:
+        """Return a counter divided by the sum of other counters.
+
+        Args:
+            numerator: The numerator counter.
+            *denominator: Counters summed into the denominator.
+
+        Returns:
+            float: The ratio, 0 if the denominator is 0.
+        """
+        with self._lock:
+            total = sum(self._values.get(v, 0) for v in denominator)
+            return self._values.get(numerator, 0) / total if total else 0
+
+    def snapshot(self) -> dict[str, float]:
+        """Return a copy of all values.
+
+        Returns:
+            dict[str, float]: Values keyed by metric name.
+        """
+        with self._lock:
+            return dict(self._values)
@@ -7,24 +7,76 @@ personalized responses.
 
 import logging
 from collections.abc import Awaitable, Callable
-from typing import Any
+from typing import Annotated, Any, Literal, NotRequired
 
+import httpx
 from langchain.agents.middleware.types import (
     AgentMiddleware,
     AgentState,
     ModelCallResult,
     ModelRequest,
     ModelResponse,
+    PrivateStateAttr,
+)
+from langchain.messages import (
+    AIMessage,
+    AnyMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
 )
-from langchain.messages import HumanMessage, SystemMessage
 from langchain_openai.chat_models.base import _convert_message_to_dict
 from langgraph.runtime import Runtime
 from mem0 import AsyncMemory, Memory
 from mem0.configs.base import MemoryConfig
 
+from langmem0.breaker import CircuitBreaker
+from langmem0.condense import Condenser
+from langmem0.context import assemble
+from langmem0.embedding_cache import EmbeddingCache
+from langmem0.gates import Gate, admit
+from langmem0.graph import GraphBackend, TimedGraph
+from langmem0.hot_tier import HotTier
+from langmem0.metrics import Metrics
+from langmem0.query import QueryBuilder
+from langmem0.ranking import Reranker
+from langmem0.recall import Recall, aguarded, guarded, prepare
+from langmem0.retention import RetentionPolicy
+from langmem0.scheduler import TenantScheduler
+from langmem0.sharding import AsyncMemoryView, MemoryView, ShardedMemory
+
 
 logger = logging.getLogger(__name__)
 
+Injection = Literal["system", "message", "tool"]
+"""Where Mem0Middleware injects recalled memories into the model request."""
+
+_RECALL_TOOL_NAME = "recall_memories"
+_RECALL_TOOL_CALL_ID = "mem0_recall"
+
+# LangChain ``_llm_type`` of the chat models whose APIs accept a system
+# message after the first turn. Anthropic, Gemini and Bedrock reject it.
+_MID_CONVERSATION_SYSTEM = frozenset(
+    {
+        "azure-openai-chat",
+        "chat-deepseek",
+        "chat-ollama",
+        "groq-chat",
+        "openai-chat",
+        "xai-chat",
+    }
+)
+
+
+class Mem0State(AgentState):
+    """Agent state of Mem0Middleware."""
+
+    mem0_summary: NotRequired[Annotated[str, PrivateStateAttr]]
+    """Running summary of the messages folded by the condenser."""
+
+    mem0_summarized: NotRequired[Annotated[int, PrivateStateAttr]]
+    """The number of leading messages folded into the summary."""
+
 
 class Mem0Middleware(AgentMiddleware):
     """Middleware for integrating Mem0 memory with LangChain agents.
@@ -33,58 +85,266 @@ class Mem0Middleware(AgentMiddleware):
     memories during model calls to provide personalized responses.
     """
 
-    def __init__(self, config: dict[str, Any]) -> None:
+    state_schema = Mem0State
+
+    def __init__(
+        self,
+        config: dict[str, Any] | None,
+        hot_tier: HotTier | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+        recall_gate: Gate | None = None,
+        memorize_gate: Gate | None = None,
+        query_builder: QueryBuilder | None = None,
+        recall_limit: int = 100,
+        reranker: Reranker | None = None,
+        retention: RetentionPolicy | None = None,
+        graph: GraphBackend | None = None,
+        max_context_tokens: int | None = None,
+        injection: Injection = "system",
+        scheduler: TenantScheduler | None = None,
+        recall_breaker: CircuitBreaker | None = None,
+        memorize_breaker: CircuitBreaker | None = None,
+        condenser: Condenser | None = None,
+        http_client: httpx.Client | None = None,
+        sharded_memory: ShardedMemory | None = None,
+    ) -> None:
         """Initialize the Mem0 middleware.
 
         Args:
-            config (dict[str, Any]): Mem0 configuration dictionary.
+            config (dict[str, Any] | None): Mem0 configuration dictionary,
+                None with ``sharded_memory``.
+            hot_tier (HotTier | None): Optional in-process hot tier answering
+                recall for active users.
+            embedding_cache (EmbeddingCache | None): Optional persistent
+                cache in front of the Mem0 embedder.
+            recall_gate (Gate | None): Optional gate deciding from the last
+                user turn whether to recall.
+            memorize_gate (Gate | None): Optional gate deciding from the last
+                user turn whether the interaction is worth memorizing.
+            query_builder (QueryBuilder | None): Builder of recall queries
+                from the conversation, querying the last user turn only by
+                default.
+            recall_limit (int): The maximum number of memories recalled.
+            reranker (Reranker | None): Optional re-ranking of recalled
+                memories by recency and access frequency. It searches more
+                candidates than ``recall_limit`` and may keep fewer.
+            retention (RetentionPolicy | None): Optional retention policy
+                keeping expired memories out of recall.
+            graph (GraphBackend | None): Optional graph backend queried for
+                entity relations concurrently with the vector recall.
+            max_context_tokens (int | None): Token budget shared by the
+                recalled memories and relations, or None for no limit.
+            injection (Injection): Where to inject the recalled memories.
+                ``system`` appends them to the system message. ``message``
+                adds a system message right before the last user message and
+                ``tool`` a recall tool call with its result there, keeping
+                the system prompt and the history a stable cacheable
+                prefix. Most providers but OpenAI-compatible ones reject
+                a system message after the first turn, and many reject a
+                call to a tool the request doesn't declare, so ``message``
+                falls back to ``system`` for other models and ``tool``
+                unless the agent declares a ``recall_memories`` tool.
+            scheduler (TenantScheduler | None): Optional scheduler applying
+                per-tenant quotas to recall and memorize. The tenant is the
+                ``tenant_id`` of the runtime context, falling back to the
+                user.
+            recall_breaker (CircuitBreaker | None): Optional circuit breaker
+                bypassing recall while mem0 is degraded.
+            memorize_breaker (CircuitBreaker | None): Optional circuit
+                breaker bypassing memorize while mem0 is degraded.
+            condenser (Condenser | None): Optional condenser bounding the
+                transcript sent to extraction. Its running summary is kept
+                in the agent state.
+            http_client (httpx.Client | None): Optional shared HTTP client
+                of the OpenAI-compatible mem0 backends, e.g. from
+                ``pooled_http_client``.
+            sharded_memory (ShardedMemory | None): Optional pool of worker
+                processes running Mem0 in place of ``config``. The workers
+                own their hot tiers, embedders and HTTP clients, so
+                ``hot_tier``, ``embedding_cache`` and ``http_client`` are
+                configured on the pool instead.
+
+        Raises:
+            ValueError: If the injection strategy is unknown, neither or
+                both of ``config`` and ``sharded_memory`` are given, or a
+                hot tier is given with ``sharded_memory``.
         """
-        self.m0 = Memory.from_config(config)
+        if injection not in ("system", "message", "tool"):
+            raise ValueError(f"unknown injection strategy {injection!r}")
+        if (config is None) == (sharded_memory is None):
+            raise ValueError("exactly one of config and sharded_memory")
+        if sharded_memory is not None and hot_tier is not None:
+            raise ValueError("give the hot tier to sharded_memory")
+
+        self.hot_tier = hot_tier
+        self.recall_gate = recall_gate
+        self.memorize_gate = memorize_gate
+        self.query_builder = query_builder or QueryBuilder(
+            window=1, roles=("user",), with_roles=False
+        )
+        self.recall_limit = recall_limit
+        self.reranker = reranker
+        self.retention = retention
+        self.max_context_tokens = max_context_tokens
+        self.injection = injection
+        self.scheduler = scheduler
+        self.recall_breaker = recall_breaker
+        self.memorize_breaker = memorize_breaker
+        self.condenser = condenser
+        self.metrics = Metrics()
+        for breaker in (recall_breaker, memorize_breaker):
+            if breaker is not None:
+                breaker.report_to(self.metrics)
+        self.graph = (
+            TimedGraph(graph, self.metrics) if graph is not None else None
+        )
+        if sharded_memory is not None:
+            self.m0 = MemoryView(sharded_memory)
+            self.am0 = AsyncMemoryView(sharded_memory)
+        else:
+            self.m0 = Memory.from_config(config)
+
+            c = AsyncMemory._process_config(config)
+            self.am0 = AsyncMemory(config=MemoryConfig(**c))
+
+            for m in (self.m0, self.am0):
+                prepare(m, self.metrics, http_client, embedding_cache)
+
+        self._recaller = Recall(
+            self.m0,
+            self.am0,
+            self.query_builder,
+            self.metrics,
+            limit=recall_limit,
+            hot_tier=hot_tier,
+            graph=self.graph,
+            reranker=reranker,
+            retention=retention,
+        )
+
+    async def aprefetch(self, user_id: str) -> bool:
+        """Async version of ``prefetch``.
 
-        c = AsyncMemory._process_config(config)
-        self.am0 = AsyncMemory(config=MemoryConfig(**c))
+        Args:
+            user_id (str): The user identifier.
+
+        Returns:
+            bool: Whether memories of the user are cached afterwards.
+        """
+        if self.hot_tier is None:
+            logger.debug("prefetch without hot tier is a no-op")
+            return False
 
-    async def aafter_agent(self, state: AgentState, runtime: Runtime) -> None:
+        return await self.hot_tier.aprefetch(self.am0, user_id)
+
+    def prefetch(self, user_id: str) -> bool:
+        """Load memories of a user into the hot tier ahead of recall.
+
+        Call it when a session or thread opens, e.g. on websocket connect,
+        so that the first model call doesn't pay the vector store round
+        trip.
+
+        Args:
+            user_id (str): The user identifier.
+
+        Returns:
+            bool: Whether memories of the user are cached afterwards.
+        """
+        if self.hot_tier is None:
+            logger.debug("prefetch without hot tier is a no-op")
+            return False
+
+        return self.hot_tier.prefetch(self.m0, user_id)
+
+    async def aafter_agent(
+        self, state: Mem0State, runtime: Runtime
+    ) -> dict[str, Any] | None:
         """Async handler called after agent execution.
 
         Args:
-            state (AgentState): The agent state.
+            state (Mem0State): The agent state.
             runtime (Runtime): The runtime context.
 
         Returns:
-            None: Returns None if user ID is not found.
+            dict[str, Any] | None: The running summary of the condenser to
+            store in the state, if any.
         """
         if not (user_id := _extract_user_id(runtime)):
             return None
 
-        interaction = [_convert_message_to_dict(v) for v in state["messages"]]
+        if not self._should_memorize(state):
+            return None
+
+        interaction, update = self._interaction(state)
 
         logger.debug(f"user-id={user_id}, interaction={interaction}")
 
         # https://docs.mem0.ai/integrations/langgraph#create-chatbot-function
         # https://docs.mem0.ai/open-source/features/async-memory
-        await self.am0.add(interaction, user_id=user_id)
-
-    def after_agent(self, state: AgentState, runtime: Runtime) -> None:
+        tenant_id = _extract_tenant_id(runtime)
+        metadata = _namespace(tenant_id)
+        r = None
+        async with aguarded(
+            self.scheduler,
+            tenant_id or user_id,
+            self.memorize_breaker,
+            "memorize",
+            self.metrics,
+        ) as admitted:
+            if not admitted:
+                return None
+            r = await self.am0.add(
+                interaction, user_id=user_id, metadata=metadata
+            )
+        if r is not None and self.hot_tier is not None:
+            await self.hot_tier.aobserve(
+                self.am0, r, user_id=user_id, metadata=metadata
+            )
+        return update
+
+    def after_agent(
+        self, state: Mem0State, runtime: Runtime
+    ) -> dict[str, Any] | None:
         """Handler called after agent execution.
 
         Args:
-            state (AgentState): The agent state.
+            state (Mem0State): The agent state.
             runtime (Runtime): The runtime context.
 
         Returns:
-            None: Returns None if user ID is not found.
+            dict[str, Any] | None: The running summary of the condenser to
+            store in the state, if any.
         """
         user_id = _extract_user_id(runtime)
         if not user_id:
             return None
 
-        interaction = [_convert_message_to_dict(v) for v in state["messages"]]
+        if not self._should_memorize(state):
+            return None
+
+        interaction, update = self._interaction(state)
 
         logger.debug(f"user-id={user_id}, interaction={interaction}")
 
         # https://docs.mem0.ai/integrations/langgraph#create-chatbot-function
-        self.m0.add(interaction, user_id=user_id)
+        tenant_id = _extract_tenant_id(runtime)
+        metadata = _namespace(tenant_id)
+        r = None
+        with guarded(
+            self.scheduler,
+            tenant_id or user_id,
+            self.memorize_breaker,
+            "memorize",
+            self.metrics,
+        ) as admitted:
+            if not admitted:
+                return None
+            r = self.m0.add(interaction, user_id=user_id, metadata=metadata)
+        if r is not None and self.hot_tier is not None:
+            self.hot_tier.observe(
+                self.m0, r, user_id=user_id, metadata=metadata
+            )
+        return update
 
     async def awrap_model_call(
         self,
@@ -106,32 +366,31 @@ class Mem0Middleware(AgentMiddleware):
         if not (user_id := _extract_user_id(request.runtime)):
             return await handler(request)
 
-        r = await self.am0.search(
-            request.messages[-1].content, user_id=user_id
-        )
-        if not r["results"]:
+        query = request.messages[-1].text
+        if not admit(self.recall_gate, query, "recall.gate", self.metrics):
             return await handler(request)
 
-        # ref: https://docs.langchain.com/oss/python/langchain/middleware/custom#working-with-system-messages
-        # ref: https://docs.mem0.ai/core-concepts/memory-operations/search
-        # ref: https://docs.mem0.ai/integrations/langgraph#create-chatbot-function
-        addon_ctx = (
-            "Use the provided context to personalize your responses "
-            "and remember user preferences and past interactions."
-        )
-        for v in r["results"]:
-            addon_ctx += f"\n- {v['memory']}"
+        r = None
+        tenant_id = _extract_tenant_id(request.runtime)
+        async with aguarded(
+            self.scheduler,
+            tenant_id or user_id,
+            self.recall_breaker,
+            "recall",
+            self.metrics,
+        ) as admitted:
+            if admitted:
+                r = await self._recaller.arecall(
+                    _openai_messages(request.messages),
+                    user_id,
+                    _namespace(tenant_id),
+                )
+        if r is None or not (addon_ctx := self._context(r)):
+            return await handler(request)
 
         logger.debug(f"user-id={user_id}")
         logger.debug(f"add-on ctx\n{addon_ctx}")
-        new_content = [
-            *list(request.system_message.content_blocks),
-            {"type": "text", "text": addon_ctx},
-        ]
-        new_system_message = SystemMessage(content=new_content)
-        return await handler(
-            request.override(system_message=new_system_message)
-        )
+        return await handler(self._inject(request, addon_ctx))
 
     def wrap_model_call(
         self,
@@ -154,10 +413,69 @@ class Mem0Middleware(AgentMiddleware):
         if not user_id:
             return handler(request)
 
-        r = self.m0.search(request.messages[-1].content, user_id=user_id)
-        if not r["results"]:
+        query = request.messages[-1].text
+        if not admit(self.recall_gate, query, "recall.gate", self.metrics):
+            return handler(request)
+
+        r = None
+        tenant_id = _extract_tenant_id(request.runtime)
+        with guarded(
+            self.scheduler,
+            tenant_id or user_id,
+            self.recall_breaker,
+            "recall",
+            self.metrics,
+        ) as admitted:
+            if admitted:
+                r = self._recaller.recall(
+                    _openai_messages(request.messages),
+                    user_id,
+                    _namespace(tenant_id),
+                )
+        if r is None or not (addon_ctx := self._context(r)):
             return handler(request)
 
+        logger.debug(f"user-id={user_id}")
+        logger.debug(f"add-on ctx\n{addon_ctx}")
+        return handler(self._inject(request, addon_ctx))
+
+    def _interaction(
+        self, state: Mem0State
+    ) -> tuple[list[dict[str, Any]], dict[str, Any] | None]:
+        """Return the messages to memorize and the state update."""
+        messages = [_convert_message_to_dict(v) for v in state["messages"]]
+        if self.condenser is None:
+            return messages, None
+
+        interaction, summary, summarized = self.condenser.condense(
+            messages,
+            state.get("mem0_summary", ""),
+            state.get("mem0_summarized", 0),
+        )
+        return interaction, {
+            "mem0_summary": summary,
+            "mem0_summarized": summarized,
+        }
+
+    def _should_memorize(self, state: Mem0State) -> bool:
+        last_user_turn = next(
+            (
+                v.text
+                for v in reversed(state["messages"])
+                if isinstance(v, HumanMessage)
+            ),
+            "",
+        )
+        return admit(
+            self.memorize_gate, last_user_turn, "memorize.gate", self.metrics
+        )
+
+    def _context(self, r: dict[str, Any]) -> str | None:
+        """Format recall results into the system prompt add-on, if any."""
+        memories, relations = assemble(r, self.max_context_tokens, stable=True)
+        if not memories and not relations:
+            return None
+
         # ref: https://docs.langchain.com/oss/python/langchain/middleware/custom#working-with-system-messages
         # ref: https://docs.mem0.ai/core-concepts/memory-operations/search
         # ref: https://docs.mem0.ai/integrations/langgraph#create-chatbot-function
@@ -165,17 +483,60 @@ class Mem0Middleware(AgentMiddleware):
             "Use the provided context to personalize your responses "
             "and remember user preferences and past interactions."
         )
-        for v in r["results"]:
-            addon_ctx += f"\n- {v['memory']}"
-
-        logger.debug(f"user-id={user_id}")
-        logger.debug(f"add-on ctx\n{addon_ctx}")
-        new_content = [
-            *list(request.system_message.content_blocks),
-            {"type": "text", "text": addon_ctx},
-        ]
-        new_system_message = SystemMessage(content=new_content)
-        return handler(request.override(system_message=new_system_message))
+        for v in memories:
+            addon_ctx += f"\n- {v}"
+        if relations:
+            addon_ctx += "\nKnown relations between entities:"
+            for v in relations:
+                addon_ctx += f"\n- {v}"
+
+        return addon_ctx
+
+    def _inject(self, request: ModelRequest, addon_ctx: str) -> ModelRequest:
+        """Return the request with the add-on context injected."""
+        injection = self.injection
+        if injection == "message" and (
+            getattr(request.model, "_llm_type", None)
+            not in _MID_CONVERSATION_SYSTEM
+        ):
+            logger.debug("model may reject a late system message")
+            injection = "system"
+        if injection == "tool" and _RECALL_TOOL_NAME not in _tool_names(
+            request.tools
+        ):
+            logger.debug(f"{_RECALL_TOOL_NAME} tool isn't declared")
+            injection = "system"
+
+        if injection == "system":
+            system_message = request.system_message
+            new_content = [
+                *(system_message.content_blocks if system_message else []),
+                {"type": "text", "text": addon_ctx},
+            ]
+            new_system_message = SystemMessage(content=new_content)
+            return request.override(system_message=new_system_message)
+
+        if injection == "message":
+            injected = [SystemMessage(content=addon_ctx)]
+        else:
+            injected = [
+                AIMessage(
+                    content="",
+                    tool_calls=[
+                        {
+                            "name": _RECALL_TOOL_NAME,
+                            "args": {},
+                            "id": _RECALL_TOOL_CALL_ID,
+                        }
+                    ],
+                ),
+                ToolMessage(
+                    content=addon_ctx, tool_call_id=_RECALL_TOOL_CALL_ID
+                ),
+            ]
+
+        *history, last_user_turn = request.messages
+        return request.override(messages=[*history, *injected, last_user_turn])
 
 
 def _extract_user_id(rt: Runtime) -> str | None:
@@ -192,3 +553,36 @@ def _extract_user_id(rt: Runtime) -> str | None:
         return None
 
     return ctx.user_id
+
+
+def _extract_tenant_id(rt: Runtime) -> str | None:
+    """Extracts the tenant ID from the runtime context.
+
+    Args:
+        rt (Runtime): The runtime context.
+
+    Returns:
+        str | None: The tenant ID, or None if not found.
+    """
+    return getattr(rt.context, "tenant_id", None)
+
+
+def _openai_messages(messages: list[AnyMessage]) -> list[dict[str, Any]]:
+    """Convert messages to the OpenAI-style dicts queries are built from."""
+    return [_convert_message_to_dict(v) for v in messages]
+
+
+def _namespace(tenant_id: str | None) -> dict[str, Any] | None:
+    """Metadata scoping memories to a tenant, used as filters on recall."""
+    return {"tenant_id": tenant_id} if tenant_id else None
+
+
+def _tool_names(tools: list[Any] | None) -> set[str]:
+    """Names of the tools declared by a model request."""
+    names = set()
+    for v in tools or []:
+        if isinstance(v, dict):
+            names.add(v.get("name") or v.get("function", {}).get("name"))
+        else:
+            names.add(v.name)
+    return names
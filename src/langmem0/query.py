@@ -0,0 +1,325 @@
+"""Construction of recall queries from a conversation.
+
+This module provides the QueryBuilder class shared by ChatOpenAI and
+Mem0Middleware to turn the tail of a conversation into the queries sent to
+mem0's search, the FanOutQueryBuilder issuing several sub-queries fused by
+reciprocal rank, and the helpers merging the results of several queries.
+"""
+
+import re
+from collections import Counter
+from collections.abc import Collection, Iterable, Sequence
+from typing import Any
+
+from langmem0.gates import STOPWORDS
+
+
+_ENTITY = re.compile(
+    r"\"([^\"]{2,60})\"|\b([A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*|\d[\w:/-]*)"
+)
+_SENTENCE_START = re.compile(r"(^|[.!?:;]\s*|\n\s*)$")
+_TERM = re.compile(r"\b[a-z][a-z-]{2,}\b")
+
+
+class QueryBuilder:
+    """Build recall queries from the tail of a conversation.
+
+    Messages are OpenAI-style dicts with ``role`` and ``content`` keys. The
+    window is taken after role filtering, and empty messages such as tool
+    call requests are ignored.
+    """
+
+    def __init__(
+        self,
+        window: int = 6,
+        roles: Collection[str] | None = None,
+        max_chars_per_message: int | None = None,
+        with_roles: bool = True,
+        multi_query: bool = False,
+    ) -> None:
+        """Initialize the builder.
+
+        Args:
+            window: The number of trailing messages in the query.
+            roles: Roles of the messages eligible for the window, e.g.
+                ``("user", "assistant")`` to exclude tool outputs. None keeps
+                all of them.
+            max_chars_per_message: Characters kept from the head of every
+                message, or None to keep messages whole.
+            with_roles: Whether to prefix every message with its role.
+            multi_query: Whether to also query the last user turn on its own
+                and merge both results.
+        """
+        self.window = window
+        self.roles = roles
+        self.max_chars_per_message = max_chars_per_message
+        self.with_roles = with_roles
+        self.multi_query = multi_query
+
+    def build(self, messages: Sequence[dict[str, Any]]) -> list[str]:
+        """Build the queries for a conversation.
+
+        Args:
+            messages: The conversation, oldest message first.
+
+        Returns:
+            list[str]: The distinct queries to search, possibly empty.
+        """
+        eligible = [
+            v
+            for v in messages
+            if (self.roles is None or v.get("role") in self.roles)
+            and message_text(v).strip()
+        ]
+
+        queries = []
+        if self.window > 0 and eligible:
+            tail = eligible[-self.window :]
+            queries.append("\n".join(self._format(v) for v in tail))
+
+        if self.multi_query:
+            last_user_turn = next(
+                (v for v in reversed(messages) if v.get("role") == "user"),
+                None,
+            )
+            if last_user_turn is not None:
+                queries.insert(0, self._truncate(message_text(last_user_turn)))
+
+        return list(dict.fromkeys(v for v in queries if v.strip()))
+
+    def merge(
+        self, results: Sequence[dict[str, Any]], limit: int
+    ) -> dict[str, Any]:
+        """Merge the search results of the built queries.
+
+        Args:
+            results: Results of mem0's search, one per query.
+            limit: The maximum number of memories to keep.
+
+        Returns:
+            dict[str, Any]: The merged results.
+        """
+        return merge_results(results, limit)
+
+    def _format(self, message: dict[str, Any]) -> str:
+        text = self._truncate(message_text(message))
+        return f"{message['role']}: {text}" if self.with_roles else text
+
+    def _truncate(self, text: str) -> str:
+        n = self.max_chars_per_message
+        return text if n is None or len(text) <= n else text[:n] + "…"
+
+
+class FanOutQueryBuilder(QueryBuilder):
+    """Fan recall out to several sub-queries fused by reciprocal rank.
+
+    The sub-queries are the last user turn, the named entities of the window
+    and a summary of its topic, i.e. its most frequent content words. Their
+    results are fused with reciprocal-rank fusion, deduplicated by memory id
+    and cut to a small ``top_k``, so recall improves without growing the
+    prompt.
+    """
+
+    def __init__(
+        self,
+        window: int = 6,
+        roles: Collection[str] | None = ("user", "assistant"),
+        max_chars_per_message: int | None = 1000,
+        top_k: int = 5,
+        rrf_k: int = 60,
+        max_entities: int = 8,
+        max_topic_terms: int = 8,
+    ) -> None:
+        """Initialize the builder.
+
+        Args:
+            window: The number of trailing messages mined for entities and
+                topic terms.
+            roles: Roles of the messages eligible for the window.
+            max_chars_per_message: Characters kept from the head of every
+                message, or None to keep messages whole.
+            top_k: The maximum number of fused memories to keep.
+            rrf_k: The rank offset of reciprocal-rank fusion.
+            max_entities: Entities kept in the entity query.
+            max_topic_terms: Content words kept in the topic query.
+        """
+        super().__init__(
+            window, roles, max_chars_per_message, with_roles=False
+        )
+        self.top_k = top_k
+        self.rrf_k = rrf_k
+        self.max_entities = max_entities
+        self.max_topic_terms = max_topic_terms
+
+    def build(self, messages: Sequence[dict[str, Any]]) -> list[str]:
+        """Build the sub-queries for a conversation.
+
+        Args:
+            messages: The conversation, oldest message first.
+
+        Returns:
+            list[str]: The distinct sub-queries to search, possibly empty.
+        """
+        last_user_turn = next(
+            (v for v in reversed(messages) if v.get("role") == "user"), None
+        )
+        queries = []
+        if last_user_turn is not None:
+            queries.append(self._truncate(message_text(last_user_turn)))
+
+        window = "\n".join(super().build(messages))
+        queries.append(" ".join(_entities(window)[: self.max_entities]))
+
+        terms = Counter(
+            v for v in _TERM.findall(window.lower()) if v not in STOPWORDS
+        )
+        queries.append(
+            " ".join(v for v, _ in terms.most_common(self.max_topic_terms))
+        )
+
+        return list(dict.fromkeys(v for v in queries if v.strip()))
+
+    def merge(
+        self, results: Sequence[dict[str, Any]], limit: int
+    ) -> dict[str, Any]:
+        """Fuse the search results of the sub-queries by reciprocal rank.
+
+        Args:
+            results: Results of mem0's search, one per sub-query.
+            limit: The maximum number of memories to keep, further capped
+                by ``top_k``.
+
+        Returns:
+            dict[str, Any]: The fused results.
+        """
+        return reciprocal_rank_fusion(
+            results, min(limit, self.top_k), self.rrf_k
+        )
+
+
+def _entities(text: str) -> list[str]:
+    """Return quoted phrases, proper names and numbers in order of use."""
+    entities = []
+    for m in _ENTITY.finditer(text):
+        quoted, name = m.groups()
+        if quoted:
+            entities.append(quoted.strip())
+            continue
+
+        # A lone capitalized word opening a sentence is rarely a name.
+        opening = _SENTENCE_START.search(text, 0, m.start())
+        if " " not in name and (opening or name.lower() in STOPWORDS):
+            continue
+        entities.append(name)
+
+    return list(dict.fromkeys(entities))
+
+
+def merge_results(
+    results: Sequence[dict[str, Any]], limit: int
+) -> dict[str, Any]:
+    """Merge search results of several queries.
+
+    Memories found by more than one query keep their best score. Scores are
+    compared as similarities, so results of vector stores returning
+    distances must first go through ``langmem0.ranking.to_similarity``, as
+    ChatOpenAI and Mem0Middleware do, or be fused by rank instead with
+    ``reciprocal_rank_fusion``.
+
+    Args:
+        results: Results of mem0's search, one per query.
+        limit: The maximum number of memories to keep.
+
+    Returns:
+        dict[str, Any]: The merged results, best score first.
+    """
+    if not results:
+        return {"results": []}
+    if len(results) == 1:
+        return results[0]
+
+    best: dict[str, dict[str, Any]] = {}
+    for r in results:
+        for v in r["results"]:
+            seen = best.get(v["id"])
+            if seen is None or v.get("score", 0) > seen.get("score", 0):
+                best[v["id"]] = v
+
+    merged = sorted(best.values(), key=lambda v: -v.get("score", 0))
+    out = {"results": merged[:limit]}
+    if relations := merge_relations(r.get("relations") for r in results):
+        out["relations"] = relations
+    return out
+
+
+def reciprocal_rank_fusion(
+    results: Sequence[dict[str, Any]], limit: int, k: int = 60
+) -> dict[str, Any]:
+    """Fuse search results of several queries by reciprocal rank.
+
+    Every memory scores ``sum(1 / (k + rank))`` over the results listing it,
+    and is kept once with its fused score as ``rrf_score``.
+
+    Args:
+        results: Results of mem0's search, one per query.
+        limit: The maximum number of memories to keep.
+        k: The rank offset damping the weight of top ranks.
+
+    Returns:
+        dict[str, Any]: The fused results, best fused score first.
+    """
+    fused: dict[str, float] = {}
+    items: dict[str, dict[str, Any]] = {}
+    for r in results:
+        for rank, v in enumerate(r["results"], start=1):
+            fused[v["id"]] = fused.get(v["id"], 0) + 1 / (k + rank)
+            items.setdefault(v["id"], v)
+
+    top = sorted(fused, key=lambda v: -fused[v])[:limit]
+    out = {"results": [items[v] | {"rrf_score": fused[v]} for v in top]}
+    if relations := merge_relations(r.get("relations") for r in results):
+        out["relations"] = relations
+    return out
+
+
+def merge_relations(
+    relations: Iterable[Sequence[dict[str, Any]] | None],
+) -> list[dict[str, Any]]:
+    """Merge graph relations found by several lookups, each kept once.
+
+    mem0 searches its graph for every query it is given, so the sub-queries
+    of a turn bring back the same relations again.
+
+    Args:
+        relations: Relations of every lookup, None for lookups without.
+
+    Returns:
+        list[dict[str, Any]]: The distinct relations in order of discovery.
+    """
+    distinct = {}
+    for found in relations:
+        for v in found or []:
+            key = (v["source"], v["relationship"], v["destination"])
+            distinct.setdefault(key, v)
+
+    return list(distinct.values())
+
+
+def message_text(message: dict[str, Any]) -> str:
+    """Return the text of an OpenAI-style message.
+
+    Args:
+        message: The message.
+
+    Returns:
+        str: The text content, text parts joined for multi-part content.
+    """
+    content = message.get("content") or ""
+    if isinstance(content, str):
+        return content
+
+    return "".join(
+        v if isinstance(v, str) else v.get("text", "")
+        for v in content
+        if isinstance(v, str) or v.get("type") == "text"
+    )
@@ -0,0 +1,230 @@
+"""Re-ranking of recalled memories.
+
+This module provides the Reranker class which ChatOpenAI and Mem0Middleware
+apply to the merged search results before injection. It blends the vector
+score with the recency and the access frequency of every memory, then cuts
+the ranking at a score threshold, so that fewer but fresher and more useful
+memories reach the prompt.
+
+It also provides ``to_similarity``, which turns the scores of vector stores
+returning distances into cosine similarities, so that results of every
+store and of the hot tier rank on one scale, higher being better.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from datetime import UTC, datetime
+from typing import Any
+
+from mem0.vector_stores.base import VectorStoreBase
+
+
+ScoreScale = Callable[[float], float]
+"""Map a score returned by a vector store to a cosine similarity."""
+
+_SCALES: dict[str, ScoreScale] = {}
+
+
+class Reranker:
+    """Re-rank recall results by relevance, recency and access frequency.
+
+    Every memory scores ``(1 - recency_weight - frequency_weight) * score +
+    recency_weight * recency + frequency_weight * frequency``, where
+    ``score`` is the cosine similarity of the search clamped to [0, 1],
+    ``recency`` halves every ``half_life`` seconds since the memory was last
+    updated and ``frequency`` grows from 0 towards 1 with the number of
+    times the memory was injected. The number of memories kept adapts to the
+    ranking: besides ``limit``, memories below ``min_score`` or below
+    ``relative_threshold`` times the best score are dropped.
+
+    Results of vector stores returning distances, such as pgvector or
+    Chroma, must first go through ``to_similarity``, as ChatOpenAI and
+    Mem0Middleware do, otherwise the closest memories rank last.
+    """
+
+    def __init__(
+        self,
+        half_life: float = 30 * 24 * 3600,
+        recency_weight: float = 0.2,
+        frequency_weight: float = 0.1,
+        min_score: float | None = None,
+        relative_threshold: float | None = None,
+        oversample: int = 3,
+        max_tracked: int = 100_000,
+    ) -> None:
+        """Initialize the reranker.
+
+        Args:
+            half_life: Seconds after which the recency of a memory halves.
+            recency_weight: Weight of the recency in the blended score.
+            frequency_weight: Weight of the access frequency in the blended
+                score.
+            min_score: Blended score below which memories are dropped.
+            relative_threshold: Fraction of the best blended score below
+                which memories are dropped, e.g. ``0.8``.
+            oversample: Candidates searched per memory kept, so that fresh
+                memories ranked lower by similarity alone can move up.
+            max_tracked: The number of memories whose accesses are counted,
+                least recently accessed ones being forgotten first.
+
+        Raises:
+            ValueError: If the weights don't leave room for the score.
+        """
+        if recency_weight + frequency_weight > 1:
+            raise ValueError("recency and frequency weights exceed 1")
+
+        self.half_life = half_life
+        self.recency_weight = recency_weight
+        self.frequency_weight = frequency_weight
+        self.min_score = min_score
+        self.relative_threshold = relative_threshold
+        self.oversample = oversample
+        self.max_tracked = max_tracked
+
+        self._accesses: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def candidates(self, limit: int) -> int:
+        """Return the number of memories to search for a limit.
+
+        Args:
+            limit: The maximum number of memories kept after re-ranking.
+
+        Returns:
+            int: The number of candidates to re-rank.
+        """
+        return limit * self.oversample
+
+    def rerank(
+        self,
+        recalled: dict[str, Any],
+        limit: int,
+        now: datetime | None = None,
+    ) -> dict[str, Any]:
+        """Re-rank recall results and record the kept memories as accessed.
+
+        Args:
+            recalled: Recall results with ``results``.
+            limit: The maximum number of memories to keep.
+            now: The reference time of the recency, defaulting to now.
+
+        Returns:
+            dict[str, Any]: The results, best blended score first, each with
+            its ``rank_score``.
+        """
+        now = now or datetime.now(UTC)
+        with self._lock:
+            scored = [
+                v | {"rank_score": self._score(v, now)}
+                for v in recalled.get("results", [])
+            ]
+        scored.sort(key=lambda v: -v["rank_score"])
+
+        kept = scored[:limit]
+        if self.min_score is not None:
+            kept = [v for v in kept if v["rank_score"] >= self.min_score]
+        if self.relative_threshold is not None and kept:
+            floor = kept[0]["rank_score"] * self.relative_threshold
+            kept = [v for v in kept if v["rank_score"] >= floor]
+
+        self._record(v["id"] for v in kept)
+        return recalled | {"results": kept}
+
+    def _score(self, item: dict[str, Any], now: datetime) -> float:
+        # Keep the relevance on the scale of the recency and frequency.
+        score = min(max(item.get("score") or 0.0, 0.0), 1.0)
+        recency = 0.0
+        if updated := item.get("updated_at") or item.get("created_at"):
+            age = (now - parse_timestamp(updated)).total_seconds()
+            recency = 0.5 ** (max(age, 0.0) / self.half_life)
+        accesses = self._accesses.get(item.get("id"), 0)
+        frequency = 1 - 1 / math.sqrt(1 + accesses)
+
+        w = 1 - self.recency_weight - self.frequency_weight
+        return (
+            w * score
+            + self.recency_weight * recency
+            + self.frequency_weight * frequency
+        )
+
+    def _record(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for v in ids:
+                self._accesses[v] = self._accesses.pop(v, 0) + 1
+            while len(self._accesses) > self.max_tracked:
+                self._accesses.popitem(last=False)
+
+
+def register_score_scale(store: str, scale: ScoreScale) -> None:
+    """Register how to turn the scores of a vector store into similarities.
+
+    Stores without a registered scale are taken to return similarities,
+    as Qdrant does.
+
+    Args:
+        store: The class name of the mem0 vector store, e.g. ``PGVector``.
+        scale: The function mapping a score to a similarity.
+    """
+    _SCALES[store] = scale
+
+
+def to_similarity(
+    recalled: dict[str, Any], store: VectorStoreBase
+) -> dict[str, Any]:
+    """Turn the scores of search results into cosine similarities.
+
+    Args:
+        recalled: Results of mem0's search over the store.
+        store: The vector store which answered the search.
+
+    Returns:
+        dict[str, Any]: The results, scored higher for closer memories.
+    """
+    if (scale := _SCALES.get(type(store).__name__)) is None:
+        return recalled
+    return recalled | {
+        "results": [
+            v | {"score": scale(v["score"])}
+            if v.get("score") is not None
+            else v
+            for v in recalled.get("results", [])
+        ]
+    }
+
+
+def _cosine_distance(distance: float) -> float:
+    return 1.0 - distance
+
+
+def _squared_l2(distance: float) -> float:
+    # Squared euclidean distance of unit vectors, e.g. Chroma's default.
+    return 1.0 - distance / 2
+
+
+register_score_scale("AzureMySQL", _cosine_distance)
+register_score_scale("CassandraDB", _cosine_distance)
+register_score_scale("ChromaDB", _squared_l2)
+register_score_scale("PGVector", _cosine_distance)
+register_score_scale("RedisDB", _cosine_distance)
+register_score_scale("S3Vectors", _cosine_distance)
+register_score_scale("Supabase", _cosine_distance)
+register_score_scale("ValkeyDB", _cosine_distance)
+
+
+def parse_timestamp(timestamp: str | datetime) -> datetime:
+    """Parse a timestamp of mem0.
+
+    Args:
+        timestamp: An ISO 8601 timestamp or a datetime.
+
+    Returns:
+        datetime: The aware datetime, naive timestamps being taken as UTC.
+    """
+    t = (
+        timestamp
+        if isinstance(timestamp, datetime)
+        else datetime.fromisoformat(timestamp)
+    )
+    return t if t.tzinfo is not None else t.replace(tzinfo=UTC)
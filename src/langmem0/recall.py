@@ -0,0 +1,319 @@
+"""Recall pipeline shared by ChatOpenAI and Mem0Middleware.
+
+This module provides the Recall class searching mem0, through the hot tier
+when there is one, for the queries built from a conversation, looking
+relations up in the graph next to it and ranking the results, along with
+``prepare`` wiring the mem0 instances of an integration and the
+``guarded``/``aguarded`` context managers running a mem0 call in a tenant
+slot behind a circuit breaker.
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from typing import Any
+
+import httpx
+from mem0 import AsyncMemory, Memory
+
+from langmem0.breaker import CircuitBreaker, guard
+from langmem0.clients import share_http_client
+from langmem0.embedding_cache import CachedEmbedder, EmbeddingCache
+from langmem0.graph import GraphBackend, TimedGraph
+from langmem0.hot_tier import HotTier
+from langmem0.metrics import Metrics
+from langmem0.query import QueryBuilder, merge_relations
+from langmem0.ranking import Reranker, to_similarity
+from langmem0.retention import RetentionPolicy
+from langmem0.scheduler import TenantScheduler
+
+
+logger = logging.getLogger(__name__)
+
+
+class Recall:
+    """Recall memories relevant to a conversation.
+
+    Every query built from the conversation is searched in the hot tier, or
+    in mem0 on a miss, with scores turned into similarities so that both
+    rank alike. The results are merged by the query builder, filtered by the
+    retention policy and reranked, while the graph, if any, is searched
+    once for the first query in parallel. Relations found by several
+    lookups are kept once, so they count once against the token budget.
+    """
+
+    def __init__(
+        self,
+        m0: Memory,
+        am0: AsyncMemory,
+        query_builder: QueryBuilder,
+        metrics: Metrics,
+        limit: int = 5,
+        hot_tier: HotTier | None = None,
+        graph: GraphBackend | None = None,
+        reranker: Reranker | None = None,
+        retention: RetentionPolicy | None = None,
+    ) -> None:
+        """Initialize the pipeline.
+
+        Args:
+            m0: The mem0 memory searched by ``search``.
+            am0: The mem0 memory searched by ``asearch``.
+            query_builder: Builds the queries and merges their results.
+            metrics: The registry to record latencies in.
+            limit: The maximum number of memories recalled.
+            hot_tier: Optional cache of memories searched before mem0.
+            graph: Optional graph backend searched for relations.
+            reranker: Optional reranker of the merged results.
+            retention: Optional policy dropping expired memories.
+        """
+        self.m0 = m0
+        self.am0 = am0
+        self.query_builder = query_builder
+        self.metrics = metrics
+        self.limit = limit
+        self.hot_tier = hot_tier
+        self.graph = graph
+        self.reranker = reranker
+        self.retention = retention
+
+    async def arecall(
+        self,
+        messages: list[dict[str, Any]],
+        user_id: str,
+        filters: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Async version of ``recall``.
+
+        Args:
+            messages: The conversation, oldest message first.
+            user_id: The user whose memories are searched.
+            filters: Optional metadata filters of the search.
+
+        Returns:
+            dict[str, Any]: The recalled memories and relations.
+        """
+        queries = self.query_builder.build(messages)
+        if self.graph is None or not queries:
+            return await self._avector(queries, user_id, filters)
+
+        r, relations = await asyncio.gather(
+            self._avector(queries, user_id, filters),
+            asyncio.to_thread(
+                self.graph.search, queries[0], {"user_id": user_id}, self.limit
+            ),
+        )
+        return r | {
+            "relations": merge_relations([r.get("relations"), relations])
+        }
+
+    def recall(
+        self,
+        messages: list[dict[str, Any]],
+        user_id: str,
+        filters: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Recall memories relevant to a conversation.
+
+        Args:
+            messages: The conversation as OpenAI-style dicts, oldest message
+                first.
+            user_id: The user whose memories are searched.
+            filters: Optional metadata filters of the search.
+
+        Returns:
+            dict[str, Any]: The recalled memories and relations.
+        """
+        queries = self.query_builder.build(messages)
+        if self.graph is None or not queries:
+            return self._vector(queries, user_id, filters)
+
+        with ThreadPoolExecutor(1) as executor:
+            relations = executor.submit(
+                self.graph.search, queries[0], {"user_id": user_id}, self.limit
+            )
+            r = self._vector(queries, user_id, filters)
+            return r | {
+                "relations": merge_relations(
+                    [r.get("relations"), relations.result()]
+                )
+            }
+
+    async def _avector(
+        self,
+        queries: list[str],
+        user_id: str,
+        filters: dict[str, Any] | None,
+    ) -> dict[str, Any]:
+        n = self._candidates()
+        with self.metrics.timer("recall.vector"):
+            results = await asyncio.gather(
+                *(self._asearch(v, user_id, filters, n) for v in queries)
+            )
+        return self._rank(self.query_builder.merge(results, n))
+
+    def _vector(
+        self,
+        queries: list[str],
+        user_id: str,
+        filters: dict[str, Any] | None,
+    ) -> dict[str, Any]:
+        n = self._candidates()
+        with self.metrics.timer("recall.vector"):
+            if len(queries) > 1:
+                with ThreadPoolExecutor(len(queries)) as executor:
+                    results = list(
+                        executor.map(
+                            lambda v: self._search(v, user_id, filters, n),
+                            queries,
+                        )
+                    )
+            else:
+                results = [
+                    self._search(v, user_id, filters, n) for v in queries
+                ]
+        return self._rank(self.query_builder.merge(results, n))
+
+    async def _asearch(
+        self,
+        query: str,
+        user_id: str,
+        filters: dict[str, Any] | None,
+        limit: int,
+    ) -> dict[str, Any]:
+        if self.hot_tier is not None:
+            r = await self.hot_tier.asearch(
+                self.am0, query, user_id=user_id, filters=filters, limit=limit
+            )
+            if r is not None:
+                return r
+
+        r = await self.am0.search(
+            query, user_id=user_id, filters=filters, limit=limit
+        )
+        return to_similarity(r, self.am0.vector_store)
+
+    def _search(
+        self,
+        query: str,
+        user_id: str,
+        filters: dict[str, Any] | None,
+        limit: int,
+    ) -> dict[str, Any]:
+        if self.hot_tier is not None:
+            r = self.hot_tier.search(
+                self.m0, query, user_id=user_id, filters=filters, limit=limit
+            )
+            if r is not None:
+                return r
+
+        r = self.m0.search(
+            query, user_id=user_id, filters=filters, limit=limit
+        )
+        # On the scale of the hot tier, whatever the store.
+        return to_similarity(r, self.m0.vector_store)
+
+    def _candidates(self) -> int:
+        if self.reranker is None:
+            return self.limit
+        return self.reranker.candidates(self.limit)
+
+    def _rank(self, r: dict[str, Any]) -> dict[str, Any]:
+        if self.retention is not None:
+            n = len(r.get("results", []))
+            r = self.retention.filter(r)
+            self.metrics.incr("recall.expired", n - len(r["results"]))
+        if self.reranker is None:
+            return r
+        return self.reranker.rerank(r, self.limit)
+
+
+def prepare(
+    m: Memory | AsyncMemory,
+    metrics: Metrics,
+    http_client: httpx.Client | None = None,
+    embedding_cache: EmbeddingCache | None = None,
+) -> None:
+    """Wire a mem0 memory of an integration in place.
+
+    Args:
+        m: The mem0 memory.
+        metrics: The registry of the integration.
+        http_client: Optional client whose pool the memory shares.
+        embedding_cache: Optional cache of the memory's embeddings.
+    """
+    if http_client is not None:
+        share_http_client(m, http_client)
+
+    if embedding_cache is not None:
+        m.embedding_model = CachedEmbedder(m.embedding_model, embedding_cache)
+
+    # mem0 looks its graph up next to the vector store, time it apart.
+    if m.enable_graph:
+        m.graph = TimedGraph(m.graph, metrics)
+
+
+@asynccontextmanager
+async def aguarded(
+    scheduler: TenantScheduler | None,
+    tenant: str,
+    breaker: CircuitBreaker | None,
+    op: str,
+    metrics: Metrics,
+) -> AsyncIterator[bool]:
+    """Async version of ``guarded``.
+
+    Args:
+        scheduler: Optional scheduler sharing capacity between tenants.
+        tenant: The tenant the call is made for.
+        breaker: Optional breaker bypassing the call.
+        op: The operation, ``recall`` or ``memorize``.
+        metrics: The registry the bypass is counted in.
+
+    Yields:
+        bool: Whether to make the call.
+    """
+    slot = nullcontext() if scheduler is None else scheduler.aslot(tenant, op)
+    async with slot:
+        # Taken once admitted, a throttled tenant holds no capacity.
+        permit = guard(breaker, op, metrics)
+        if permit is None:
+            yield False
+            return
+        with permit:
+            yield True
+
+
+@contextmanager
+def guarded(
+    scheduler: TenantScheduler | None,
+    tenant: str,
+    breaker: CircuitBreaker | None,
+    op: str,
+    metrics: Metrics,
+) -> Iterator[bool]:
+    """Run a mem0 call in a slot of its tenant behind a circuit breaker.
+
+    The call is made if the breaker lets it through, and its exceptions are
+    then logged and swallowed by the breaker's permit.
+
+    Args:
+        scheduler: Optional scheduler sharing capacity between tenants.
+        tenant: The tenant the call is made for.
+        breaker: Optional breaker bypassing the call.
+        op: The operation, ``recall`` or ``memorize``.
+        metrics: The registry the bypass is counted in.
+
+    Yields:
+        bool: Whether to make the call.
+    """
+    slot = nullcontext() if scheduler is None else scheduler.slot(tenant, op)
+    with slot:
+        permit = guard(breaker, op, metrics)
+        if permit is None:
+            yield False
+            return
+        with permit:
+            yield True
@@ -0,0 +1,244 @@
+"""Retention of memories.
+
+This module provides the RetentionPolicy class assigning a time to live to
+memories by their metadata, which ChatOpenAI and Mem0Middleware apply to
+recall results so that expired memories are never injected, and the
+RetentionSweeper class deleting expired memories from the store in batches,
+so that it stays bounded in long-running deployments.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from typing import Any
+
+from mem0 import Memory
+
+from langmem0.hot_tier import HotTier
+from langmem0.metrics import Metrics
+from langmem0.ranking import parse_timestamp
+from langmem0.snapshot import iter_memories
+
+
+logger = logging.getLogger(__name__)
+
+Rule = tuple[dict[str, Any], float | None]
+
+
+class RetentionPolicy:
+    """Time to live of memories, by metadata.
+
+    A memory expires ``ttl`` seconds after it was last updated. Its TTL is
+    the one of the first rule whose metadata all match, e.g.::
+
+        RetentionPolicy(
+            rules=[
+                ({"category": "preference"}, 30 * 24 * 3600),
+                ({"category": "fact"}, None),
+            ],
+            default_ttl=365 * 24 * 3600,
+        )
+
+    A TTL of None never expires. Memories without timestamps never expire
+    either.
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[Rule] = (),
+        default_ttl: float | None = None,
+    ) -> None:
+        """Initialize the policy.
+
+        Args:
+            rules: Pairs of metadata to match and TTL in seconds, the first
+                matching rule applying.
+            default_ttl: The TTL of memories matching no rule.
+        """
+        self.rules = list(rules)
+        self.default_ttl = default_ttl
+
+    def ttl(self, item: dict[str, Any]) -> float | None:
+        """Return the TTL of a memory.
+
+        Args:
+            item: A memory as returned by mem0's search or get_all, or a raw
+                vector store payload.
+
+        Returns:
+            float | None: The TTL in seconds, None if it never expires.
+        """
+        metadata = item.get("metadata") or {}
+        for match, ttl in self.rules:
+            if all(
+                item.get(k, metadata.get(k)) == v for k, v in match.items()
+            ):
+                return ttl
+        return self.default_ttl
+
+    def expired(self, item: dict[str, Any], now: datetime) -> bool:
+        """Return whether a memory expired.
+
+        Args:
+            item: A memory as returned by mem0's search or get_all, or a raw
+                vector store payload.
+            now: The current time.
+
+        Returns:
+            bool: Whether the memory outlived its TTL.
+        """
+        ttl = self.ttl(item)
+        updated = item.get("updated_at") or item.get("created_at")
+        if ttl is None or not updated:
+            return False
+        return (now - parse_timestamp(updated)).total_seconds() > ttl
+
+    def filter(
+        self, recalled: dict[str, Any], now: datetime | None = None
+    ) -> dict[str, Any]:
+        """Drop expired memories from recall results.
+
+        Args:
+            recalled: Recall results with ``results``.
+            now: The current time, defaulting to now.
+
+        Returns:
+            dict[str, Any]: The results without expired memories.
+        """
+        now = now or datetime.now(UTC)
+        return recalled | {
+            "results": [
+                v
+                for v in recalled.get("results", [])
+                if not self.expired(v, now)
+            ]
+        }
+
+
+class RetentionSweeper:
+    """Delete expired memories from the store in batches.
+
+    ``sweep`` scans the store page by page, then deletes the expired
+    memories through the Mem0 API in batches separated by ``pause`` seconds,
+    so that the sweep doesn't compete with live traffic. ``start`` sweeps
+    periodically in a background thread.
+    """
+
+    def __init__(
+        self,
+        config: dict[str, Any],
+        policy: RetentionPolicy,
+        batch_size: int = 500,
+        pause: float = 0.1,
+        page_size: int = 1000,
+        hot_tier: HotTier | None = None,
+    ) -> None:
+        """Initialize the sweeper.
+
+        Args:
+            config: Mem0 configuration dictionary.
+            policy: The retention policy.
+            batch_size: Memories deleted between pauses.
+            pause: Seconds to sleep between batches.
+            page_size: Memories scanned per page.
+            hot_tier: Optional hot tier to invalidate swept users in.
+        """
+        self.policy = policy
+        self.batch_size = batch_size
+        self.pause = pause
+        self.page_size = page_size
+        self.hot_tier = hot_tier
+        self.metrics = Metrics()
+        self.m0 = Memory.from_config(config)
+
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sweep(
+        self,
+        filters: dict[str, Any] | None = None,
+        max_deletes: int | None = None,
+    ) -> int:
+        """Delete expired memories.
+
+        Counts are accumulated in ``metrics`` as ``retention.scanned``,
+        ``.expired``, ``.deleted`` and ``.failed``.
+
+        Args:
+            filters: Exact-match filters restricting the sweep, e.g.
+                ``{"user_id": "alice"}``, or None for the whole store.
+            max_deletes: The number of memories deleted at most, the others
+                being left for the next sweep.
+
+        Returns:
+            int: The number of deleted memories.
+        """
+        now = datetime.now(UTC)
+        # Ids only, deleting while paging would shift offset-based pagers.
+        expired: list[tuple[str, str | None]] = []
+        for v in iter_memories(
+            self.m0, filters, self.page_size, with_vectors=False
+        ):
+            self.metrics.incr("retention.scanned")
+            if self.policy.expired(v["payload"], now):
+                expired.append((v["id"], v["payload"].get("user_id")))
+                if max_deletes is not None and len(expired) >= max_deletes:
+                    break
+        self.metrics.incr("retention.expired", len(expired))
+
+        deleted = 0
+        users = set()
+        for i in range(0, len(expired), self.batch_size):
+            if i:
+                time.sleep(self.pause)
+            for memory_id, user_id in expired[i : i + self.batch_size]:
+                try:
+                    self.m0.delete(memory_id)
+                except Exception:
+                    logger.exception(f"deleting expired {memory_id=} failed")
+                    self.metrics.incr("retention.failed")
+                    continue
+                deleted += 1
+                users.add(user_id)
+            logger.info(f"swept {deleted}/{len(expired)} expired memories")
+
+        self.metrics.incr("retention.deleted", deleted)
+        if self.hot_tier is not None:
+            for v in users - {None}:
+                self.hot_tier.invalidate(v)
+        return deleted
+
+    def start(
+        self, interval: float = 3600.0, max_deletes: int | None = None
+    ) -> None:
+        """Sweep periodically in a background thread.
+
+        Args:
+            interval: Seconds between sweeps.
+            max_deletes: The number of memories deleted at most per sweep.
+        """
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.sweep(max_deletes=max_deletes)
+                except Exception:
+                    logger.exception("retention sweep failed")
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread, letting the current sweep finish."""
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
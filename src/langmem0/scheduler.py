@@ -0,0 +1,321 @@
+"""Tenant-aware scheduling of memory operations.
+
+This module provides the TenantScheduler class which admits recall and
+memorize operations of many tenants sharing a process. Every tenant gets
+token-bucket rate limits per operation and a concurrency cap, and the shared
+slots are handed out round-robin across tenants, so a noisy tenant cannot
+starve the others. The state of tenants gone idle is dropped, so the
+scheduler stays bounded however many tenants it sees.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+
+from langmem0.metrics import Metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket."""
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        """Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second.
+            burst: Capacity of the bucket, defaulting to one second of rate
+                and at least one token.
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, n: float = 1) -> float:
+        """Take tokens, going into debt if there aren't enough.
+
+        Args:
+            n: The number of tokens.
+
+        Returns:
+            float: Seconds to wait before the tokens are actually available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= n
+            return max(0.0, -self._tokens / self.rate)
+
+    def full(self) -> bool:
+        """Whether the bucket has refilled to its capacity."""
+        with self._lock:
+            elapsed = time.monotonic() - self._updated
+            return self._tokens + elapsed * self.rate >= self.burst
+
+
+class TenantQuota:
+    """Resource limits of a tenant."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        recall_rate: float | None = None,
+        recall_burst: float | None = None,
+        memorize_rate: float | None = None,
+        memorize_burst: float | None = None,
+    ) -> None:
+        """Initialize the quota.
+
+        Args:
+            max_concurrency: Operations of the tenant running at once.
+            recall_rate: Recalls per second, or None for no limit.
+            recall_burst: Recalls allowed in a burst.
+            memorize_rate: Memorize operations per second, or None for no
+                limit.
+            memorize_burst: Memorize operations allowed in a burst.
+        """
+        self.max_concurrency = max_concurrency
+        self.rates = {
+            "recall": (recall_rate, recall_burst),
+            "memorize": (memorize_rate, memorize_burst),
+        }
+
+
+class _Waiter:
+    """An operation waiting for a slot."""
+
+    def __init__(self, wake: Callable[[], None]) -> None:
+        self.wake = wake
+        self.granted = False
+
+
+class _Tenant:
+    """Scheduling state of a tenant."""
+
+    def __init__(self, quota: TenantQuota) -> None:
+        self.quota = quota
+        self.running = 0
+        self.used = time.monotonic()
+        self.waiters: deque[_Waiter] = deque()
+        self.buckets = {
+            op: TokenBucket(rate, burst)
+            for op, (rate, burst) in quota.rates.items()
+            if rate is not None
+        }
+
+    def idle(self) -> bool:
+        """Whether dropping the state changes nothing for the tenant."""
+        return (
+            not self.running
+            and not self.waiters
+            and all(v.full() for v in self.buckets.values())
+        )
+
+
+class TenantScheduler:
+    """Admit memory operations of many tenants fairly.
+
+    An operation first waits on the token bucket of its tenant and kind,
+    then for a slot. At most ``max_concurrency`` operations run at once in
+    total and ``quota.max_concurrency`` per tenant, and free slots go to the
+    waiting tenants in round-robin order. Sync and async callers can share a
+    scheduler.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        default_quota: TenantQuota | None = None,
+        quotas: dict[str, TenantQuota] | None = None,
+        idle_ttl: float = 300.0,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            max_concurrency: Operations running at once across all tenants.
+            default_quota: Quota of tenants missing from ``quotas``.
+            quotas: Quotas keyed by tenant.
+            idle_ttl: Seconds after the last operation of a tenant its
+                state is dropped, once nothing runs or waits and its
+                buckets have refilled.
+        """
+        self.max_concurrency = max_concurrency
+        self.default_quota = default_quota or TenantQuota()
+        self.quotas = quotas or {}
+        self.idle_ttl = idle_ttl
+        self.metrics = Metrics()
+
+        # Least recently used first.
+        self._tenants: OrderedDict[str, _Tenant] = OrderedDict()
+        # Tenants with waiters, in the order they are served.
+        self._ring: deque[str] = deque()
+        self._running = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, tenant: str, op: str) -> Iterator[None]:
+        """Run a block as an operation of a tenant.
+
+        Args:
+            tenant: The tenant identifier.
+            op: The operation kind, ``recall`` or ``memorize``.
+
+        Yields:
+            None: Control once the operation is admitted.
+        """
+        start = time.perf_counter()
+        if delay := self._reserve(tenant, op):
+            time.sleep(delay)
+
+        event = threading.Event()
+        self._enqueue(tenant, _Waiter(event.set))
+        event.wait()
+        self.metrics.observe(
+            f"scheduler.{op}.wait", time.perf_counter() - start
+        )
+        try:
+            yield
+        finally:
+            self._release(tenant)
+
+    @asynccontextmanager
+    async def aslot(self, tenant: str, op: str) -> AsyncIterator[None]:
+        """Async version of ``slot``.
+
+        Args:
+            tenant: The tenant identifier.
+            op: The operation kind, ``recall`` or ``memorize``.
+
+        Yields:
+            None: Control once the operation is admitted.
+        """
+        start = time.perf_counter()
+        if delay := self._reserve(tenant, op):
+            await asyncio.sleep(delay)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake() -> None:
+            if not future.done():
+                future.set_result(None)
+
+        waiter = self._enqueue(
+            tenant, _Waiter(lambda: loop.call_soon_threadsafe(wake))
+        )
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._cancel(tenant, waiter)
+            raise
+
+        self.metrics.observe(
+            f"scheduler.{op}.wait", time.perf_counter() - start
+        )
+        try:
+            yield
+        finally:
+            self._release(tenant)
+
+    def _tenant(self, tenant: str) -> _Tenant:
+        if (t := self._tenants.get(tenant)) is None:
+            self._evict_locked()
+            quota = self.quotas.get(tenant, self.default_quota)
+            t = self._tenants[tenant] = _Tenant(quota)
+        else:
+            self._tenants.move_to_end(tenant)
+        t.used = time.monotonic()
+        return t
+
+    def _evict_locked(self) -> None:
+        """Drop the state of the tenants idle for longer than the TTL."""
+        now = time.monotonic()
+        while self._tenants:
+            tenant, t = next(iter(self._tenants.items()))
+            if now - t.used < self.idle_ttl:
+                return
+            if t.idle() and tenant not in self._ring:
+                del self._tenants[tenant]
+                logger.debug(f"evicted idle {tenant=}")
+            else:
+                # Busy for long or still throttled, look again later.
+                t.used = now
+                self._tenants.move_to_end(tenant)
+
+    def _reserve(self, tenant: str, op: str) -> float:
+        with self._lock:
+            bucket = self._tenant(tenant).buckets.get(op)
+        if bucket is None:
+            return 0.0
+
+        if delay := bucket.reserve():
+            self.metrics.incr(f"scheduler.{op}.throttled")
+            logger.debug(f"throttle {op} of {tenant=} for {delay:.3f}s")
+        return delay
+
+    def _enqueue(self, tenant: str, waiter: _Waiter) -> _Waiter:
+        with self._lock:
+            t = self._tenant(tenant)
+            if tenant not in self._ring:
+                self._ring.append(tenant)
+            t.waiters.append(waiter)
+            self._dispatch_locked()
+        return waiter
+
+    def _release(self, tenant: str) -> None:
+        with self._lock:
+            self._running -= 1
+            self._tenant(tenant).running -= 1
+            self._dispatch_locked()
+
+    def _cancel(self, tenant: str, waiter: _Waiter) -> None:
+        with self._lock:
+            if not waiter.granted:
+                t = self._tenant(tenant)
+                t.waiters.remove(waiter)
+                if not t.waiters and tenant in self._ring:
+                    self._ring.remove(tenant)
+                return
+        # Granted while being cancelled, give the slot back.
+        self._release(tenant)
+
+    def _dispatch_locked(self) -> None:
+        """Hand free slots to waiting tenants in round-robin order."""
+        skipped = 0
+        while self._running < self.max_concurrency and skipped < len(
+            self._ring
+        ):
+            tenant = self._ring.popleft()
+            t = self._tenants[tenant]
+            if not t.waiters:
+                continue
+            if t.running >= t.quota.max_concurrency:
+                self._ring.append(tenant)
+                skipped += 1
+                continue
+
+            waiter = t.waiters.popleft()
+            waiter.granted = True
+            self._running += 1
+            t.running += 1
+            if t.waiters:
+                self._ring.append(tenant)
+            skipped = 0
+            waiter.wake()
+
+        self.metrics.set("scheduler.running", self._running)
+        self.metrics.set(
+            "scheduler.waiting",
+            sum(len(self._tenants[v].waiters) for v in self._ring),
+        )
@@ -0,0 +1,550 @@
+"""Sticky-shard execution of memory operations across processes.
+
+This module provides the ShardedMemory class which runs mem0 operations in
+a pool of worker processes, routing every user to a fixed worker by a
+consistent hash of its id. Each worker owns its memory and hot tier, so
+caches of a user are built once and stay warm, and work scales across cores
+without contending for the GIL. MemoryView and AsyncMemoryView expose the
+pool like mem0's Memory and AsyncMemory to ChatOpenAI and Mem0Middleware.
+"""
+
+import asyncio
+import bisect
+import contextlib
+import hashlib
+import logging
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from multiprocessing.process import BaseProcess
+from types import TracebackType
+from typing import Any, Self
+
+from mem0 import Memory
+
+from langmem0.hot_tier import HotTier
+from langmem0.invalidation import InvalidationBus, publish_writes
+from langmem0.metrics import Metrics
+from langmem0.ranking import to_similarity
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the workers while waiting on them.
+_POLL_SECONDS = 0.5
+
+
+class HashRing:
+    """Consistent hash ring of shards.
+
+    Every shard owns ``replicas`` points of the ring, and a key goes to the
+    shard owning the first point at or after its hash, so that changing the
+    number of shards only moves about ``1 / shards`` of the keys.
+    """
+
+    def __init__(self, shards: int, replicas: int = 64) -> None:
+        """Initialize the ring.
+
+        Args:
+            shards: The number of shards.
+            replicas: Points of the ring per shard.
+        """
+        points = sorted(
+            (_hash(f"{shard}:{i}"), shard)
+            for shard in range(shards)
+            for i in range(replicas)
+        )
+        self._hashes = [v for v, _ in points]
+        self._shards = [v for _, v in points]
+
+    def shard(self, key: str) -> int:
+        """Return the shard of a key.
+
+        Args:
+            key: The key, e.g. a user id.
+
+        Returns:
+            int: The shard index.
+        """
+        i = bisect.bisect_left(self._hashes, _hash(key))
+        return self._shards[i % len(self._shards)]
+
+
+class ShardedMemory:
+    """Run memory operations in worker processes owning disjoint users.
+
+    Operations of a user always run on the worker its id hashes to. Adds
+    run in submission order on a lane of their own, so that a slow
+    extraction doesn't hold the searches back. Every worker has a bounded
+    queue, and submitting to a full queue blocks up to ``submit_timeout``,
+    so a burst of work is throttled instead of piling up in memory. Results
+    come back as futures, or as coroutines with the ``a``-prefixed methods.
+    The futures of a worker which dies fail with a RuntimeError.
+
+    The vector store must be shared by the workers, i.e. served by a
+    database rather than a local file. Given a bus factory, every worker
+    publishes its writes to the hot tiers of other processes, and its own
+    hot tier drops the users they write. Search scores are similarities,
+    whatever the store.
+    """
+
+    def __init__(
+        self,
+        config: dict[str, Any],
+        workers: int | None = None,
+        queue_size: int = 64,
+        hot_tier: dict[str, Any] | None = None,
+        replicas: int = 64,
+        submit_timeout: float = 60.0,
+        bus_factory: Callable[[], InvalidationBus] | None = None,
+    ) -> None:
+        """Start the workers.
+
+        Args:
+            config: Mem0 configuration dictionary.
+            workers: The number of worker processes, defaulting to the
+                number of CPUs.
+            queue_size: Operations queued per worker at most.
+            hot_tier: Keyword arguments of the HotTier of every worker, or
+                None for no hot tier.
+            replicas: Points of the hash ring per worker.
+            submit_timeout: Seconds to wait for room in the queue of a
+                worker before failing with a TimeoutError.
+            bus_factory: Optional function creating the invalidation bus of
+                a worker, called in the worker, e.g.
+                ``functools.partial(UnixSocketBus, directory)``. It must be
+                picklable.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.submit_timeout = submit_timeout
+        self.ring = HashRing(self.workers, replicas)
+        self.metrics = Metrics()
+
+        ctx = mp.get_context("spawn")
+        self._results = ctx.Queue()
+        self._queues = [ctx.Queue(queue_size) for _ in range(self.workers)]
+        self._processes: list[BaseProcess] = [
+            ctx.Process(
+                target=_work,
+                args=(
+                    config,
+                    hot_tier,
+                    bus_factory,
+                    queue_size,
+                    q,
+                    self._results,
+                ),
+                name=f"langmem0-shard-{i}",
+                daemon=True,
+            )
+            for i, q in enumerate(self._queues)
+        ]
+        for v in self._processes:
+            v.start()
+
+        # Pending futures and the shard computing them.
+        self._futures: dict[int, tuple[int, Future[Any]]] = {}
+        self._ids = iter(range(1 << 62))
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def __enter__(self) -> Self:
+        """Return the pool."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        """Stop the workers."""
+        self.close()
+
+    def shard(self, user_id: str) -> int:
+        """Return the worker of a user.
+
+        Args:
+            user_id: The user identifier.
+
+        Returns:
+            int: The worker index.
+        """
+        return self.ring.shard(user_id)
+
+    def search(
+        self,
+        query: str,
+        *,
+        user_id: str,
+        filters: dict[str, Any] | None = None,
+        limit: int = 100,
+    ) -> Future[dict[str, Any]]:
+        """Search memories of a user on its worker.
+
+        Args:
+            query: The query to search for.
+            user_id: The user identifier.
+            filters: Exact-match metadata filters.
+            limit: The maximum number of memories to return.
+
+        Returns:
+            Future[dict[str, Any]]: The results of mem0's search, scored as
+            similarities.
+        """
+        return self._submit(
+            "search",
+            user_id,
+            {"query": query, "filters": filters, "limit": limit},
+        )
+
+    def add(
+        self,
+        messages: str | list[dict[str, Any]],
+        *,
+        user_id: str,
+        run_id: str | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> Future[dict[str, Any]]:
+        """Add memories of a user on its worker.
+
+        Args:
+            messages: The messages to extract memories from.
+            user_id: The user identifier.
+            run_id: The run identifier.
+            metadata: Metadata stored with the memories.
+
+        Returns:
+            Future[dict[str, Any]]: The results of mem0's add.
+        """
+        return self._submit(
+            "add",
+            user_id,
+            {"messages": messages, "run_id": run_id, "metadata": metadata},
+        )
+
+    def get_all(
+        self, *, user_id: str, limit: int = 100
+    ) -> Future[dict[str, Any]]:
+        """List memories of a user on its worker.
+
+        Args:
+            user_id: The user identifier.
+            limit: The maximum number of memories to return.
+
+        Returns:
+            Future[dict[str, Any]]: The results of mem0's get_all.
+        """
+        return self._submit("get_all", user_id, {"limit": limit})
+
+    async def asearch(
+        self,
+        query: str,
+        *,
+        user_id: str,
+        filters: dict[str, Any] | None = None,
+        limit: int = 100,
+    ) -> dict[str, Any]:
+        """Async version of ``search``.
+
+        Args:
+            query: The query to search for.
+            user_id: The user identifier.
+            filters: Exact-match metadata filters.
+            limit: The maximum number of memories to return.
+
+        Returns:
+            dict[str, Any]: The results of mem0's search, scored as
+            similarities.
+        """
+        future = await asyncio.to_thread(
+            self.search, query, user_id=user_id, filters=filters, limit=limit
+        )
+        return await asyncio.wrap_future(future)
+
+    async def aadd(
+        self,
+        messages: str | list[dict[str, Any]],
+        *,
+        user_id: str,
+        run_id: str | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Async version of ``add``.
+
+        Args:
+            messages: The messages to extract memories from.
+            user_id: The user identifier.
+            run_id: The run identifier.
+            metadata: Metadata stored with the memories.
+
+        Returns:
+            dict[str, Any]: The results of mem0's add.
+        """
+        future = await asyncio.to_thread(
+            self.add,
+            messages,
+            user_id=user_id,
+            run_id=run_id,
+            metadata=metadata,
+        )
+        return await asyncio.wrap_future(future)
+
+    def close(self) -> None:
+        """Stop the workers once their queued operations are done."""
+        for shard in range(self.workers):
+            try:
+                self._put(shard, None, self.submit_timeout)
+            except (RuntimeError, TimeoutError):
+                logger.warning(f"shard {shard} didn't take the stop request")
+                self._processes[shard].terminate()
+        for v in self._processes:
+            v.join()
+        self._results.put(None)
+        self._reader.join()
+        self._fail_dead()
+
+    def _submit(
+        self, op: str, user_id: str, kwargs: dict[str, Any]
+    ) -> Future[Any]:
+        shard = self.shard(user_id)
+        future: Future[Any] = Future()
+        with self._lock:
+            request_id = next(self._ids)
+            self._futures[request_id] = (shard, future)
+
+        start = time.perf_counter()
+        try:
+            self._put(
+                shard, (request_id, op, user_id, kwargs), self.submit_timeout
+            )
+        except BaseException:
+            with self._lock:
+                self._futures.pop(request_id, None)
+            raise
+        self.metrics.observe("shard.enqueue", time.perf_counter() - start)
+        self.metrics.incr(f"shard.{shard}.submitted")
+        return future
+
+    def _put(self, shard: int, item: object, timeout: float) -> None:
+        """Queue an item for a worker, waiting while its queue is full."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if not self._processes[shard].is_alive():
+                raise RuntimeError(f"shard {shard} is not running")
+            left = max(0.0, deadline - time.monotonic())
+            try:
+                self._queues[shard].put(item, timeout=min(_POLL_SECONDS, left))
+                return
+            except queue.Full:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"shard {shard} is full") from None
+
+    def _read(self) -> None:
+        checked = time.monotonic()
+        while True:
+            with contextlib.suppress(queue.Empty):
+                if (item := self._results.get(timeout=_POLL_SECONDS)) is None:
+                    return
+                self._resolve(*item)
+
+            # Under steady traffic too, a dead worker never answers.
+            if time.monotonic() - checked >= _POLL_SECONDS:
+                self._fail_dead()
+                checked = time.monotonic()
+
+    def _resolve(self, request_id: int, ok: bool, value: object) -> None:
+        with self._lock:
+            _, future = self._futures.pop(request_id, (None, None))
+        if future is None:
+            # Already failed with its dead worker.
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    def _fail_dead(self) -> None:
+        """Fail the pending futures of the workers which died."""
+        dead = {i for i, v in enumerate(self._processes) if not v.is_alive()}
+        if not dead:
+            return
+
+        with self._lock:
+            failed = [k for k, (v, _) in self._futures.items() if v in dead]
+            futures = [self._futures.pop(k)[1] for k in failed]
+        for v in futures:
+            v.set_exception(RuntimeError("shard died before answering"))
+        if futures:
+            logger.error(f"{len(futures)} operations lost with shards {dead}")
+
+
+class MemoryView:
+    """A ShardedMemory searched and written like mem0's Memory.
+
+    Calls wait for the worker to answer. Scores come back as similarities,
+    so the view has no vector store of its own to convert them from.
+    """
+
+    vector_store = None
+
+    def __init__(self, memory: ShardedMemory) -> None:
+        """Wrap a pool.
+
+        Args:
+            memory: The pool of workers.
+        """
+        self.memory = memory
+
+    def search(self, query: str, **kwargs: Any) -> dict[str, Any]:
+        """Search memories of a user, see ``ShardedMemory.search``."""
+        return self.memory.search(query, **kwargs).result()
+
+    def add(
+        self, messages: str | list[dict[str, Any]], **kwargs: Any
+    ) -> dict[str, Any]:
+        """Add memories of a user, see ``ShardedMemory.add``."""
+        return self.memory.add(messages, **kwargs).result()
+
+
+class AsyncMemoryView:
+    """A ShardedMemory searched and written like mem0's AsyncMemory."""
+
+    vector_store = None
+
+    def __init__(self, memory: ShardedMemory) -> None:
+        """Wrap a pool.
+
+        Args:
+            memory: The pool of workers.
+        """
+        self.memory = memory
+
+    async def search(self, query: str, **kwargs: Any) -> dict[str, Any]:
+        """Search memories of a user, see ``ShardedMemory.asearch``."""
+        return await self.memory.asearch(query, **kwargs)
+
+    async def add(
+        self, messages: str | list[dict[str, Any]], **kwargs: Any
+    ) -> dict[str, Any]:
+        """Add memories of a user, see ``ShardedMemory.aadd``."""
+        return await self.memory.aadd(messages, **kwargs)
+
+
+def _work(
+    config: dict[str, Any],
+    hot_tier: dict[str, Any] | None,
+    bus_factory: Callable[[], InvalidationBus] | None,
+    queue_size: int,
+    requests: "mp.Queue[tuple[int, str, str, dict[str, Any]] | None]",
+    results: "mp.Queue[tuple[int, bool, Any] | None]",
+) -> None:
+    """Serve the operations of the users of a shard."""
+    m0 = Memory.from_config(config)
+    bus = bus_factory() if bus_factory is not None else None
+    tier = HotTier(**hot_tier, bus=bus) if hot_tier is not None else None
+
+    # Adds run on a lane of their own, reads don't queue behind extraction.
+    adds: queue.Queue[tuple[int, str, str, dict[str, Any]] | None] = (
+        queue.Queue(queue_size)
+    )
+    lane = threading.Thread(
+        target=_serve, args=(m0, tier, bus, adds, results), daemon=True
+    )
+    lane.start()
+
+    while (item := requests.get()) is not None:
+        if item[1] == "add":
+            adds.put(item)
+        else:
+            _answer(m0, tier, bus, item, results)
+
+    adds.put(None)
+    lane.join()
+    if bus is not None:
+        bus.close()
+
+
+def _serve(
+    m0: Memory,
+    tier: HotTier | None,
+    bus: InvalidationBus | None,
+    requests: "queue.Queue[tuple[int, str, str, dict[str, Any]] | None]",
+    results: "mp.Queue[tuple[int, bool, Any] | None]",
+) -> None:
+    while (item := requests.get()) is not None:
+        _answer(m0, tier, bus, item, results)
+
+
+def _answer(
+    m0: Memory,
+    tier: HotTier | None,
+    bus: InvalidationBus | None,
+    item: tuple[int, str, str, dict[str, Any]],
+    results: "mp.Queue[tuple[int, bool, Any] | None]",
+) -> None:
+    request_id, op, user_id, kwargs = item
+    try:
+        value = _run(m0, tier, bus, op, user_id, kwargs)
+    except Exception as e:
+        logger.exception(f"{op} of {user_id=} failed")
+        results.put((request_id, False, _picklable(e)))
+    else:
+        results.put((request_id, True, value))
+
+
+def _run(
+    m0: Memory,
+    tier: HotTier | None,
+    bus: InvalidationBus | None,
+    op: str,
+    user_id: str,
+    kwargs: dict[str, Any],
+) -> dict[str, Any]:
+    if op == "search":
+        if tier is not None:
+            r = tier.search(m0, user_id=user_id, **kwargs)
+            if r is not None:
+                return r
+        # On the scale of the hot tier, whatever the store.
+        return to_similarity(
+            m0.search(user_id=user_id, **kwargs), m0.vector_store
+        )
+
+    if op == "add":
+        r = m0.add(user_id=user_id, **kwargs)
+        if tier is not None:
+            # Publishes the writes on the bus of the tier.
+            tier.observe(
+                m0, r, user_id=user_id, metadata=kwargs.get("metadata")
+            )
+        elif bus is not None:
+            publish_writes(bus, user_id, r.get("results", []))
+        return r
+
+    if op == "get_all":
+        return m0.get_all(user_id=user_id, **kwargs)
+
+    raise ValueError(f"unknown operation {op!r}")
+
+
+def _picklable(e: Exception) -> Exception:
+    """Return the exception, or a RuntimeError if it can't be pickled."""
+    try:
+        # Some only fail to unpickle, e.g. with extra constructor arguments.
+        pickle.loads(pickle.dumps(e))  # noqa: S301
+    except Exception:
+        return RuntimeError(repr(e))
+    return e
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest()
+    )
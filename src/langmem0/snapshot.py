@@ -0,0 +1,327 @@
+"""Streaming export and import of mem0 memories as NDJSON.
+
+This module provides the functions dumping the memories of a user or of a
+whole store page by page, in constant memory, and loading them back in
+batches, plus the ``langmem0-snapshot`` command built on them. They are
+meant for backups and for migrating between vector stores.
+
+Every line of a snapshot is a JSON object holding the ``id``, the raw mem0
+``payload`` and, unless left out, the ``vector`` of a memory. Importing
+writes them straight into the vector store, so neither the extraction LLM
+nor the embedder is called unless vectors are missing or recomputed. mem0's
+history database is not part of a snapshot.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from contextlib import nullcontext
+from itertools import batched
+from pathlib import Path
+from typing import Any, TextIO
+
+from mem0 import Memory
+from mem0.vector_stores.base import VectorStoreBase
+
+
+logger = logging.getLogger(__name__)
+
+Row = dict[str, Any]
+
+Pager = Callable[
+    [VectorStoreBase, dict[str, Any] | None, int, object, bool],
+    tuple[list[Row], object],
+]
+"""Return a page of rows and the cursor of the next page, None at the end.
+
+Called with the store, the filters, the page size, the cursor of the page
+(None for the first one) and whether to include vectors.
+"""
+
+_PAGERS: dict[str, Pager] = {}
+
+
+def register_pager(store: str, pager: Pager) -> None:
+    """Register how to page through a kind of vector store.
+
+    Args:
+        store: The class name of the mem0 vector store, e.g. ``Qdrant``.
+        pager: The pager.
+    """
+    _PAGERS[store] = pager
+
+
+def iter_memories(
+    m0: Memory,
+    filters: dict[str, Any] | None = None,
+    page_size: int = 1000,
+    with_vectors: bool = True,
+) -> Iterator[Row]:
+    """Stream the memories of a store page by page.
+
+    Stores without a registered pager are read at once through mem0's
+    ``list``, which doesn't bound memory.
+
+    Args:
+        m0: The memory whose vector store to read.
+        filters: Exact-match filters, e.g. ``{"user_id": "alice"}``, or None
+            for the whole store.
+        page_size: The number of memories fetched per page.
+        with_vectors: Whether to include the embeddings.
+
+    Yields:
+        Row: Memories with ``id``, ``payload`` and optional ``vector``.
+    """
+    store = m0.vector_store
+    pager = _PAGERS.get(type(store).__name__)
+    if pager is None:
+        logger.warning(
+            f"no pager for {type(store).__name__}, listing it at once"
+        )
+        rows = store.list(filters=filters, limit=None)
+        # Most stores wrap the results in an extra list.
+        if rows and isinstance(rows[0], list):
+            rows = rows[0]
+        for v in rows:
+            yield {"id": str(v.id), "payload": v.payload}
+        return
+
+    cursor = None
+    while True:
+        rows, cursor = pager(store, filters, page_size, cursor, with_vectors)
+        yield from rows
+        if cursor is None:
+            return
+
+
+def export_ndjson(
+    m0: Memory,
+    out: str | Path | TextIO,
+    filters: dict[str, Any] | None = None,
+    page_size: int = 1000,
+    with_vectors: bool = True,
+) -> int:
+    """Write the memories of a store as NDJSON.
+
+    Args:
+        m0: The memory whose vector store to read.
+        out: The file, or a text stream such as ``sys.stdout``.
+        filters: Exact-match filters, or None for the whole store.
+        page_size: The number of memories fetched per page.
+        with_vectors: Whether to include the embeddings.
+
+    Returns:
+        int: The number of memories written.
+    """
+    n = 0
+    with _open(out, "w") as f:
+        for v in iter_memories(m0, filters, page_size, with_vectors):
+            f.write(json.dumps(v, ensure_ascii=False) + "\n")
+            n += 1
+            if n % (page_size * 10) == 0:
+                logger.info(f"exported {n} memories")
+    return n
+
+
+def import_ndjson(
+    m0: Memory,
+    source: str | Path | TextIO | Iterable[Row],
+    batch_size: int = 500,
+    reembed: bool = False,
+) -> int:
+    """Insert memories of an NDJSON snapshot into a store, in batches.
+
+    Args:
+        m0: The memory whose vector store to write.
+        source: The file, a text stream or the parsed rows.
+        batch_size: The number of memories inserted per call.
+        reembed: Whether to recompute the embeddings with the embedder of
+            ``m0``, e.g. when migrating to another embedding model. Rows
+            without a vector are always embedded.
+
+    Returns:
+        int: The number of memories inserted.
+    """
+    n = 0
+    for batch in batched(_rows(source), batch_size, strict=False):
+        vectors = [
+            m0.embedding_model.embed(v["payload"]["data"], "add")
+            if reembed or v.get("vector") is None
+            else v["vector"]
+            for v in batch
+        ]
+        m0.vector_store.insert(
+            vectors=vectors,
+            payloads=[v["payload"] for v in batch],
+            ids=[v["id"] for v in batch],
+        )
+        n += len(batch)
+        logger.info(f"imported {n} memories")
+    return n
+
+
+def _qdrant_pager(
+    store: VectorStoreBase,
+    filters: dict[str, Any] | None,
+    page_size: int,
+    cursor: object,
+    with_vectors: bool,
+) -> tuple[list[Row], object]:
+    points, cursor = store.client.scroll(
+        collection_name=store.collection_name,
+        scroll_filter=store._create_filter(filters) if filters else None,
+        limit=page_size,
+        offset=cursor,
+        with_payload=True,
+        with_vectors=with_vectors,
+    )
+    rows = [
+        _row(v.id, v.payload, v.vector if with_vectors else None)
+        for v in points
+    ]
+    return rows, cursor
+
+
+def _chroma_pager(
+    store: VectorStoreBase,
+    filters: dict[str, Any] | None,
+    page_size: int,
+    cursor: object,
+    with_vectors: bool,
+) -> tuple[list[Row], object]:
+    offset = int(cursor or 0)
+    r = store.collection.get(
+        where=store._generate_where_clause(filters) if filters else None,
+        limit=page_size,
+        offset=offset,
+        include=["metadatas", "embeddings"] if with_vectors else ["metadatas"],
+    )
+    vectors = r.get("embeddings")
+    if vectors is None:
+        vectors = [None] * len(r["ids"])
+    rows = [
+        _row(i, payload, vector)
+        for i, payload, vector in zip(
+            r["ids"], r["metadatas"], vectors, strict=True
+        )
+    ]
+    return rows, offset + page_size if len(rows) == page_size else None
+
+
+def _pgvector_pager(
+    store: VectorStoreBase,
+    filters: dict[str, Any] | None,
+    page_size: int,
+    cursor: object,
+    with_vectors: bool,
+) -> tuple[list[Row], object]:
+    # Keyset pagination on the primary key, constant cost per page. The
+    # key is a UUID, so the first page has no lower bound at all.
+    conditions, params = ["TRUE"], []
+    if cursor is not None:
+        conditions.append("id > %s")
+        params.append(cursor)
+    for k, v in (filters or {}).items():
+        conditions.append("payload->>%s = %s")
+        params.extend([k, str(v)])
+
+    vector = "vector" if with_vectors else "NULL"
+    # Values are bound, only the trusted collection name is interpolated.
+    query = (
+        f"SELECT id, {vector}, payload FROM {store.collection_name} "  # noqa: S608
+        f"WHERE {' AND '.join(conditions)} ORDER BY id LIMIT %s"
+    )
+    with store._get_cursor() as cur:
+        cur.execute(query, (*params, page_size))
+        results = cur.fetchall()
+
+    rows = [_row(i, payload, vector) for i, vector, payload in results]
+    return rows, rows[-1]["id"] if len(rows) == page_size else None
+
+
+register_pager("Qdrant", _qdrant_pager)
+register_pager("ChromaDB", _chroma_pager)
+register_pager("PGVector", _pgvector_pager)
+
+
+def _row(id_: object, payload: dict[str, Any], vector: object) -> Row:
+    row: Row = {"id": str(id_), "payload": payload}
+    if isinstance(vector, str):
+        # pgvector's text form, e.g. "[0.1,0.2]".
+        vector = json.loads(vector)
+    elif hasattr(vector, "tolist"):
+        vector = vector.tolist()
+    if vector is not None:
+        row["vector"] = vector
+    return row
+
+
+def _rows(source: str | Path | TextIO | Iterable[Row]) -> Iterator[Row]:
+    if not isinstance(source, str | Path) and not hasattr(source, "read"):
+        yield from source
+        return
+
+    with _open(source, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _open(
+    target: str | Path | TextIO, mode: str
+) -> TextIO | nullcontext[TextIO]:
+    if isinstance(target, str | Path):
+        return Path(target).open(mode, encoding="utf-8")
+    # Leave caller-owned streams open.
+    return nullcontext(target)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run the ``langmem0-snapshot`` command.
+
+    Args:
+        argv: Command line arguments, defaulting to ``sys.argv[1:]``.
+    """
+    parser = argparse.ArgumentParser(
+        prog="langmem0-snapshot",
+        description="Export or import mem0 memories as NDJSON.",
+    )
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("file", help="NDJSON snapshot, - for stdio")
+    parser.add_argument(
+        "--config", type=Path, required=True, help="mem0 config as JSON"
+    )
+    parser.add_argument("--user-id", help="export memories of this user")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--no-vectors", action="store_true")
+    parser.add_argument("--reembed", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s"
+    )
+    m0 = Memory.from_config(
+        json.loads(args.config.read_text(encoding="utf-8"))
+    )
+    if args.action == "export":
+        n = export_ndjson(
+            m0,
+            sys.stdout if args.file == "-" else args.file,
+            filters={"user_id": args.user_id} if args.user_id else None,
+            page_size=args.page_size,
+            with_vectors=not args.no_vectors,
+        )
+    else:
+        n = import_ndjson(
+            m0,
+            sys.stdin if args.file == "-" else args.file,
+            batch_size=args.page_size,
+            reembed=args.reembed,
+        )
+    logger.info(f"{args.action}ed {n} memories")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Compact in-process storage of embedding vectors.
+
+This module provides the CompactVectors class, a contiguous NumPy matrix of
+L2-normalized vectors with optional float16 or int8 scalar quantization. It
+backs the in-process memory and embedding caches of langmem0.
+"""
+
+from collections.abc import Sequence
+from typing import Literal, Self
+
+import numpy as np
+
+
+VectorDType = Literal["float32", "float16", "int8"]
+
+# Rows upcast to float32 at once when scanning quantized codes.
+_BLOCK_ROWS = 4096
+
+
+class CompactVectors:
+    """Immutable matrix of L2-normalized vectors stored as compact codes.
+
+    With ``float16`` or ``int8`` storage, search runs a coarse pass over the
+    codes and re-ranks the best ``k * oversample`` candidates against the
+    full-precision query. The re-rank undoes the quantization of the query
+    only, rows are compared dequantized, so scores stay approximate.
+    """
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        scales: np.ndarray | None = None,
+        dtype: VectorDType = "float32",
+    ) -> None:
+        """Wrap already quantized codes.
+
+        Args:
+            codes: A 2-D array of codes, one row per vector.
+            scales: Per-row scales of ``int8`` codes, None otherwise.
+            dtype: The storage type of ``codes``.
+
+        Raises:
+            ValueError: If the scales don't match the storage type.
+        """
+        if (dtype == "int8") != (scales is not None):
+            raise ValueError("scales are required by and only by int8")
+
+        self.codes = codes
+        self.scales = scales
+        self.dtype = dtype
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Sequence[Sequence[float]] | np.ndarray,
+        dtype: VectorDType = "float32",
+    ) -> Self:
+        """Normalize and quantize vectors.
+
+        Args:
+            rows: The vectors to store.
+            dtype: The storage type, one of float32, float16 and int8.
+
+        Returns:
+            CompactVectors: The compact matrix of the vectors.
+        """
+        if len(rows) == 0:
+            return cls.empty(dtype)
+
+        x = normalize(np.asarray(rows, dtype=np.float32))
+        match dtype:
+            case "float32":
+                return cls(np.ascontiguousarray(x), dtype=dtype)
+            case "float16":
+                return cls(x.astype(np.float16), dtype=dtype)
+            case "int8":
+                codes, scales = _quantize_int8(x)
+                return cls(codes, scales, dtype)
+
+        raise ValueError(f"unsupported vector dtype: {dtype}")
+
+    @classmethod
+    def empty(cls, dtype: VectorDType = "float32") -> Self:
+        """Return a matrix without any vector.
+
+        Args:
+            dtype: The storage type.
+
+        Returns:
+            CompactVectors: The empty matrix.
+        """
+        scales = np.empty(0, dtype=np.float32) if dtype == "int8" else None
+        return cls(np.empty((0, 0), dtype=dtype), scales, dtype)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the codes and scales."""
+        scales = self.scales.nbytes if self.scales is not None else 0
+        return self.codes.nbytes + scales
+
+    def __len__(self) -> int:
+        """Return the number of vectors."""
+        return self.codes.shape[0]
+
+    def dequantize(self, indices: np.ndarray | None = None) -> np.ndarray:
+        """Return rows as float32.
+
+        Args:
+            indices: Rows to return, or None for all of them.
+
+        Returns:
+            np.ndarray: The float32 rows.
+        """
+        codes = self.codes if indices is None else self.codes[indices]
+        x = codes.astype(np.float32)
+        if self.scales is not None:
+            scales = self.scales if indices is None else self.scales[indices]
+            x *= scales[:, None]
+        return x
+
+    def extend(self, rows: Sequence[Sequence[float]]) -> Self:
+        """Return a copy with the given vectors appended.
+
+        Args:
+            rows: The vectors to append.
+
+        Returns:
+            CompactVectors: The extended matrix.
+        """
+        other = type(self).from_rows(rows, self.dtype)
+        if not len(other):
+            return self
+        if not len(self):
+            return other
+
+        scales = (
+            np.concatenate([self.scales, other.scales])
+            if self.scales is not None
+            else None
+        )
+        return type(self)(
+            np.concatenate([self.codes, other.codes]), scales, self.dtype
+        )
+
+    def replace(self, rows: dict[int, Sequence[float]]) -> Self:
+        """Return a copy with some vectors replaced.
+
+        Args:
+            rows: The new vectors keyed by row index.
+
+        Returns:
+            CompactVectors: The updated matrix.
+        """
+        if not rows:
+            return self
+
+        indices = list(rows)
+        other = type(self).from_rows([rows[i] for i in indices], self.dtype)
+        codes = self.codes.copy()
+        codes[indices] = other.codes
+        scales = None
+        if self.scales is not None:
+            scales = self.scales.copy()
+            scales[indices] = other.scales
+        return type(self)(codes, scales, self.dtype)
+
+    def take(self, indices: Sequence[int]) -> Self:
+        """Return a copy holding only the given rows.
+
+        Args:
+            indices: The rows to keep.
+
+        Returns:
+            CompactVectors: The selected rows.
+        """
+        if len(indices) == len(self):
+            return self
+        if not len(indices):
+            return type(self).empty(self.dtype)
+
+        scales = self.scales[indices] if self.scales is not None else None
+        return type(self)(self.codes[indices], scales, self.dtype)
+
+    def search(
+        self,
+        query: Sequence[float] | np.ndarray,
+        k: int,
+        mask: np.ndarray | None = None,
+        oversample: int = 4,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the rows most similar to the query by cosine similarity.
+
+        Args:
+            query: The query vector.
+            k: The maximum number of rows to return.
+            mask: Boolean mask of the rows eligible for the result.
+            oversample: Candidates re-ranked per returned row when the
+                codes are quantized.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Indices of the best rows and their
+            float32 scores, both in descending order of score.
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+        q = normalize(np.asarray(query, dtype=np.float32))
+        if self.dtype == "float32":
+            return _top_k(self.codes @ q, k, mask)
+
+        coarse = self._coarse_scores(q)
+        candidates, _ = _top_k(coarse, min(k * oversample, len(self)), mask)
+        # The mask may leave fewer candidates than rows to return.
+        refined = self.dequantize(candidates) @ q
+        top, scores = _top_k(refined, min(k, len(candidates)))
+        return candidates[top], scores
+
+    def _coarse_scores(self, q: np.ndarray) -> np.ndarray:
+        if self.dtype == "int8":
+            q_codes, _ = _quantize_int8(q[None, :])
+            q_coarse = q_codes[0].astype(np.float32)
+        else:
+            q_coarse = q.astype(np.float16).astype(np.float32)
+
+        # Integer dot products of int8 codes stay exact in float32, and
+        # upcasting block by block keeps the scan on the BLAS path without
+        # materializing the whole matrix as float32.
+        scores = np.empty(len(self), dtype=np.float32)
+        for i in range(0, len(self), _BLOCK_ROWS):
+            block = self.codes[i : i + _BLOCK_ROWS].astype(np.float32)
+            scores[i : i + _BLOCK_ROWS] = block @ q_coarse
+
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+
+def normalize(x: np.ndarray) -> np.ndarray:
+    """L2-normalize a vector or the rows of a matrix.
+
+    Args:
+        x: The vector or matrix.
+
+    Returns:
+        np.ndarray: The normalized float32 copy, zero vectors left as is.
+    """
+    x = np.asarray(x, dtype=np.float32)
+    norm = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.where(norm == 0, 1, norm)
+
+
+def _quantize_int8(x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    scales = np.abs(x).max(axis=1) / 127
+    scales[scales == 0] = 1
+    codes = np.rint(x / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _top_k(
+    scores: np.ndarray, k: int, mask: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    top = top[np.isfinite(scores[top])]
+    return top, scores[top].astype(np.float32)
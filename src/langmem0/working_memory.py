@@ -0,0 +1,222 @@
+"""Run-scoped working memory.
+
+This module provides the WorkingMemory class which buffers the messages of
+a run in RAM instead of extracting memories from every model call. The
+buffer answers recall within the run, and the run is promoted to long-term
+memory with a single extraction once it ends, after an optional
+summarization.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Collection
+from typing import Any
+
+from langmem0.gates import STOPWORDS
+from langmem0.query import message_text
+
+
+Message = dict[str, Any]
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class WorkingRun:
+    """Buffered messages of a run."""
+
+    def __init__(
+        self, run_id: str, user_id: str, metadata: dict[str, Any]
+    ) -> None:
+        """Initialize an empty run.
+
+        Args:
+            run_id: The run identifier.
+            user_id: The user of the run.
+            metadata: The metadata of the run, stored with its memories.
+        """
+        self.run_id = run_id
+        self.user_id = user_id
+        self.metadata = metadata
+        self.messages: list[Message] = []
+        self.touched = time.monotonic()
+        self._seen: set[tuple[str, str]] = set()
+
+
+class WorkingMemory:
+    """In-process buffer of the messages of active runs.
+
+    ``record`` appends the messages of a model call to its run, skipping
+    those already buffered, since calls of a run usually resend the whole
+    conversation. ``search`` answers recall from the buffer by keyword
+    overlap, without any embedding or vector store round trip. ``pop``
+    removes a run once it ends, ``expired`` removes the runs idle for
+    ``idle_seconds`` or beyond ``max_runs`` and ``drain`` every run on
+    shutdown, so that callers promote them to long-term memory. They run
+    ``summarize``, async callers should call them in a thread.
+    """
+
+    def __init__(
+        self,
+        max_runs: int = 1024,
+        max_messages_per_run: int = 200,
+        idle_seconds: float = 600.0,
+        summarize: Callable[[list[Message]], list[Message]] | None = None,
+    ) -> None:
+        """Initialize the working memory.
+
+        Args:
+            max_runs: Runs buffered at once, the least recently active one
+                being expired first.
+            max_messages_per_run: Messages kept per run, the oldest being
+                dropped first.
+            idle_seconds: Seconds of inactivity after which a run expires.
+            summarize: Optional function condensing the messages of a run
+                before promotion, e.g. into a single summary message.
+        """
+        self.max_runs = max_runs
+        self.max_messages_per_run = max_messages_per_run
+        self.idle_seconds = idle_seconds
+        self.summarize = summarize
+
+        self._runs: OrderedDict[str, WorkingRun] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, run_id: str) -> bool:
+        """Return whether a run is buffered."""
+        return run_id in self._runs
+
+    def __len__(self) -> int:
+        """Return the number of buffered runs."""
+        return len(self._runs)
+
+    def record(
+        self,
+        run_id: str,
+        user_id: str,
+        messages: list[Message],
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        """Buffer the messages of a model call.
+
+        System messages are skipped, they hold instructions rather than
+        anything to remember.
+
+        Args:
+            run_id: The run identifier.
+            user_id: The user of the run.
+            messages: OpenAI-style messages.
+            metadata: The metadata of the run, stored with its memories.
+        """
+        with self._lock:
+            if (run := self._runs.get(run_id)) is None:
+                run = self._runs[run_id] = WorkingRun(
+                    run_id, user_id, metadata or {}
+                )
+            self._runs.move_to_end(run_id)
+            run.touched = time.monotonic()
+
+            for v in messages:
+                key = (v.get("role", ""), message_text(v))
+                if key[0] == "system" or not key[1] or key in run._seen:
+                    continue
+                run._seen.add(key)
+                run.messages.append(v)
+            del run.messages[: -self.max_messages_per_run]
+
+    def search(
+        self,
+        run_id: str,
+        query: str,
+        limit: int = 5,
+        exclude: Collection[str] = (),
+    ) -> list[dict[str, Any]]:
+        """Search the messages of a run by keyword overlap.
+
+        Args:
+            run_id: The run identifier.
+            query: The recall query.
+            limit: The maximum number of messages returned.
+            exclude: Texts not to return, e.g. those of the messages already
+                in the prompt.
+
+        Returns:
+            list[dict[str, Any]]: Matching messages formatted like mem0's
+            search results, best first.
+        """
+        terms = _terms(query)
+        with self._lock:
+            run = self._runs.get(run_id)
+            messages = list(run.messages) if run is not None else []
+        if not terms or not messages:
+            return []
+
+        results = []
+        for i, v in enumerate(messages):
+            text = message_text(v)
+            if text in exclude:
+                continue
+            if score := len(terms & _terms(text)) / len(terms):
+                results.append(
+                    {
+                        "id": f"{run_id}#{i}",
+                        "memory": f"{v['role']}: {text}",
+                        "score": score,
+                    }
+                )
+
+        results.sort(key=lambda v: -v["score"])
+        return results[:limit]
+
+    def pop(self, run_id: str) -> WorkingRun | None:
+        """Remove a run, summarizing its messages.
+
+        Args:
+            run_id: The run identifier.
+
+        Returns:
+            WorkingRun | None: The run, or None if it isn't buffered.
+        """
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        return self._summarized(run) if run is not None else None
+
+    def expired(self) -> list[WorkingRun]:
+        """Remove the runs idle for too long or in excess, summarized.
+
+        Returns:
+            list[WorkingRun]: The removed runs, least recently active first.
+        """
+        now = time.monotonic()
+        runs = []
+        with self._lock:
+            while self._runs:
+                run = next(iter(self._runs.values()))
+                if (
+                    len(self._runs) <= self.max_runs
+                    and now - run.touched < self.idle_seconds
+                ):
+                    break
+                runs.append(self._runs.popitem(last=False)[1])
+        return [self._summarized(v) for v in runs]
+
+    def drain(self) -> list[WorkingRun]:
+        """Remove every run, summarized.
+
+        Returns:
+            list[WorkingRun]: The removed runs, least recently active first.
+        """
+        with self._lock:
+            runs = list(self._runs.values())
+            self._runs.clear()
+        return [self._summarized(v) for v in runs]
+
+    def _summarized(self, run: WorkingRun) -> WorkingRun:
+        if self.summarize is not None and run.messages:
+            run.messages = self.summarize(run.messages)
+        return run
+
+
+def _terms(text: str) -> set[str]:
+    return {v for v in _WORD.findall(text.lower()) if v not in STOPWORDS}
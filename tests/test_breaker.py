@@ -0,0 +1,61 @@
+import time
+
+from langmem0.breaker import CircuitBreaker
+
+
+def _fail(breaker, n):
+    for _ in range(n):
+        with breaker.acquire():
+            raise RuntimeError("down")
+
+
+def _half_open(**kwargs):
+    breaker = CircuitBreaker(
+        "test", window=2, min_calls=2, open_seconds=0.01, **kwargs
+    )
+    _fail(breaker, 2)
+    assert breaker.state == "open"
+    time.sleep(0.02)
+    return breaker
+
+
+def test_half_open_closes_once_every_probe_succeeds():
+    breaker = _half_open(half_open_probes=2)
+    first, second = breaker.acquire(), breaker.acquire()
+    assert first.probe and second.probe
+    assert breaker.acquire() is None
+
+    with first:
+        pass
+    assert breaker.state == "half_open"
+    # A finished probe does not let another one through.
+    assert breaker.acquire() is None
+
+    with second:
+        pass
+    assert breaker.state == "closed"
+
+
+def test_half_open_opens_on_any_failed_probe():
+    breaker = _half_open(half_open_probes=2)
+    first, second = breaker.acquire(), breaker.acquire()
+    with first:
+        pass
+    with second:
+        raise RuntimeError("down")
+    assert breaker.state == "open"
+
+
+def test_calls_from_before_opening_do_not_decide_half_open():
+    breaker = CircuitBreaker("test", window=2, min_calls=2, open_seconds=0.01)
+    late = breaker.acquire()
+    late.__enter__()
+    _fail(breaker, 2)
+    time.sleep(0.02)
+    probe = breaker.acquire()
+
+    late.__exit__(None, None, None)
+    assert breaker.state == "half_open"
+    with probe:
+        pass
+    assert breaker.state == "closed"
@@ -0,0 +1,273 @@
+import asyncio
+import contextlib
+import gc
+import threading
+import time
+import weakref
+
+import langchain_openai
+import pytest
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import langmem0.chat_model
+from langmem0.breaker import CircuitBreaker
+from langmem0.chat_model import ChatOpenAI, Mem0Ctx
+from langmem0.scheduler import TenantScheduler
+from langmem0.working_memory import WorkingMemory
+
+
+class FakeMemory:
+    enable_graph = False
+    vector_store = None
+
+    def __init__(self, config=None):
+        self.added = []
+
+    @classmethod
+    def from_config(cls, config):
+        return cls()
+
+    @staticmethod
+    def _process_config(config):
+        return {}
+
+    def add(self, messages, **kwargs):
+        self.added.append(messages)
+        return {"results": []}
+
+    def search(self, query, **kwargs):
+        return {"results": []}
+
+
+class FakeAsyncMemory(FakeMemory):
+    async def add(self, messages, **kwargs):
+        return super().add(messages, **kwargs)
+
+    async def search(self, query, **kwargs):
+        # A hanging backend.
+        await asyncio.sleep(3600)
+
+
+@pytest.fixture
+def replies(monkeypatch):
+    replies = []
+
+    def generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=replies.pop(0))])
+
+    monkeypatch.setattr(langchain_openai.ChatOpenAI, "_generate", generate)
+    monkeypatch.setattr(langmem0.chat_model, "Memory", FakeMemory)
+    monkeypatch.setattr(langmem0.chat_model, "AsyncMemory", FakeAsyncMemory)
+    monkeypatch.setattr(langmem0.chat_model, "MemoryConfig", dict)
+    return replies
+
+
+@pytest.mark.parametrize("preamble", ["", "Let me check."])
+def test_after_mode_memorizes_answer_to_tool_results(
+    replies, monkeypatch, preamble
+):
+    memorized = []
+    monkeypatch.setattr(
+        ChatOpenAI,
+        "_memorize_nonblocking",
+        lambda self, ctx, messages: memorized.append(messages),
+    )
+    chat = ChatOpenAI(api_key="x", mem0={}, user_id="u", memorize_mode="after")
+    call = {"name": "weather", "args": {}, "id": "1"}
+    replies.extend(
+        [
+            AIMessage(preamble, tool_calls=[call]),
+            AIMessage("Sunny, wear a hat"),
+        ]
+    )
+    messages = [HumanMessage("I live in Lyon, what's the weather?")]
+
+    messages.append(chat.invoke(messages))
+    assert memorized == []
+
+    messages.append(ToolMessage("sunny", tool_call_id="1"))
+    chat.invoke(messages)
+
+    assert len(memorized) == 1
+    user_turn, reply = memorized[0]
+    assert user_turn == {
+        "role": "user",
+        "content": "I live in Lyon, what's the weather?",
+    }
+    assert reply["content"] == "Sunny, wear a hat"
+
+
+def test_breaker_reports_in_model_metrics(replies):
+    breaker = CircuitBreaker("recall")
+    chat = ChatOpenAI(
+        api_key="x", mem0={}, user_id="u", recall_breaker=breaker
+    )
+    assert breaker.metrics is chat.metrics
+
+    chat._guarded_recall(
+        Mem0Ctx("u", None), [{"role": "user", "content": "hi"}]
+    )
+    assert chat.metrics.get("breaker.recall.limit") == breaker.limit
+
+
+@pytest.mark.parametrize("waiting", [True, False])
+def test_cancelled_recall_releases_breaker(replies, waiting):
+    scheduler = TenantScheduler(max_concurrency=1)
+    breaker = CircuitBreaker("recall")
+    chat = ChatOpenAI(
+        api_key="x",
+        mem0={},
+        user_id="u",
+        scheduler=scheduler,
+        recall_breaker=breaker,
+    )
+    messages = [{"role": "user", "content": "what do I like?"}]
+
+    async def main():
+        async with contextlib.AsyncExitStack() as stack:
+            if waiting:
+                await stack.enter_async_context(
+                    scheduler.aslot("other", "recall")
+                )
+            task = asyncio.create_task(
+                chat._aguarded_recall(Mem0Ctx("u", None), messages)
+            )
+            await asyncio.sleep(0.01)
+            # A waiter holds no breaker capacity, a running call does.
+            assert breaker._inflight == (0 if waiting else 1)
+
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+        assert breaker._inflight == 0
+        assert breaker.limit == breaker.max_concurrency
+
+    asyncio.run(main())
+
+
+def _run_ctx(run_id):
+    ctx = Mem0Ctx("u", None)
+    ctx.run_id = run_id
+    return ctx
+
+
+def test_flush_promotes_buffered_runs(replies):
+    chat = ChatOpenAI(
+        api_key="x", mem0={}, user_id="u", working_memory=WorkingMemory()
+    )
+    for run_id in ("a", "b"):
+        chat._memorize(
+            _run_ctx(run_id), [{"role": "user", "content": "I like tea"}]
+        )
+
+    assert chat.flush() == 2
+    assert len(chat._m0.added) == 2
+    assert len(chat.working_memory) == 0
+
+
+def test_async_promotion_summarizes_off_the_event_loop(replies):
+    threads = []
+
+    def summarize(messages):
+        threads.append(threading.current_thread())
+        return messages[-1:]
+
+    chat = ChatOpenAI(
+        api_key="x",
+        mem0={},
+        user_id="u",
+        working_memory=WorkingMemory(summarize=summarize),
+    )
+
+    async def main():
+        for run_id in ("a", "b"):
+            await chat._amemorize(
+                _run_ctx(run_id), [{"role": "user", "content": "I like tea"}]
+            )
+        assert await chat.aend_run("a")
+        assert await chat.aflush() == 1
+
+    asyncio.run(main())
+
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+    assert len(chat._am0.added) == 2
+
+
+def test_idle_runs_are_promoted_without_more_calls(replies):
+    chat = ChatOpenAI(
+        api_key="x",
+        mem0={},
+        user_id="u",
+        working_memory=WorkingMemory(idle_seconds=0.01),
+    )
+    chat._memorize(_run_ctx("a"), [{"role": "user", "content": "I like tea"}])
+
+    deadline = time.monotonic() + 5
+    while not chat._m0.added and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert len(chat._m0.added) == 1
+
+
+def test_sweep_lets_the_model_go(replies):
+    chat = ChatOpenAI(
+        api_key="x", mem0={}, user_id="u", working_memory=WorkingMemory()
+    )
+    chat._memorize(_run_ctx("a"), [{"role": "user", "content": "I like tea"}])
+    sweeper = chat._sweeper
+
+    chat.flush()
+    assert sweeper.is_set()
+
+    chat._memorize(_run_ctx("b"), [{"role": "user", "content": "I like tea"}])
+    ref = weakref.ref(chat)
+    del chat
+    gc.collect()
+    assert ref() is None
+
+
+def test_trailing_placement_keeps_the_prefix(replies):
+    chat = ChatOpenAI(
+        api_key="x", mem0={}, user_id="u", memory_placement="trailing"
+    )
+    messages = [
+        SystemMessage("be nice"),
+        HumanMessage("hi"),
+        AIMessage("hello"),
+        HumanMessage("what do I drink?"),
+    ]
+    before = [v.model_copy(deep=True) for v in messages]
+    recalled = {"results": [{"id": "1", "memory": "Likes tea"}]}
+
+    placed = chat._with_memories(messages, recalled)
+
+    assert messages == before
+    assert placed[:-1] == messages[:-1]
+    question, memories = placed[-1].content
+    assert question == {"type": "text", "text": "what do I drink?"}
+    assert memories["type"] == "text"
+    assert "Likes tea" in memories["text"]
+    assert chat._with_memories(messages, {"results": []}) is messages
+
+
+def test_trailing_placement_appends_to_content_blocks(replies):
+    chat = ChatOpenAI(
+        api_key="x", mem0={}, user_id="u", memory_placement="trailing"
+    )
+    image = {"type": "image_url", "image_url": {"url": "data:,"}}
+    messages = [HumanMessage([{"type": "text", "text": "and this?"}, image])]
+
+    placed = chat._with_memories(
+        messages, {"results": [{"id": "1", "memory": "Likes tea"}]}
+    )
+
+    assert placed[-1].content[:2] == messages[-1].content
+    assert len(messages[-1].content) == 2
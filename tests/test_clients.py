@@ -0,0 +1,103 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from langmem0.chat_model import ChatOpenAI
+from langmem0.clients import pooled_http_client
+
+COMPLETION = {
+    "id": "1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4.1-nano",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "{}"},
+            "finish_reason": "stop",
+        }
+    ],
+}
+EMBEDDING = {
+    "object": "list",
+    "model": "text-embedding-3-small",
+    "data": [{"object": "embedding", "index": 0, "embedding": [0.0] * 8}],
+}
+
+
+class OpenAIHandler(BaseHTTPRequestHandler):
+    """Answers chat completions and embeddings, one handler per connection."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.paths.append(self.path)
+        body = json.dumps(
+            EMBEDDING if self.path.endswith("/embeddings") else COMPLETION
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OpenAIHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.paths = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_chat_model_and_mem0_share_connections(server, tmp_path):
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    openai = {"api_key": "x", "openai_base_url": base_url}
+    http_client = pooled_http_client()
+    chat = ChatOpenAI(
+        api_key="x",
+        base_url=base_url,
+        http_client=http_client,
+        user_id="alice",
+        mem0={
+            "vector_store": {
+                "provider": "qdrant",
+                "config": {
+                    "path": str(tmp_path / "qdrant"),
+                    "embedding_model_dims": 8,
+                },
+            },
+            "llm": {"provider": "openai", "config": openai},
+            "embedder": {"provider": "openai", "config": openai},
+            "history_db_path": str(tmp_path / "history.db"),
+        },
+    )
+
+    chat._m0.embedding_model.embed("tea", "search")
+    chat._m0.llm.generate_response([{"role": "user", "content": "hi"}])
+    chat.root_client.chat.completions.create(
+        model="gpt-4.1-nano", messages=[{"role": "user", "content": "hi"}]
+    )
+    http_client.close()
+
+    assert server.paths == [
+        "/v1/embeddings",
+        "/v1/chat/completions",
+        "/v1/chat/completions",
+    ]
+    assert server.connections == 1
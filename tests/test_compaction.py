@@ -0,0 +1,143 @@
+from types import SimpleNamespace
+
+import pytest
+
+import langmem0.compaction
+from langmem0.compaction import Compactor
+from langmem0.hot_tier import HotTier
+
+
+VOCABULARY = ["tea", "coffee", "dog", "paris"]
+
+
+class Embedder:
+    def embed(self, text, memory_action=None):
+        words = text.lower().split()
+        return [float(v in words) for v in VOCABULARY] + [0.1]
+
+
+class Store:
+    def __init__(self):
+        self.rows = []
+
+    def list(self, filters=None, limit=None):
+        return [
+            [
+                v
+                for v in self.rows
+                if all(v.payload.get(k) == x for k, x in filters.items())
+            ]
+        ]
+
+
+class Memory:
+    enable_graph = False
+
+    def __init__(self):
+        self.embedding_model = Embedder()
+        self.vector_store = Store()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls()
+
+    def store(self, memory_id, data, day, user_id="alice"):
+        self.vector_store.rows.append(
+            SimpleNamespace(
+                id=memory_id,
+                payload={
+                    "data": data,
+                    "user_id": user_id,
+                    "created_at": f"2025-01-{day:02d}T00:00:00+00:00",
+                },
+            )
+        )
+
+    def update(self, memory_id, data):
+        for v in self.vector_store.rows:
+            if v.id == memory_id:
+                v.payload["data"] = data
+
+    def delete(self, memory_id):
+        self.vector_store.rows = [
+            v for v in self.vector_store.rows if v.id != memory_id
+        ]
+
+    def memories(self):
+        return sorted(v.payload["data"] for v in self.vector_store.rows)
+
+
+@pytest.fixture
+def compactor(monkeypatch):
+    monkeypatch.setattr(langmem0.compaction, "Memory", Memory)
+    return Compactor({}, threshold=0.95)
+
+
+def test_near_duplicates_keep_the_newest(compactor):
+    m0 = compactor.m0
+    m0.store("1", "likes tea", day=1)
+    m0.store("2", "Likes tea", day=3)
+    m0.store("3", "has a dog", day=2)
+    m0.store("4", "likes tea", day=1, user_id="bob")
+
+    r = compactor.compact_user("alice")
+
+    assert r == {
+        "user_id": "alice",
+        "before": 3,
+        "after": 2,
+        "deleted": 1,
+        "updated": 0,
+    }
+    assert {v.id for v in m0.vector_store.rows} == {"2", "3", "4"}
+
+
+def test_merge_rewrites_the_leader(compactor):
+    compactor.merge = lambda texts: " / ".join(texts)
+    m0 = compactor.m0
+    m0.store("1", "likes tea", day=1)
+    m0.store("2", "likes tea daily", day=2)
+
+    r = compactor.compact_user("alice")
+
+    assert r["updated"] == 1
+    assert m0.memories() == ["likes tea daily / likes tea"]
+
+
+def test_run_takes_users_by_priority_within_budget(compactor):
+    m0 = compactor.m0
+    for user_id in ("alice", "bob"):
+        m0.store(f"{user_id}-1", "likes tea", day=1, user_id=user_id)
+        m0.store(f"{user_id}-2", "likes tea", day=2, user_id=user_id)
+    compactor.enqueue("alice", 1)
+    compactor.enqueue("bob", 3)
+    compactor.enqueue("alice", 3)
+
+    stats = compactor.run(max_users=1)
+
+    assert compactor.pending() == 1
+    assert {v.id for v in m0.vector_store.rows} == {
+        "alice-2",
+        "bob-1",
+        "bob-2",
+    }
+    assert stats["compaction.reduction"] == 0.5
+
+    compactor.run()
+    assert compactor.pending() == 0
+    assert len(m0.vector_store.rows) == 2
+
+
+def test_compacted_users_leave_the_hot_tier(compactor):
+    compactor.hot_tier = tier = HotTier()
+    m0 = compactor.m0
+    m0.store("1", "likes tea", day=1)
+    m0.store("2", "has a dog", day=2)
+    assert tier.load(m0, "alice")
+
+    compactor.compact_user("alice")
+    assert "alice" in tier
+
+    m0.store("3", "likes tea", day=3)
+    compactor.compact_user("alice")
+    assert "alice" not in tier
@@ -0,0 +1,80 @@
+from langmem0.condense import Condenser
+
+
+def _turns(n):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}"}
+        for i in range(n)
+    ]
+
+
+def test_strip_drops_tool_payloads_and_attachments():
+    condenser = Condenser(max_chars_per_message=5)
+    messages = [
+        {"role": "system", "content": "be nice"},
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "look"},
+                {"type": "image_url", "image_url": {"url": "data:,"}},
+            ],
+        },
+        {"role": "assistant", "content": None, "tool_calls": [{"id": "1"}]},
+        {"role": "tool", "content": "{...}", "tool_call_id": "1"},
+        {"role": "assistant", "content": "a long answer"},
+    ]
+
+    assert condenser.strip(messages) == [
+        {"role": "user", "content": "look"},
+        {"role": "assistant", "content": "a lon…"},
+    ]
+
+
+def test_old_turns_are_folded_once():
+    condenser = Condenser(keep_recent=2)
+
+    condensed, summary, summarized = condenser.condense(_turns(4))
+    assert summarized == 2
+    assert summary == "user: m0\nassistant: m1"
+    assert condensed[0]["role"] == "system"
+    assert summary in condensed[0]["content"]
+    assert condensed[1:] == _turns(4)[2:]
+
+    condensed, summary, summarized = condenser.condense(
+        _turns(6), summary, summarized
+    )
+    assert summarized == 4
+    assert summary.splitlines() == [
+        "user: m0",
+        "assistant: m1",
+        "user: m2",
+        "assistant: m3",
+    ]
+    assert condensed[1:] == _turns(6)[4:]
+
+
+def test_summary_is_bounded():
+    condenser = Condenser(keep_recent=0, max_summary_chars=30)
+
+    _, summary, _ = condenser.condense(_turns(10))
+
+    assert len(summary) <= 30
+    assert summary.endswith("assistant: m9")
+    assert summary.startswith(("user:", "assistant:"))
+
+
+def test_custom_summarizer_gets_new_messages_only():
+    calls = []
+
+    def summarize(summary, messages):
+        calls.append([v["content"] for v in messages])
+        return f"{summary}+{len(messages)}"
+
+    condenser = Condenser(keep_recent=1, summarize=summarize)
+    _, summary, n = condenser.condense(_turns(3))
+    _, summary, n = condenser.condense(_turns(4), summary, n)
+    # A trimmed transcript doesn't fold messages again.
+    _, summary, n = condenser.condense(_turns(2), summary, n)
+
+    assert calls == [["m0", "m1"], ["m2"]]
+    assert summary == "+2+1"
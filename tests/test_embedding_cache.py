@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from langmem0.embedding_cache import CachedEmbedder, EmbeddingCache
+
+
+class Embedder:
+    config = SimpleNamespace(model="bag-of-chars")
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed(self, text, memory_action=None):
+        self.calls += 1
+        return [float(len(text)), float(text.count("a")), 1.0]
+
+
+def _segments(cache, model="m"):
+    return sorted(cache._model_dir(model).glob("*.keys.npy"))
+
+
+def test_embeddings_survive_a_restart(tmp_path):
+    embedder = Embedder()
+    with EmbeddingCache(tmp_path) as cache:
+        CachedEmbedder(embedder, cache).embed("banana", "add")
+
+    cache = EmbeddingCache(tmp_path, read_only=True)
+    cached = CachedEmbedder(embedder, cache)
+    assert cached.embed("banana", "add") == [6.0, 3.0, 1.0]
+    assert embedder.calls == 1
+    # Keyed by action too, mem0 may embed differently for search.
+    assert cache.get("bag-of-chars", "banana", "search") is None
+
+
+def test_flushes_write_segments_newest_first(tmp_path):
+    cache = EmbeddingCache(tmp_path, max_segments=None)
+    cache.put("m", "tea", [1.0, 0.0])
+    cache.flush()
+    cache.put("m", "tea", [0.0, 1.0])
+    cache.put("m", "dog", [1.0, 1.0])
+    cache.flush()
+
+    assert len(_segments(cache)) == 2
+    assert cache.get("m", "tea") == [0.0, 1.0]
+    assert cache.get("m", "dog") == [1.0, 1.0]
+
+
+def test_segments_are_compacted_past_the_limit(tmp_path):
+    cache = EmbeddingCache(tmp_path, flush_every=1, max_segments=2)
+    for i in range(3):
+        cache.put("m", f"text {i}", [float(i)])
+
+    assert len(_segments(cache)) == 1
+    for i in range(3):
+        assert cache.get("m", f"text {i}") == [float(i)]
+
+
+def test_segments_of_other_processes_after_refresh(tmp_path):
+    reader = EmbeddingCache(tmp_path)
+    assert reader.get("m", "tea") is None
+
+    writer = EmbeddingCache(tmp_path, dtype="float16")
+    writer.put("m", "tea", [0.1, 0.2])
+    writer.flush()
+
+    assert reader.get("m", "tea") is None
+    reader.refresh()
+    assert np.allclose(reader.get("m", "tea"), [0.1, 0.2], atol=1e-3)
+
+
+def test_read_only_cache_writes_nothing(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache", read_only=True)
+    cache.put("m", "tea", [1.0])
+    cache.close()
+
+    assert not (tmp_path / "cache").exists()
@@ -0,0 +1,47 @@
+import pytest
+
+from langmem0.gates import FactGate, HeuristicGate
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "I love green tea, what should I drink?",
+        "My wife is allergic to nuts. Any dessert ideas?",
+        "Please remember that I'm vegan",
+        "Can you remember my birthday is in May?",
+        "I usually work from home on Fridays",
+        "We just got back from a long trip across Japan",
+    ],
+)
+def test_fact_gate_passes_stated_facts(text):
+    assert FactGate()(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "What do I like to drink?",
+        "What's my name?",
+        "Is it going to rain tomorrow?",
+        "Thanks!",
+        "ok",
+        "The weather is nice today in the city",
+        "I see, what would you suggest for a long weekend trip?",
+    ],
+)
+def test_fact_gate_rejects_other_turns(text):
+    assert not FactGate()(text)
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("thanks so much", False),
+        ("where is my order?", True),
+        ("what did I say about my diet last week", True),
+        ("ok", False),
+    ],
+)
+def test_heuristic_gate(text, expected):
+    assert HeuristicGate()(text) is expected
@@ -0,0 +1,70 @@
+from langmem0.context import assemble
+from langmem0.graph import GraphBackend, InMemoryGraph, TimedGraph
+from langmem0.metrics import Metrics
+
+
+def _graph():
+    graph = InMemoryGraph()
+    graph.add("Alice", "lives_in", "Lyon", {"user_id": "alice"})
+    graph.add("Alice", "owns", "dog Rex", {"user_id": "alice"})
+    graph.add("Bob", "lives_in", "Paris", {"user_id": "bob"})
+    return graph
+
+
+def test_in_memory_graph_scopes_and_ranks_relations():
+    graph = _graph()
+
+    relations = graph.search(
+        "does alice's dog Rex like Lyon?", {"user_id": "alice"}
+    )
+
+    assert isinstance(graph, GraphBackend)
+    assert [v["destination"] for v in relations] == ["dog Rex", "Lyon"]
+    assert graph.search("where does Bob live?", {"user_id": "alice"}) == []
+    assert len(graph.search("alice", {"user_id": "alice"}, limit=1)) == 1
+
+
+def test_timed_graph_records_latency():
+    metrics = Metrics()
+    graph = TimedGraph(_graph(), metrics)
+
+    graph.search("Paris", {"user_id": "bob"})
+
+    assert metrics.get("recall.graph.count") == 1
+    graph.add("Bob", "likes", "jazz", {"user_id": "bob"})
+    assert graph.search("jazz", {"user_id": "bob"})
+
+
+def test_relations_fill_the_budget_left_by_memories():
+    recalled = {
+        "results": [{"id": "1", "memory": "Likes tea with lemon"}],
+        "relations": _graph().search(
+            "alice dog rex lyon", {"user_id": "alice"}
+        ),
+    }
+
+    memories, relations = assemble(recalled)
+    assert memories == ["Likes tea with lemon"]
+    assert len(relations) == 2
+
+    # 6 tokens for the memory, 7 for the first relation.
+    memories, relations = assemble(recalled, max_tokens=15)
+    assert memories == ["Likes tea with lemon"]
+    assert relations == ["Alice -- owns -- dog Rex"]
+
+    memories, relations = assemble(recalled, max_tokens=5)
+    assert (memories, relations) == ([], [])
+
+
+def test_stable_layout_sorts_relations():
+    recalled = {
+        "results": [],
+        "relations": [
+            {"source": "b", "relationship": "r", "destination": "c"},
+            {"source": "a", "relationship": "r", "destination": "c"},
+        ],
+    }
+
+    _, relations = assemble(recalled, stable=True)
+
+    assert relations == ["a -- r -- c", "b -- r -- c"]
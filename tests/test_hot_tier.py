@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+import numpy as np
+
+from langmem0.hot_tier import HotTier
+
+
+VOCABULARY = ["tea", "coffee", "paris", "dog", "cat", "vegan", "run", "jazz"]
+
+
+class Embedder:
+    """Bag of words embedder counting its calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed(self, text, memory_action=None):
+        self.calls += 1
+        words = text.lower().split()
+        return [float(v in words) + 0.01 for v in VOCABULARY]
+
+
+class Store:
+    """Vector store without a pager, listed at once."""
+
+    def __init__(self):
+        self.rows = []
+
+    def list(self, filters=None, limit=None):
+        return [
+            [
+                v
+                for v in self.rows
+                if all(v.payload.get(k) == x for k, x in filters.items())
+            ]
+        ]
+
+
+class Memory:
+    enable_graph = False
+
+    def __init__(self):
+        self.embedding_model = Embedder()
+        self.vector_store = Store()
+
+    def store(self, memory_id, data, user_id="alice", **payload):
+        self.vector_store.rows.append(
+            SimpleNamespace(
+                id=memory_id,
+                payload={
+                    "data": data,
+                    "user_id": user_id,
+                    "created_at": "2025-01-01T00:00:00+00:00",
+                }
+                | payload,
+            )
+        )
+
+
+def _added(*events):
+    return {"results": list(events)}
+
+
+def test_observed_memories_are_stamped():
+    m0 = Memory()
+    m0.store("1", "likes tea")
+    tier = HotTier()
+    assert tier.load(m0, "alice")
+
+    tier.observe(
+        m0,
+        _added(
+            {"id": "2", "memory": "has a dog", "event": "ADD"},
+            {"id": "1", "memory": "likes coffee", "event": "UPDATE"},
+        ),
+        user_id="alice",
+    )
+
+    r = tier.search(m0, "dog coffee", user_id="alice", limit=2)
+    items = {v["id"]: v for v in r["results"]}
+    assert items["2"]["created_at"] is not None
+    assert items["2"]["hash"] == hashlib.md5(b"has a dog").hexdigest()
+    assert items["1"]["created_at"] == "2025-01-01T00:00:00+00:00"
+    assert items["1"]["updated_at"] is not None
+    assert items["1"]["memory"] == "likes coffee"
+
+
+def test_observe_skips_embedding_uncached_users():
+    m0 = Memory()
+    tier = HotTier()
+
+    tier.observe(
+        m0,
+        _added({"id": "1", "memory": "likes tea", "event": "ADD"}),
+        user_id="alice",
+    )
+
+    assert m0.embedding_model.calls == 0
+    assert "alice" not in tier
+
+
+def test_async_observe_skips_embedding_uncached_users():
+    m0 = Memory()
+    tier = HotTier()
+
+    asyncio.run(
+        tier.aobserve(
+            m0,
+            _added({"id": "1", "memory": "likes tea", "event": "ADD"}),
+            user_id="alice",
+        )
+    )
+
+    assert m0.embedding_model.calls == 0
+
+
+def test_cached_search_ranks_by_similarity():
+    m0 = Memory()
+    m0.store("1", "likes tea")
+    m0.store("2", "has a dog")
+    m0.store("3", "lives in paris", user_id="bob")
+    tier = HotTier()
+
+    assert tier.load(m0, "alice")
+    r = tier.search(m0, "tea", user_id="alice", limit=5)
+
+    assert [v["id"] for v in r["results"]] == ["1", "2"]
+    assert np.isclose(r["results"][0]["score"], 1, atol=0.05)
+
+
+def test_load_in_flight_is_not_ended_by_another():
+    m0 = Memory()
+    m0.store("1", "likes tea")
+    tier = HotTier()
+    # A background load of a search miss is in flight.
+    assert tier._begin_load("alice")
+
+    assert not tier.prefetch(m0, "alice")
+    tier.observe(
+        m0,
+        _added({"id": "2", "memory": "has a dog", "event": "ADD"}),
+        user_id="alice",
+    )
+
+    # The write during the load makes its snapshot stale.
+    assert not tier._load(m0, "alice")
+    assert "alice" not in tier
+    assert tier.prefetch(m0, "alice")
+
+
+def test_writes_keep_cached_users_coherent():
+    m0 = Memory()
+    m0.store("1", "likes tea")
+    m0.store("2", "has a dog")
+    tier = HotTier()
+    assert tier.load(m0, "alice")
+
+    tier.observe(
+        m0,
+        _added(
+            {"id": "1", "memory": "likes coffee", "event": "UPDATE"},
+            {"id": "2", "memory": "has a dog", "event": "DELETE"},
+            {"id": "3", "memory": "likes jazz", "event": "ADD"},
+        ),
+        user_id="alice",
+    )
+
+    r = tier.search(m0, "coffee jazz dog", user_id="alice", limit=5)
+    assert sorted(v["memory"] for v in r["results"]) == [
+        "likes coffee",
+        "likes jazz",
+    ]
+    top = tier.search(m0, "coffee", user_id="alice", limit=1)
+    assert top["results"][0]["id"] == "1"
+
+    # An update of a memory the tier doesn't know forces a reload.
+    tier.observe(
+        m0,
+        _added({"id": "9", "memory": "runs", "event": "UPDATE"}),
+        user_id="alice",
+    )
+    assert "alice" not in tier
+    assert tier.nbytes == 0
+
+
+def test_lru_eviction_by_bytes():
+    m0 = Memory()
+    for user_id in ("alice", "bob", "carol"):
+        m0.store(f"{user_id}-1", "likes tea", user_id=user_id)
+    tier = HotTier()
+    assert tier.load(m0, "alice")
+    one = tier.nbytes
+    tier.max_bytes = 2 * one
+
+    assert tier.load(m0, "bob")
+    # A hit makes alice the most recently used.
+    assert tier.search(m0, "tea", user_id="alice") is not None
+    assert tier.load(m0, "carol")
+
+    assert "bob" not in tier
+    assert {"alice", "carol"} <= set(tier._entries)
+    assert tier.nbytes == 2 * one
+
+    # A user larger than the whole tier is never cached.
+    for i in range(50):
+        m0.store(f"dave-{i}", "likes tea and coffee", user_id="dave")
+    assert not tier.load(m0, "dave")
+    assert len(tier) == 2
+
+
+def test_quantized_search_keeps_the_ranking():
+    m0 = Memory()
+    for i, memory in enumerate(
+        ["likes tea", "has a dog", "lives in paris", "plays jazz", "is vegan"]
+    ):
+        m0.store(str(i), memory)
+    exact = HotTier()
+    assert exact.load(m0, "alice")
+    expected = exact.search(m0, "paris dog", user_id="alice", limit=2)
+
+    for dtype in ("float16", "int8"):
+        tier = HotTier(dtype=dtype)
+        assert tier.load(m0, "alice")
+        assert tier.nbytes < exact.nbytes
+
+        r = tier.search(m0, "paris dog", user_id="alice", limit=2)
+        assert [v["id"] for v in r["results"]] == [
+            v["id"] for v in expected["results"]
+        ]
+        assert np.allclose(
+            [v["score"] for v in r["results"]],
+            [v["score"] for v in expected["results"]],
+            atol=0.05,
+        )
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+import langmem0.ingest
+from langmem0.ingest import Ingestor
+
+
+class FakeAsyncMemory:
+    def __init__(self, config=None):
+        self.embedding_model = None
+        self.added = []
+
+    @staticmethod
+    def _process_config(config):
+        return {}
+
+    async def add(self, messages, **kwargs):
+        self.added.append(kwargs["user_id"])
+        event = "NONE" if kwargs["user_id"] == "known" else "ADD"
+        return {"results": [{"event": event}]}
+
+
+class Bus:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, user_id):
+        self.published.append(user_id)
+
+
+@pytest.fixture
+def ingestor(monkeypatch):
+    monkeypatch.setattr(langmem0.ingest, "AsyncMemory", FakeAsyncMemory)
+    monkeypatch.setattr(langmem0.ingest, "MemoryConfig", dict)
+    return Ingestor({}, concurrency=1, embed_batch_size=1)
+
+
+def _conversation(user_id):
+    return {
+        "user_id": user_id,
+        "messages": [{"role": "user", "content": "I like tea"}],
+    }
+
+
+def test_invalid_records_count_as_failed(ingestor):
+    records = [
+        _conversation("a"),
+        {"messages": []},
+        {"user_id": "b"},
+        [],
+        {"user_id": "b", "messages": ["hi"]},
+        {"user_id": "b", "messages": [{"content": "hi"}]},
+        _conversation("c"),
+    ]
+
+    stats = ingestor.ingest(records)
+
+    assert ingestor.am0.added == ["a", "c"]
+    assert stats["ingest.failed"] == 5
+    assert stats["ingest.chunks"] == 2
+
+
+def test_dead_worker_stops_the_run(ingestor, monkeypatch):
+    async def add(chunk):
+        raise KeyError("user_id")
+
+    monkeypatch.setattr(ingestor, "_add", add)
+    records = [_conversation(str(i)) for i in range(100)]
+
+    with pytest.raises(KeyError):
+        asyncio.run(asyncio.wait_for(ingestor.aingest(records), 5))
+
+
+def test_written_users_are_published(ingestor):
+    ingestor.bus = Bus()
+
+    ingestor.ingest([_conversation("a"), _conversation("known")])
+
+    assert ingestor.bus.published == ["a"]
@@ -0,0 +1,52 @@
+from langchain.agents.middleware.types import ModelRequest
+from langchain.messages import HumanMessage, SystemMessage, ToolMessage
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.tools import tool
+from langchain_openai import ChatOpenAI
+
+from langmem0.middleware import Mem0Middleware
+
+
+@tool
+def recall_memories() -> str:
+    """Recall memories of the user."""
+    return ""
+
+
+def _inject(injection, model, tools=None):
+    middleware = Mem0Middleware.__new__(Mem0Middleware)
+    middleware.injection = injection
+    request = ModelRequest(
+        model=model,
+        messages=[HumanMessage("hi")],
+        system_message=SystemMessage("be nice"),
+        tools=tools or [],
+    )
+    return middleware._inject(request, "likes tea")
+
+
+def test_message_injection_with_openai():
+    r = _inject("message", ChatOpenAI(api_key="x"))
+
+    assert isinstance(r.messages[0], SystemMessage)
+    assert r.system_message.text == "be nice"
+
+
+def test_message_injection_falls_back_to_system():
+    r = _inject("message", FakeListChatModel(responses=[]))
+
+    assert r.messages == [HumanMessage("hi")]
+    assert "likes tea" in r.system_message.text
+
+
+def test_tool_injection_with_declared_tool():
+    r = _inject("tool", ChatOpenAI(api_key="x"), [recall_memories])
+
+    assert isinstance(r.messages[1], ToolMessage)
+
+
+def test_tool_injection_falls_back_to_system():
+    r = _inject("tool", ChatOpenAI(api_key="x"))
+
+    assert r.messages == [HumanMessage("hi")]
+    assert "likes tea" in r.system_message.text
@@ -0,0 +1,38 @@
+from langmem0.query import merge_results, reciprocal_rank_fusion
+from langmem0.ranking import to_similarity
+
+
+class PGVector:
+    """Stands for mem0's pgvector store, which scores by cosine distance."""
+
+
+class Qdrant:
+    """Stands for mem0's Qdrant store, which scores by cosine similarity."""
+
+
+def test_to_similarity_converts_distances():
+    r = {"results": [{"id": "a", "score": 0.1}, {"id": "b", "score": 0.6}]}
+
+    converted = to_similarity(r, PGVector())
+
+    assert [v["score"] for v in converted["results"]] == [0.9, 0.4]
+    assert to_similarity(r, Qdrant()) is r
+
+
+def test_merge_ranks_hot_tier_and_store_results_on_one_scale():
+    hot_tier = {"results": [{"id": "a", "score": 0.5}]}
+    store = {"results": [{"id": "b", "score": 0.1}, {"id": "a", "score": 0.5}]}
+
+    merged = merge_results([hot_tier, to_similarity(store, PGVector())], 10)
+
+    assert [v["id"] for v in merged["results"]] == ["b", "a"]
+    assert merged["results"][0]["score"] == 0.9
+
+
+def test_reciprocal_rank_fusion_ignores_scores():
+    first = {"results": [{"id": "a", "score": 0.1}, {"id": "b"}]}
+    second = {"results": [{"id": "b", "score": 0.9}]}
+
+    fused = reciprocal_rank_fusion([first, second], 10)
+
+    assert [v["id"] for v in fused["results"]] == ["b", "a"]
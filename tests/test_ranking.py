@@ -0,0 +1,47 @@
+from datetime import UTC, datetime
+
+from langmem0.ranking import Reranker, to_similarity
+
+
+NOW = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+class PGVector:
+    """Stands for mem0's pgvector store, which scores by cosine distance."""
+
+
+def test_rerank_keeps_closest_memory_of_distance_store_first():
+    recalled = {
+        "results": [
+            {"id": "close", "score": 0.05, "created_at": "2025-12-01"},
+            {"id": "far", "score": 0.8, "created_at": "2025-12-01"},
+        ]
+    }
+
+    r = Reranker().rerank(to_similarity(recalled, PGVector()), 2, NOW)
+
+    assert [v["id"] for v in r["results"]] == ["close", "far"]
+
+
+def test_rerank_clamps_relevance():
+    recalled = {
+        "results": [
+            {"id": "a", "score": 3.0, "created_at": "2020-01-01"},
+            {"id": "b", "score": 1.0, "created_at": "2025-12-31"},
+        ]
+    }
+
+    r = Reranker().rerank(recalled, 2, NOW)
+
+    assert [v["id"] for v in r["results"]] == ["b", "a"]
+    assert all(0 <= v["rank_score"] <= 1 for v in r["results"])
+
+
+def test_rerank_thresholds():
+    recalled = {
+        "results": [{"id": "a", "score": 0.9}, {"id": "b", "score": 0.3}]
+    }
+
+    r = Reranker(relative_threshold=0.8).rerank(recalled, 5, NOW)
+
+    assert [v["id"] for v in r["results"]] == ["a"]
@@ -0,0 +1,79 @@
+import asyncio
+
+from langmem0.breaker import CircuitBreaker
+from langmem0.context import assemble
+from langmem0.graph import InMemoryGraph
+from langmem0.metrics import Metrics
+from langmem0.query import FanOutQueryBuilder
+from langmem0.recall import Recall, aguarded, guarded
+
+RELATION = {
+    "source": "alice",
+    "relationship": "lives_in",
+    "destination": "lyon",
+}
+
+
+class GraphMemory:
+    """Stands for mem0 with graph memory, finding relations on every search."""
+
+    vector_store = None
+
+    def __init__(self):
+        self.queries = []
+
+    def search(self, query, **kwargs):
+        self.queries.append(query)
+        memory = {"id": "1", "memory": "Lives in Lyon", "score": 0.9}
+        return {"results": [memory], "relations": [dict(RELATION)]}
+
+
+def test_fan_out_counts_relations_once():
+    m0 = GraphMemory()
+    graph = InMemoryGraph()
+    graph.add("Alice", "lives_in", "Lyon", {"user_id": "alice"})
+    graph.add("alice", "lives_in", "lyon", {"user_id": "alice"})
+    graph.add("alice", "lives_in", "lyon", {"user_id": "bob"})
+    recall = Recall(m0, m0, FanOutQueryBuilder(), Metrics(), graph=graph)
+    messages = [
+        {"role": "user", "content": "Alice moved, what's the weather?"}
+    ]
+
+    r = recall.recall(messages, "alice")
+
+    assert len(m0.queries) > 1
+    assert r["relations"] == [
+        RELATION,
+        {"source": "Alice", "relationship": "lives_in", "destination": "Lyon"},
+    ]
+    memories, relations = assemble(r, max_tokens=20)
+    assert memories == ["Lives in Lyon"]
+    assert relations == ["alice -- lives_in -- lyon"]
+
+
+def test_guarded_swallows_failed_calls():
+    metrics = Metrics()
+    breaker = CircuitBreaker("recall", min_calls=1, metrics=metrics)
+
+    with guarded(None, "t", breaker, "recall", metrics) as admitted:
+        assert admitted
+        raise RuntimeError("down")
+    assert breaker.state == "open"
+
+    with guarded(None, "t", breaker, "recall", metrics) as admitted:
+        assert not admitted
+    assert metrics.get("recall.bypassed") == 1
+
+
+def test_aguarded_releases_the_permit():
+    breaker = CircuitBreaker("memorize")
+
+    async def main():
+        async with aguarded(
+            None, "t", breaker, "memorize", Metrics()
+        ) as admitted:
+            assert admitted
+            assert breaker._inflight == 1
+        assert breaker._inflight == 0
+
+    asyncio.run(main())
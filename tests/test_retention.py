@@ -0,0 +1,132 @@
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import langmem0.retention
+from langmem0.retention import RetentionPolicy, RetentionSweeper
+
+
+DAY = 24 * 3600
+NOW = datetime(2025, 6, 1, tzinfo=UTC)
+
+
+def _memory(days, category=None, updated_days=None, **kwargs):
+    created = NOW - timedelta(days=days)
+    return {
+        "memory": "x",
+        "created_at": created.isoformat(),
+        "updated_at": (
+            (NOW - timedelta(days=updated_days)).isoformat()
+            if updated_days is not None
+            else None
+        ),
+        "metadata": {"category": category} if category else None,
+    } | kwargs
+
+
+POLICY = RetentionPolicy(
+    rules=[
+        ({"category": "preference"}, 30 * DAY),
+        ({"category": "fact"}, None),
+    ],
+    default_ttl=365 * DAY,
+)
+
+
+def test_first_matching_rule_sets_the_ttl():
+    assert POLICY.ttl(_memory(1, "preference")) == 30 * DAY
+    assert POLICY.ttl(_memory(1, "fact")) is None
+    assert POLICY.ttl(_memory(1)) == 365 * DAY
+    # Raw payloads keep metadata at the top level.
+    assert POLICY.ttl({"category": "preference"}) == 30 * DAY
+
+
+def test_memories_expire_after_their_last_update():
+    assert POLICY.expired(_memory(31, "preference"), NOW)
+    assert not POLICY.expired(_memory(31, "preference", updated_days=2), NOW)
+    assert not POLICY.expired(_memory(3000, "fact"), NOW)
+    assert not POLICY.expired({"memory": "no timestamps"}, NOW)
+
+
+def test_recall_drops_expired_memories():
+    recalled = {
+        "results": [
+            _memory(400, id="old"),
+            _memory(40, "preference", id="stale"),
+            _memory(10, "preference", id="fresh"),
+        ],
+        "relations": [],
+    }
+
+    kept = POLICY.filter(recalled, NOW)
+
+    assert [v["id"] for v in kept["results"]] == ["fresh"]
+    assert kept["relations"] == []
+
+
+class Store:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def list(self, filters=None, limit=None):
+        return [
+            [
+                v
+                for v in self.rows
+                if all(
+                    v.payload.get(k) == x for k, x in (filters or {}).items()
+                )
+            ]
+        ]
+
+
+class Memory:
+    def __init__(self):
+        self.vector_store = Store([])
+        self.deleted = []
+
+    @classmethod
+    def from_config(cls, config):
+        return cls()
+
+    def delete(self, memory_id):
+        if memory_id == "broken":
+            raise RuntimeError("store down")
+        self.deleted.append(memory_id)
+
+
+@pytest.fixture
+def sweeper(monkeypatch):
+    monkeypatch.setattr(langmem0.retention, "Memory", Memory)
+    sweeper = RetentionSweeper({}, RetentionPolicy(default_ttl=DAY))
+    old = (datetime.now(UTC) - timedelta(days=2)).isoformat()
+    new = datetime.now(UTC).isoformat()
+    sweeper.m0.vector_store.rows = [
+        SimpleNamespace(
+            id=memory_id,
+            payload={"data": "x", "user_id": user_id, "created_at": created},
+        )
+        for memory_id, user_id, created in [
+            ("1", "alice", old),
+            ("2", "alice", new),
+            ("3", "bob", old),
+            ("broken", "bob", old),
+        ]
+    ]
+    return sweeper
+
+
+def test_sweep_deletes_expired_memories(sweeper):
+    deleted = sweeper.sweep()
+
+    assert deleted == 2
+    assert sweeper.m0.deleted == ["1", "3"]
+    assert sweeper.metrics.get("retention.scanned") == 4
+    assert sweeper.metrics.get("retention.expired") == 3
+    assert sweeper.metrics.get("retention.failed") == 1
+
+
+def test_sweep_within_filters_and_budget(sweeper):
+    assert sweeper.sweep({"user_id": "bob"}, max_deletes=1) == 1
+    assert sweeper.m0.deleted == ["3"]
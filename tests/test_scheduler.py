@@ -0,0 +1,62 @@
+import asyncio
+import contextlib
+import time
+
+from langmem0.scheduler import TenantQuota, TenantScheduler
+
+
+def test_idle_tenants_are_evicted():
+    scheduler = TenantScheduler(idle_ttl=0.01)
+    for i in range(100):
+        with scheduler.slot(f"tenant-{i}", "recall"):
+            pass
+        time.sleep(0.001)
+
+    assert len(scheduler._tenants) < 100
+
+
+def test_busy_and_throttled_tenants_are_kept():
+    scheduler = TenantScheduler(
+        idle_ttl=0.01,
+        quotas={"slow": TenantQuota(recall_rate=0.01)},
+    )
+
+    async def main():
+        async with scheduler.aslot("busy", "recall"):
+            with scheduler.slot("slow", "recall"):
+                pass
+            await asyncio.sleep(0.02)
+            with scheduler.slot("other", "recall"):
+                pass
+            assert {"busy", "slow"} <= set(scheduler._tenants)
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_leaves_the_ring():
+    scheduler = TenantScheduler(max_concurrency=1, idle_ttl=0.01)
+
+    async def main():
+        async with scheduler.aslot("b", "recall"):
+            waiter = asyncio.create_task(
+                scheduler.aslot("a", "recall").__aenter__()
+            )
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await waiter
+            assert "a" not in scheduler._ring
+
+            await asyncio.sleep(0.02)
+            # Creating a tenant evicts the idle one.
+            other = asyncio.create_task(_run(scheduler, "c"))
+            await asyncio.sleep(0.01)
+            assert "a" not in scheduler._tenants
+        await asyncio.wait_for(other, 1)
+
+    asyncio.run(main())
+
+
+async def _run(scheduler, tenant):
+    async with scheduler.aslot(tenant, "recall"):
+        pass
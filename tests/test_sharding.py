@@ -0,0 +1,141 @@
+import asyncio
+import functools
+import os
+import signal
+import tempfile
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from langmem0.chat_model import ChatOpenAI, Mem0Ctx
+from langmem0.invalidation import UnixSocketBus
+from langmem0.middleware import Mem0Middleware
+from langmem0.sharding import HashRing, ShardedMemory, _run
+
+
+class PGVector:
+    """Stands for mem0's pgvector store, which scores by cosine distance."""
+
+
+class DistanceMemory:
+    vector_store = PGVector()
+
+    def search(self, query, user_id, **kwargs):
+        return {"results": [{"id": "a", "memory": "Likes tea", "score": 0.1}]}
+
+
+class Pool(ShardedMemory):
+    """A pool answering in process, without workers."""
+
+    def __init__(self):
+        self.added = []
+
+    def search(self, query, **kwargs):
+        kwargs["query"] = query
+        user_id = kwargs.pop("user_id")
+        r = _run(DistanceMemory(), None, None, "search", user_id, kwargs)
+        return _done(r)
+
+    def add(self, messages, **kwargs):
+        self.added.append(kwargs["user_id"])
+        return _done({"results": []})
+
+
+def _done(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    # Inherited by the spawned workers.
+    monkeypatch.setenv("MEM0_TELEMETRY", "False")
+    return {
+        "vector_store": {
+            "provider": "qdrant",
+            "config": {"path": str(tmp_path / "qdrant"), "on_disk": False},
+        },
+        "llm": {"provider": "openai", "config": {"api_key": "x"}},
+        "embedder": {"provider": "openai", "config": {"api_key": "x"}},
+        "history_db_path": str(tmp_path / "history.db"),
+    }
+
+
+def test_hash_ring_moves_few_keys():
+    users = [f"user{i}" for i in range(1000)]
+    four, five = HashRing(4), HashRing(5)
+
+    moved = sum(four.shard(v) != five.shard(v) for v in users)
+
+    assert moved < 350
+
+
+def test_worker_search_scores_similarities():
+    r = _run(DistanceMemory(), None, None, "search", "alice", {"query": "x"})
+
+    assert r["results"][0]["score"] == 0.9
+
+
+def test_integrations_recall_from_the_pool():
+    pool = Pool()
+    messages = [{"role": "user", "content": "what do I drink?"}]
+    chat = ChatOpenAI(api_key="x", user_id="alice", sharded_memory=pool)
+    middleware = Mem0Middleware(None, sharded_memory=pool)
+
+    for r in (
+        chat._guarded_recall(Mem0Ctx("alice", None), messages),
+        asyncio.run(chat._aguarded_recall(Mem0Ctx("alice", None), messages)),
+        middleware._recaller.recall(messages, "alice"),
+    ):
+        assert r["results"][0]["score"] == 0.9
+
+    chat._add(Mem0Ctx("alice", None), messages)
+    assert pool.added == ["alice"]
+
+
+def test_pool_excludes_a_config():
+    with pytest.raises(ValueError, match="exactly one"):
+        Mem0Middleware({}, sharded_memory=Pool())
+
+
+def test_dead_worker_fails_its_futures(config):
+    with ShardedMemory(config, workers=1) as memory:
+        # Queued while the worker still imports mem0.
+        future = memory.get_all(user_id="alice")
+        os.kill(memory._processes[0].pid, signal.SIGKILL)
+
+        with pytest.raises(RuntimeError, match="died"):
+            future.result(timeout=10)
+        with pytest.raises(RuntimeError, match="not running"):
+            memory.get_all(user_id="alice")
+
+        start = time.monotonic()
+    assert time.monotonic() - start < 10
+
+
+def test_workers_answer(config):
+    with ShardedMemory(config, workers=1) as memory:
+        assert memory.get_all(user_id="alice").result(timeout=60) == {
+            "results": []
+        }
+
+
+def test_workers_join_the_bus(config):
+    # Socket paths are short, stay out of pytest's deep tmp_path.
+    directory = tempfile.mkdtemp(prefix="langmem0-")
+    bus = UnixSocketBus(directory)
+    try:
+        with ShardedMemory(
+            config,
+            workers=1,
+            hot_tier={},
+            bus_factory=functools.partial(UnixSocketBus, directory),
+        ) as memory:
+            memory.get_all(user_id="alice").result(timeout=60)
+            assert len(list(bus.directory.glob("*.sock"))) == 2
+
+        assert list(bus.directory.glob("*.sock")) == [bus.path]
+    finally:
+        bus.close()
@@ -0,0 +1,80 @@
+import os
+import uuid
+from contextlib import contextmanager
+
+import pytest
+
+from langmem0.snapshot import iter_memories
+
+
+psycopg = pytest.importorskip("psycopg")
+
+DSN = os.environ.get("LANGMEM0_TEST_POSTGRES")
+
+
+class PGVector:
+    """mem0's pgvector store, on a table without the vector extension."""
+
+    collection_name = "memories"
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    @contextmanager
+    def _get_cursor(self):
+        with self.conn.cursor() as cur:
+            yield cur
+
+
+class Memory:
+    def __init__(self, store):
+        self.vector_store = store
+
+
+@pytest.fixture
+def store():
+    if not DSN:
+        pytest.skip("set LANGMEM0_TEST_POSTGRES to a Postgres DSN")
+
+    with psycopg.connect(DSN) as conn:
+        conn.execute("SET client_encoding TO 'UTF8'")
+        conn.execute(
+            "CREATE TEMPORARY TABLE memories "
+            "(id UUID PRIMARY KEY, vector TEXT, payload JSONB)"
+        )
+        for i in range(7):
+            conn.execute(
+                "INSERT INTO memories VALUES (%s, %s, %s)",
+                (
+                    uuid.uuid4(),
+                    f"[{i}.0, 1.0]",
+                    psycopg.types.json.Jsonb(
+                        {"data": f"fact {i}", "user_id": f"u{i % 2}"}
+                    ),
+                ),
+            )
+        yield PGVector(conn)
+
+
+def test_pgvector_pages_through_uuid_keys(store):
+    rows = list(iter_memories(Memory(store), page_size=3, with_vectors=True))
+
+    assert len(rows) == 7
+    assert len({v["id"] for v in rows}) == 7
+    assert sorted(v["vector"][0] for v in rows) == list(range(7))
+
+
+def test_pgvector_pages_with_filters(store):
+    rows = list(
+        iter_memories(
+            Memory(store), {"user_id": "u0"}, page_size=2, with_vectors=False
+        )
+    )
+
+    assert sorted(v["payload"]["data"] for v in rows) == [
+        "fact 0",
+        "fact 2",
+        "fact 4",
+        "fact 6",
+    ]
+    assert all("vector" not in v for v in rows)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from langmem0.vectors import CompactVectors
+
+
+@pytest.fixture
+def rows():
+    return np.random.default_rng(0).standard_normal((50, 16))
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_search_returns_best_rows(rows, dtype):
+    vectors = CompactVectors.from_rows(rows, dtype)
+
+    top, scores = vectors.search(rows[7], 3)
+
+    assert top[0] == 7
+    assert scores[0] == pytest.approx(1, abs=1e-2)
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_search_with_restrictive_mask(rows, dtype):
+    vectors = CompactVectors.from_rows(rows, dtype)
+    mask = np.zeros(len(rows), dtype=bool)
+    mask[[3, 11]] = True
+
+    top, scores = vectors.search(rows[3], 4, mask)
+
+    assert sorted(top) == [3, 11]
+    assert top[0] == 3
+    assert len(scores) == 2
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_search_with_empty_mask(rows, dtype):
+    vectors = CompactVectors.from_rows(rows, dtype)
+
+    top, scores = vectors.search(rows[0], 4, np.zeros(len(rows), dtype=bool))
+
+    assert len(top) == len(scores) == 0
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_search_k_beyond_rows(rows, dtype):
+    vectors = CompactVectors.from_rows(rows[:3], dtype)
+
+    top, _ = vectors.search(rows[0], 10, oversample=8)
+
+    assert sorted(top) == [0, 1, 2]